@@ -1,5 +1,8 @@
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
+from rest_framework.permissions import SAFE_METHODS
+from .cache import PRINCIPAL_FIELDS, get_principal_cache
 from .jwt_utils import decode_jwt
 from .models import User
 
@@ -28,8 +31,26 @@ class JWTAuthentication(BaseAuthentication):
         if not user_id:
             raise exceptions.AuthenticationFailed('Invalid token payload')
 
-        user = User.objects(id=user_id, is_active=True).first()
+        # Option : en lecture seule, on fait confiance aux claims signés (aucun accès base) :
+        # ni le rôle ni is_active ne sont vérifiés, un compte désactivé garde l'accès en
+        # lecture jusqu'à l'expiration de son token (JWT_EXPIRE_MIN)
+        if settings.JWT_TRUST_CLAIMS_SAFE_METHODS and request.method in SAFE_METHODS and payload.get('role'):
+            return (User(id=user_id, role=payload['role'], email=payload.get('email')), None)
+
+        user = self._load_user(user_id)
         if not user:
             raise exceptions.AuthenticationFailed('User not found or inactive')
 
         return (user, None)
+
+    def _load_user(self, user_id: str):
+        cache = get_principal_cache()
+        son = cache.get(user_id)
+        if son is not None:
+            return User._from_son(son)
+
+        generation = cache.generation(user_id)
+        user = User.objects(id=user_id, is_active=True).only(*PRINCIPAL_FIELDS).first()
+        if user:
+            cache.set(user_id, user.to_mongo().to_dict(), generation)
+        return user
@@ -0,0 +1,167 @@
+# accounts/cache.py
+# Cache des utilisateurs authentifiés (uid -> champs utiles à l'authentification, jamais
+# password_hash), pour éviter un aller-retour Mongo à chaque requête JWT. LRU borné par TTL
+# dans le process, Redis optionnel partagé.
+# Course lecture/invalidation : le chargeur relève une génération avant de lire Mongo et
+# set() n'écrit que si aucune invalidation n'a eu lieu entre-temps (compteur local, et
+# clé de génération par utilisateur dans Redis, vérifiée sous WATCH).
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from bson import json_util
+from django.conf import settings
+
+# seuls champs mis en cache (et chargés) pour l'utilisateur authentifié
+PRINCIPAL_FIELDS = ("email", "full_name", "role", "is_active", "created_at")
+
+class PrincipalCache:
+    def __init__(self, ttl: float, max_items: int, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.redis_url = redis_url
+        self._redis = None
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._epoch = 0   # invalidations vues par ce process
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+
+    # --- Redis (tolérant aux pannes : on retombe sur Mongo) -------------
+    def _client(self):
+        if self._redis is None and self.redis_url:
+            import redis
+            self._redis = redis.Redis.from_url(self.redis_url, socket_timeout=0.2)
+        return self._redis
+
+    def _redis_key(self, uid: str) -> str:
+        return f"auth:principal:{uid}"
+
+    def _redis_gen_key(self, uid: str) -> str:
+        return f"auth:principal-gen:{uid}"
+
+    def _gen_ttl(self) -> int:
+        # survit largement au chargement le plus lent ; expirée, la génération repart à 0 sans risque
+        return max(int(self.ttl) * 10, 60)
+
+    def _redis_get(self, uid: str) -> Optional[dict]:
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._redis_key(uid))
+        except Exception:
+            return None
+        return json_util.loads(raw) if raw else None
+
+    def _redis_generation(self, uid: str) -> Optional[bytes]:
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            return client.get(self._redis_gen_key(uid)) or b"0"
+        except Exception:
+            return None
+
+    def _redis_set(self, uid: str, son: dict, generation: Optional[bytes]):
+        client = self._client()
+        if client is None or generation is None:
+            return
+        try:
+            with client.pipeline() as pipe:
+                pipe.watch(self._redis_gen_key(uid))
+                if (pipe.get(self._redis_gen_key(uid)) or b"0") != generation:
+                    return   # invalidé pendant la lecture Mongo : valeur périmée
+                pipe.multi()
+                pipe.set(self._redis_key(uid), json_util.dumps(son), ex=max(int(self.ttl), 1))
+                pipe.execute()   # WatchError si une invalidation s'intercale
+        except Exception:
+            pass
+
+    def _redis_delete(self, uid: str):
+        client = self._client()
+        if client is None:
+            return
+        try:
+            with client.pipeline() as pipe:
+                pipe.incr(self._redis_gen_key(uid))
+                pipe.expire(self._redis_gen_key(uid), self._gen_ttl())
+                pipe.delete(self._redis_key(uid))
+                pipe.execute()
+        except Exception:
+            pass
+
+    # --- API ------------------------------------------------------------
+    def get(self, uid: str) -> Optional[dict]:
+        """Champs PRINCIPAL_FIELDS (SON) de l'utilisateur, ou None si absent/expiré."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lru.get(uid)
+            if entry and entry[0] > now:
+                self._lru.move_to_end(uid)
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._lru[uid]
+
+        epoch = self._epoch
+        son = self._redis_get(uid)
+        if son is not None:
+            self.redis_hits += 1
+            self._put_local(uid, son, epoch)
+            return son
+        self.misses += 1
+        return None
+
+    def _put_local(self, uid: str, son: dict, epoch: int):
+        if self.max_items <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            self._lru[uid] = (time.monotonic() + self.ttl, son)
+            self._lru.move_to_end(uid)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    def generation(self, uid: str) -> Tuple[int, Optional[bytes]]:
+        """À relever avant de lire l'utilisateur dans Mongo, puis à passer à set()."""
+        return self._epoch, self._redis_generation(uid)
+
+    def set(self, uid: str, son: dict, generation: Tuple[int, Optional[bytes]]):
+        son = {k: v for k, v in son.items() if k == "_id" or k in PRINCIPAL_FIELDS}
+        epoch, redis_generation = generation
+        self._put_local(uid, son, epoch)
+        self._redis_set(uid, son, redis_generation)
+
+    def invalidate(self, uid: str):
+        with self._lock:
+            self._epoch += 1
+            self._lru.pop(uid, None)
+        self._redis_delete(uid)
+
+    def stats(self) -> dict:
+        total = self.hits + self.redis_hits + self.misses
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.redis_hits) / total, 4) if total else 0.0,
+            "size": len(self._lru),
+            "max_items": self.max_items,
+            "ttl_s": self.ttl,
+        }
+
+_cache: Optional[PrincipalCache] = None
+
+def get_principal_cache() -> PrincipalCache:
+    global _cache
+    if _cache is None:
+        _cache = PrincipalCache(
+            ttl=settings.AUTH_PRINCIPAL_CACHE_TTL,
+            max_items=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+            redis_url=settings.REDIS_URL if settings.AUTH_PRINCIPAL_CACHE_REDIS else None,
+        )
+    return _cache
@@ -1,6 +1,7 @@
 import datetime as dt
 from mongoengine import Document, StringField, EmailField, DateTimeField, BooleanField
 from passlib.hash import bcrypt
+from .cache import get_principal_cache
 
 ROLES = ('admin', 'recruiter', 'candidate')
 
@@ -14,6 +15,16 @@ class User(Document):
     is_active = BooleanField(default=True)
     created_at = DateTimeField(default=dt.datetime.utcnow)
 
+    def save(self, *args, **kwargs):
+        # rôle, activation, etc. : le cache d'authentification doit relire l'utilisateur
+        res = super().save(*args, **kwargs)
+        get_principal_cache().invalidate(str(self.id))
+        return res
+
+    def delete(self, *args, **kwargs):
+        get_principal_cache().invalidate(str(self.id))
+        return super().delete(*args, **kwargs)
+
     def set_password(self, raw: str): self.password_hash = bcrypt.hash(raw)
     def check_password(self, raw: str) -> bool: return bcrypt.verify(raw, self.password_hash)
 
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import register, login, UserViewSet, me
+from .views import register, login, UserViewSet, me, auth_cache_stats
 router = DefaultRouter()
 router.register('users', UserViewSet, basename='users')
 urlpatterns = [
@@ -8,4 +8,5 @@ urlpatterns = [
     path('auth/login/', login),
     path('', include(router.urls)),
     path('auth/me/', me),
+    path('auth/cache-stats/', auth_cache_stats),
 ]
@@ -2,8 +2,10 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status, viewsets
 from .models import User
+from hrms_backend.listing import LazyQuerySet
 from rest_framework.permissions import AllowAny , IsAuthenticated
 from .serializers import UserPublicSerializer, UserCreateSerializer
+from .cache import get_principal_cache
 from .jwt_utils import create_jwt
 from .permissions import IsAdmin
 
@@ -11,7 +13,7 @@ from .permissions import IsAdmin
 @permission_classes([AllowAny]) 
 def register(request):
     ser = UserCreateSerializer(data=request.data); ser.is_valid(raise_exception=True)
-    user = ser.save(); token = create_jwt({'uid': str(user.id), 'role': user.role})
+    user = ser.save(); token = create_jwt({'uid': str(user.id), 'role': user.role, 'email': user.email})
     return Response({'token': token, 'user': UserPublicSerializer(user).data}, status=201)
 
 @api_view(['POST'])
@@ -20,11 +22,11 @@ def login(request):
     email = request.data.get('email'); password = request.data.get('password')
     user = User.objects(email=email, is_active=True).first()
     if not user or not user.check_password(password): return Response({'detail':'Invalid credentials'}, status=400)
-    token = create_jwt({'uid': str(user.id), 'role': user.role})
+    token = create_jwt({'uid': str(user.id), 'role': user.role, 'email': user.email})
     return Response({'token': token, 'user': UserPublicSerializer(user).data})
 
 class UserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects
+    queryset = LazyQuerySet(lambda: User.objects)
     serializer_class = UserPublicSerializer
     permission_classes = [IsAdmin]
 
@@ -33,3 +35,8 @@ class UserViewSet(viewsets.ModelViewSet):
 def me(request):
     u = request.user
     return Response({"id": str(u.id), "email": u.email, "role": u.role})
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def auth_cache_stats(request):
+    return Response(get_principal_cache().stats())
@@ -0,0 +1,87 @@
+# ai/backends.py
+# Backends d'inférence pour les embeddings (AI_BACKEND) :
+#   torch     : SentenceTransformer PyTorch fp32 (comportement historique)
+#   quantized : même modèle, couches Linear quantifiées int8 (dynamic quantization CPU)
+#   stub      : vecteurs déterministes par hachage des tokens, sans ML (tests, benchmarks)
+from __future__ import annotations
+import hashlib
+import re
+import threading
+from typing import Dict, List, Type
+
+import numpy as np
+
+class EmbeddingBackend:
+    name = "base"
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def model_id(self) -> str:
+        """Identifie les vecteurs produits (clé du cache d'embeddings)."""
+        return f"{self.model_name}@{self.name}"
+
+    def _load(self):
+        pass
+
+    def load(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._load()
+                    self._loaded = True
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def encode(self, texts: List[str], batch_size: int = 32) -> np.ndarray:
+        """Matrice (N, dim) float32 de vecteurs normalisés."""
+        self.load()
+        return np.asarray(self._encode(texts, batch_size), dtype=np.float32)
+
+    def warm_up(self):
+        # charge les poids et exécute une première inférence (allocations, threads)
+        self.encode(["warm up"])
+
+class TorchBackend(EmbeddingBackend):
+    name = "torch"
+
+    def _load(self):
+        from sentence_transformers import SentenceTransformer   # import lourd (torch) : seulement au chargement
+        self.model = SentenceTransformer(self.model_name, device="cpu")  # télécharge au 1er run, cache local ~/.cache
+
+    def _encode(self, texts, batch_size):
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+class QuantizedBackend(TorchBackend):
+    name = "quantized"
+
+    def _load(self):
+        import torch
+        super()._load()
+        self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class StubBackend(EmbeddingBackend):
+    """Sac de mots haché (signé) : déterministe, rapide, similarité ~ recouvrement lexical."""
+    name = "stub"
+    dim = 384
+    _TOKEN = re.compile(r"\w+")
+
+    def _encode(self, texts, batch_size):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in self._TOKEN.findall((text or "").lower()):
+                h = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+                out[i, h % self.dim] += 1.0 if (h >> 63) else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+BACKENDS: Dict[str, Type[EmbeddingBackend]] = {
+    "torch": TorchBackend,
+    "quantized": QuantizedBackend,
+    "stub": StubBackend,
+}
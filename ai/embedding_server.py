@@ -0,0 +1,116 @@
+# ai/embedding_server.py
+# Mode "serveur d'embeddings" (AI_EMBEDDING_MODE=server) : un seul process long garde
+# le modèle en mémoire ; les workers Celery lui envoient leurs textes via une liste
+# Redis. Le serveur regroupe les requêtes arrivées dans une petite fenêtre de latence
+# en micro-batchs et renvoie les vecteurs à chaque demandeur.
+from __future__ import annotations
+import json
+import logging
+import struct
+import time
+import uuid
+from typing import List, Optional
+
+import numpy as np
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("<II")   # (n, dim) puis n*dim float32 ; n=dim=0 => message d'erreur utf-8
+_client: Optional[redis.Redis] = None
+
+class EmbeddingServerError(RuntimeError):
+    pass
+
+def _redis() -> redis.Redis:
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.AI_EMBEDDING_SERVER_URL)
+    return _client
+
+def _reply_key(request_id: str) -> str:
+    return f"{settings.AI_EMBEDDING_QUEUE}:reply:{request_id}"
+
+# --- côté client (workers) --------------------------------------------------
+
+def encode_remote(texts: List[str], timeout: Optional[float] = None) -> np.ndarray:
+    """Envoie `texts` au serveur et attend la matrice (N, dim) de vecteurs normalisés."""
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    timeout = timeout or settings.AI_EMBEDDING_SERVER_TIMEOUT_S
+    request_id = uuid.uuid4().hex
+    client = _redis()
+    client.lpush(settings.AI_EMBEDDING_QUEUE, json.dumps({"id": request_id, "texts": texts, "ts": time.time()}))
+    reply = client.blpop([_reply_key(request_id)], timeout=timeout)
+    if reply is None:
+        raise EmbeddingServerError(f"pas de réponse du serveur d'embeddings en {timeout}s")
+    payload = reply[1]
+    n, dim = _HEADER.unpack_from(payload)
+    if n == 0 and dim == 0:
+        raise EmbeddingServerError(payload[_HEADER.size:].decode("utf-8", errors="replace"))
+    return np.frombuffer(payload, dtype=np.float32, offset=_HEADER.size).reshape(n, dim)
+
+# --- côté serveur ---------------------------------------------------------
+
+def _collect(client: redis.Redis, max_texts: int, max_wait: float, poll: float) -> List[dict]:
+    """Attend une première requête, puis agrège celles qui arrivent pendant `max_wait`."""
+    first = client.brpop([settings.AI_EMBEDDING_QUEUE], timeout=poll)
+    if first is None:
+        return []
+    batch = [json.loads(first[1])]
+    count = len(batch[0]["texts"])
+    deadline = time.monotonic() + max_wait
+    while count < max_texts:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        raw = client.rpop(settings.AI_EMBEDDING_QUEUE)
+        if raw is None:
+            time.sleep(min(remaining, 0.002))
+            continue
+        req = json.loads(raw)
+        batch.append(req)
+        count += len(req["texts"])
+    return batch
+
+def _reply(pipe, request_id: str, payload: bytes):
+    key = _reply_key(request_id)
+    pipe.rpush(key, payload)
+    pipe.expire(key, 60)   # demandeur parti (timeout) : la réponse ne traîne pas
+
+def serve(max_texts: Optional[int] = None, max_wait_ms: Optional[float] = None, poll: float = 1.0,
+          stop=lambda: False):
+    """Boucle du serveur (management command run_embedding_server)."""
+    from .service import get_backend   # le serveur est le seul process qui charge le modèle
+
+    max_texts = max_texts or settings.AI_EMBEDDING_SERVER_MAX_BATCH
+    max_wait = (max_wait_ms if max_wait_ms is not None else settings.AI_EMBEDDING_SERVER_MAX_WAIT_MS) / 1000.0
+    backend = get_backend()
+    backend.warm_up()
+    client = _redis()
+    logger.info("embedding server ready (%s, batch<=%s, wait<=%sms)", backend.model_id, max_texts, max_wait * 1000)
+
+    while not stop():
+        batch = _collect(client, max_texts, max_wait, poll)
+        if not batch:
+            continue
+        texts = [t for req in batch for t in req["texts"]]
+        pipe = client.pipeline()
+        try:
+            vectors = backend.encode(texts, batch_size=settings.AI_ENCODE_BATCH_SIZE)
+        except Exception as e:
+            logger.exception("embedding batch failed")
+            for req in batch:
+                _reply(pipe, req["id"], _HEADER.pack(0, 0) + str(e).encode("utf-8"))
+            pipe.execute()
+            continue
+
+        offset = 0
+        for req in batch:
+            n = len(req["texts"])
+            chunk = np.ascontiguousarray(vectors[offset:offset + n])
+            offset += n
+            _reply(pipe, req["id"], _HEADER.pack(n, chunk.shape[1] if n else 0) + chunk.tobytes())
+        pipe.execute()
+        logger.debug("batch: %s requests, %s texts", len(batch), len(texts))
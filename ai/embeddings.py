@@ -0,0 +1,157 @@
+# ai/embeddings.py
+from __future__ import annotations
+import datetime as dt
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+import numpy as np
+from pymongo.errors import BulkWriteError
+
+from hrms_backend.instrumentation import get_registry
+from .models import Embedding
+
+_METRIC = "hrms_embedding_cache_total"
+
+_WS = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", text or "").strip()
+
+def embedding_key(model_name: str, text: str) -> str:
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+class EmbeddingStore:
+    """
+    Cache d'embeddings à deux niveaux :
+    - LRU en mémoire (max_items entrées, par process)
+    - collection Mongo `embeddings` (float32 binaire), partagée entre workers
+    Les textes absents des deux niveaux sont encodés en un seul appel à `compute`.
+    """
+
+    def __init__(self, model_name: str, max_items: int = 4096, persist: bool = True):
+        self.model_name = model_name
+        self.max_items = max_items
+        self.persist = persist
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    # --- LRU -----------------------------------------------------------
+    def _lru_get(self, key: str):
+        with self._lock:
+            vec = self._lru.get(key)
+            if vec is not None:
+                self._lru.move_to_end(key)
+            return vec
+
+    def _lru_put(self, key: str, vec: np.ndarray):
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._lru[key] = vec
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+    # --- Mongo ---------------------------------------------------------
+    def _store_get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        if not self.persist or not keys:
+            return {}
+        cursor = Embedding._get_collection().find(
+            {"_id": {"$in": keys}, "model": self.model_name},
+            {"vector": 1},
+        )
+        return {doc["_id"]: np.frombuffer(doc["vector"], dtype=np.float32) for doc in cursor}
+
+    def _store_put_many(self, items: Dict[str, np.ndarray]):
+        if not self.persist or not items:
+            return
+        now = dt.datetime.utcnow()
+        docs = [
+            {
+                "_id": key,
+                "model": self.model_name,
+                "dim": int(vec.shape[0]),
+                "vector": vec.tobytes(),
+                "created_at": now,
+            }
+            for key, vec in items.items()
+        ]
+        try:
+            Embedding._get_collection().insert_many(docs, ordered=False)
+        except BulkWriteError:
+            pass  # doublons insérés en parallèle par un autre worker : sans effet
+
+    # --- API -----------------------------------------------------------
+    def get_many(self, texts: List[str], compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """Retourne la matrice (N, dim) float32 des embeddings de `texts`, dans l'ordre."""
+        texts = [normalize_text(t) for t in texts]
+        keys = [embedding_key(self.model_name, t) for t in texts]
+
+        found: Dict[str, np.ndarray] = {}
+        for key in keys:
+            vec = self._lru_get(key)
+            if vec is not None:
+                found[key] = vec
+        memory_hits = sum(1 for key in keys if key in found)
+        self.memory_hits += memory_hits
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        stored = self._store_get_many(missing)
+        for key, vec in stored.items():
+            found[key] = vec
+            self._lru_put(key, vec)
+        store_hits = sum(1 for key in keys if key in stored)
+        self.store_hits += store_hits
+
+        todo = {k: t for k, t in zip(keys, texts) if k not in found}
+        # exposés par /internal/metrics (les attributs ne servent qu'à stats() dans le process)
+        registry = get_registry()
+        registry.inc(_METRIC, memory_hits, model=self.model_name, result="memory_hit")
+        registry.inc(_METRIC, store_hits, model=self.model_name, result="store_hit")
+        registry.inc(_METRIC, len(todo), model=self.model_name, result="miss")
+        if todo:
+            self.misses += len(todo)
+            vectors = np.asarray(compute(list(todo.values())), dtype=np.float32)
+            computed = dict(zip(todo.keys(), vectors))
+            self._store_put_many(computed)
+            for key, vec in computed.items():
+                found[key] = vec
+                self._lru_put(key, vec)
+
+        return np.stack([found[k] for k in keys])
+
+    def stats(self) -> Dict[str, float]:
+        total = self.memory_hits + self.store_hits + self.misses
+        return {
+            "model": self.model_name,
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.store_hits) / total, 4) if total else 0.0,
+            "lru_size": len(self._lru),
+            "lru_max": self.max_items,
+        }
+
+    def clear_memory(self):
+        with self._lock:
+            self._lru.clear()
+
+def purge(model_name: str = None, keep_model: str = None) -> int:
+    """Supprime les embeddings d'un modèle donné, ou de tous sauf `keep_model`."""
+    if model_name:
+        query = {"model": model_name}
+    elif keep_model:
+        query = {"model": {"$ne": keep_model}}
+    else:
+        query = {}
+    return Embedding._get_collection().delete_many(query).deleted_count
@@ -0,0 +1,274 @@
+# ai/index.py
+from __future__ import annotations
+import fcntl
+import glob
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+class VectorIndex:
+    """
+    Index vectoriel (vecteurs normalisés + ids) persisté dans AI_INDEX_DIR, partagé
+    entre process et conteneurs (volume commun) :
+
+    - un instantané par génération : <name>.<g>.npy (relu en mmap) et <name>.<g>.ids.json ;
+      <name>.current désigne la génération courante (remplacement atomique) ;
+    - un journal d'écritures depuis cet instantané : <name>.<g>.log.f32 (lignes float32
+      ajoutées) et <name>.<g>.log.jsonl (une ligne par opération, écrite après le vecteur).
+
+    Un upsert/remove ne fait qu'ajouter au journal (O(lot), pas O(N)) ; au-delà de
+    AI_INDEX_COMPACT_EVERY opérations, le journal est fusionné dans une nouvelle
+    génération. Les lecteurs ne relisent que la fin du journal quand il grandit.
+    Écritures sous verrou fichier (<name>.lock).
+    """
+
+    def __init__(self, name: str, directory: Path):
+        self.name = name
+        self.directory = Path(directory)
+        self._current_path = self.directory / f"{name}.current"
+        self._lock_path = self.directory / f"{name}.lock"
+        self._mutex = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, generation: Optional[int]):
+        self._generation = generation
+        self._current_mtime: Optional[int] = None
+        self._base: Optional[np.ndarray] = None      # instantané (mmap)
+        self._base_ids: List[str] = []
+        self._base_pos: Dict[str, int] = {}
+        self._log: Optional[np.ndarray] = None       # lignes du journal (en mémoire)
+        self._log_ids: List[str] = []                # id de chaque ligne du journal
+        self._overlay: Dict[str, Optional[int]] = {}   # id -> ligne du journal, None = supprimé
+        self._log_offset = 0                         # octets du .jsonl déjà lus
+        self._log_ops = 0
+
+    # --- chemins -------------------------------------------------------
+    def _path(self, generation: int, suffix: str) -> Path:
+        return self.directory / f"{self.name}.{generation}.{suffix}"
+
+    def _read_current(self) -> Tuple[Optional[int], Optional[int]]:
+        try:
+            mtime = self._current_path.stat().st_mtime_ns
+            with open(self._current_path) as fh:
+                return json.load(fh)["generation"], mtime
+        except (FileNotFoundError, ValueError, KeyError):
+            return None, None
+
+    # --- lecture de l'état ---------------------------------------------
+    def _load_base(self, generation: int, mtime: int):
+        vectors = np.load(self._path(generation, "npy"), mmap_mode="r")
+        with open(self._path(generation, "ids.json")) as fh:
+            ids = json.load(fh)
+        self._reset(generation)
+        self._current_mtime = mtime
+        self._base, self._base_ids = (vectors if len(ids) else None), ids
+        self._base_pos = {id_: i for i, id_ in enumerate(ids)}
+
+    def _read_log_tail(self):
+        """Applique les opérations ajoutées au journal depuis la dernière lecture."""
+        if self._generation is None:
+            return
+        try:
+            with open(self._path(self._generation, "log.jsonl"), "rb") as fh:
+                fh.seek(self._log_offset)
+                data = fh.read()
+        except FileNotFoundError:
+            return
+        end = data.rfind(b"\n") + 1   # ligne incomplète : écriture en cours
+        if not end:
+            return
+        ops = [json.loads(line) for line in data[:end].splitlines() if line]
+        new_rows = sum(1 for op in ops if op["op"] == "u")
+        if new_rows:
+            dim = int(ops[0].get("dim") or next(op["dim"] for op in ops if op["op"] == "u"))
+            first = len(self._log_ids)
+            rows = np.fromfile(self._path(self._generation, "log.f32"), dtype=np.float32,
+                               count=new_rows * dim, offset=first * dim * 4).reshape(new_rows, dim)
+            self._log = rows if self._log is None else np.vstack([self._log, rows])
+        for op in ops:
+            if op["op"] == "u":
+                self._overlay[op["id"]] = len(self._log_ids)
+                self._log_ids.append(op["id"])
+            else:
+                self._overlay[op["id"]] = None
+        self._log_offset += end
+        self._log_ops += len(ops)
+
+    def _sync(self):
+        """Met l'état du process à jour (appelé sous self._mutex)."""
+        generation, mtime = self._read_current()
+        if generation is None:
+            self._reset(None)
+            return
+        if generation != self._generation or mtime != self._current_mtime:
+            try:
+                self._load_base(generation, mtime)
+            except FileNotFoundError:
+                return   # génération remplacée entre-temps : état précédent conservé
+        try:
+            self._read_log_tail()
+        except FileNotFoundError:
+            pass   # journal purgé par une compaction concurrente : relu au prochain appel
+
+    def _refresh(self):
+        with self._mutex:
+            self._sync()
+
+    def _live(self) -> Tuple[List[str], Optional[np.ndarray]]:
+        """(ids, vecteurs) de toutes les entrées vivantes (copie : compaction seulement)."""
+        base_keep = [i for i, id_ in enumerate(self._base_ids) if id_ not in self._overlay]
+        log_keep = [row for id_, row in self._overlay.items() if row is not None]
+        parts = []
+        if self._base is not None and base_keep:
+            parts.append(np.asarray(self._base[base_keep]))
+        if self._log is not None and log_keep:
+            parts.append(self._log[log_keep])
+        ids = [self._base_ids[i] for i in base_keep] + [self._log_ids[row] for row in log_keep]
+        return ids, (np.vstack(parts) if parts else None)
+
+    # --- écriture ------------------------------------------------------
+    @contextmanager
+    def _writing(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with self._mutex:
+                    self._sync()
+                    yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _write_generation(self, ids: List[str], vectors: Optional[np.ndarray]):
+        """Nouvel instantané complet, puis bascule de <name>.current et purge des anciennes générations."""
+        generation = (self._generation or 0) + 1
+        vectors = vectors if vectors is not None else np.empty((0, 0), np.float32)
+        np.save(self._path(generation, "tmp.npy"), np.ascontiguousarray(vectors, dtype=np.float32))
+        os.replace(self._path(generation, "tmp.npy"), self._path(generation, "npy"))
+        with open(self._path(generation, "ids.tmp"), "w") as fh:
+            json.dump(ids, fh)
+        os.replace(self._path(generation, "ids.tmp"), self._path(generation, "ids.json"))
+        tmp_current = self._current_path.with_suffix(".tmp")
+        with open(tmp_current, "w") as fh:
+            json.dump({"generation": generation}, fh)
+        os.replace(tmp_current, self._current_path)
+        for path in glob.glob(str(self.directory / f"{glob.escape(self.name)}.*.*")):
+            gen = Path(path).name[len(self.name) + 1:].split(".", 1)[0]
+            if gen.isdigit() and int(gen) != generation:
+                os.remove(path)
+        self._sync()
+
+    def _append(self, ops: List[dict], vectors: Optional[np.ndarray]):
+        if self._generation is None:
+            self._write_generation([], None)   # première écriture : génération vide
+        if vectors is not None and len(vectors):
+            dim = self._base.shape[1] if self._base is not None else (self._log.shape[1] if self._log is not None else None)
+            if dim is not None and vectors.shape[1] != dim:
+                raise ValueError(f"dimension {vectors.shape[1]} ≠ {dim} : reconstruire l'index (rebuild)")
+            with open(self._path(self._generation, "log.f32"), "ab") as fh:
+                fh.truncate(len(self._log_ids) * vectors.shape[1] * 4)   # restes d'une écriture interrompue
+                fh.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self._path(self._generation, "log.jsonl"), "a") as fh:
+            fh.write("".join(json.dumps(op) + "\n" for op in ops))   # après les vecteurs : valide l'écriture
+        self._read_log_tail()
+        if self._log_ops >= settings.AI_INDEX_COMPACT_EVERY:
+            self._write_generation(*self._live())
+
+    def upsert(self, ids: List[str], vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(ids):
+            return
+        dim = int(vectors.shape[1])
+        with self._writing():
+            self._append([{"op": "u", "id": id_, "dim": dim} for id_ in ids], vectors)
+
+    def remove(self, ids: Iterable[str]):
+        with self._writing():
+            drop = [id_ for id_ in dict.fromkeys(ids) if self._locate(id_) is not None]
+            if drop:
+                self._append([{"op": "r", "id": id_} for id_ in drop], None)
+
+    def rebuild(self, ids: List[str], vectors: Optional[np.ndarray]):
+        with self._writing():
+            empty = vectors is None or not len(ids)
+            self._write_generation(list(ids), None if empty else np.asarray(vectors, dtype=np.float32))
+
+    def compact(self):
+        """Fusionne le journal dans une nouvelle génération (aussi fait automatiquement)."""
+        with self._writing():
+            if self._log_ops:
+                self._write_generation(*self._live())
+
+    # --- lecture -------------------------------------------------------
+    def _locate(self, id_: str) -> Optional[Tuple[bool, int]]:
+        """(dans le journal ?, ligne) de la version vivante de id_, ou None."""
+        if id_ in self._overlay:
+            row = self._overlay[id_]
+            return None if row is None else (True, row)
+        row = self._base_pos.get(id_)
+        return None if row is None else (False, row)
+
+    def __len__(self) -> int:
+        self._refresh()
+        with self._mutex:
+            shadowed = sum(1 for id_ in self._overlay if id_ in self._base_pos)
+            return len(self._base_ids) - shadowed + sum(1 for row in self._overlay.values() if row is not None)
+
+    def get(self, id_: str) -> Optional[np.ndarray]:
+        self._refresh()
+        with self._mutex:
+            found = self._locate(id_)
+            if found is None:
+                return None
+            in_log, row = found
+            return np.array(self._log[row] if in_log else self._base[row])
+
+    def search(self, query: np.ndarray, k: int = 10, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """Top-k par similarité cosinus : produits matrice-vecteur (instantané + journal) + argpartition."""
+        self._refresh()
+        with self._mutex:
+            base, base_ids, log, log_ids = self._base, self._base_ids, self._log, self._log_ids
+            overlay, base_pos = dict(self._overlay), self._base_pos
+        if k <= 0 or (base is None and log is None):
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        parts, ids = [], list(base_ids) if base is not None else []
+        if base is not None:
+            parts.append(base @ query)
+        if log is not None:
+            parts.append(log @ query)
+            ids += log_ids
+        scores = np.concatenate(parts)
+        offset = len(base_ids) if base is not None else 0
+
+        # lignes masquées : versions remplacées ou supprimées, anciennes lignes du journal, exclusions
+        dead = [base_pos[id_] for id_ in overlay if id_ in base_pos and base is not None]
+        dead += [offset + row for row, id_ in enumerate(log_ids) if log is not None and overlay.get(id_) != row]
+        for id_ in exclude:
+            row = overlay.get(id_, -1)
+            if row == -1 and base is not None and id_ in base_pos:
+                dead.append(base_pos[id_])
+            elif row not in (-1, None) and log is not None:
+                dead.append(offset + row)
+        if dead:
+            scores[dead] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(ids[i], float(scores[i])) for i in top]
+
+_indexes: Dict[str, VectorIndex] = {}
+
+def get_index(name: str) -> VectorIndex:
+    """Index partagé du process : "cv" (candidatures) ou "job" (offres)."""
+    if name not in _indexes:
+        _indexes[name] = VectorIndex(name, Path(settings.AI_INDEX_DIR))
+    return _indexes[name]
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from ai.embeddings import purge
+from ai.models import Embedding
+from ai.service import get_backend
+
+class Command(BaseCommand):
+    help = "Purge le cache d'embeddings (par défaut : tout modèle autre que le modèle courant)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", help="ne supprimer que les vecteurs de ce modèle")
+        parser.add_argument("--all", action="store_true", help="tout supprimer, modèle courant compris")
+        parser.add_argument("--stats", action="store_true", help="afficher le nombre de vecteurs par modèle, sans rien supprimer")
+
+    def handle(self, *args, **opts):
+        if opts["stats"]:
+            pipeline = [{"$group": {"_id": "$model", "count": {"$sum": 1}}}]
+            for row in Embedding._get_collection().aggregate(pipeline):
+                self.stdout.write(f"{row['_id']}: {row['count']}")
+            return
+
+        if opts["all"]:
+            deleted = purge()
+        elif opts["model"]:
+            deleted = purge(model_name=opts["model"])
+        else:
+            deleted = purge(keep_model=get_backend().model_id)
+        self.stdout.write(self.style.SUCCESS(f"{deleted} embedding(s) supprimé(s)"))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from ai.tasks import rebuild_indexes_task
+
+class Command(BaseCommand):
+    help = "Reconstruit les index vectoriels (CV et offres) depuis MongoDB."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=256)
+
+    def handle(self, *args, **opts):
+        res = rebuild_indexes_task(batch_size=opts["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"index reconstruits : {res['cv']} CV, {res['job']} offres"))
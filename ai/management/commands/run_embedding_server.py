@@ -0,0 +1,20 @@
+import signal
+from django.core.management.base import BaseCommand
+from ai.embedding_server import serve
+
+class Command(BaseCommand):
+    help = "Serveur d'embeddings : un seul modèle en mémoire, micro-batchs des requêtes des workers (Redis)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-batch", type=int, help="textes max par micro-batch")
+        parser.add_argument("--max-wait-ms", type=float, help="attente max pour remplir un batch")
+
+    def handle(self, *args, **opts):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        self.stdout.write("embedding server: démarrage")
+        try:
+            serve(max_texts=opts["max_batch"], max_wait_ms=opts["max_wait_ms"], stop=lambda: bool(stopping))
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write("embedding server: arrêt")
@@ -1 +1,42 @@
-# Placeholder models – à compléter
+import datetime as dt
+from mongoengine import (
+    Document, StringField, IntField, BinaryField, DateTimeField, ReferenceField, ListField, DictField,
+)
+from jobs.models import Job
+
+class Embedding(Document):
+    """Vecteur normalisé (float32) adressé par hash(modèle, texte normalisé)."""
+    meta = {"collection": "embeddings", "indexes": ["model"]}
+
+    key = StringField(primary_key=True)
+    model = StringField(required=True)
+    dim = IntField(required=True)
+    vector = BinaryField(required=True)
+    created_at = DateTimeField(default=dt.datetime.utcnow)
+
+RUN_STATUSES = ("pending", "running", "done", "failed")
+
+class AnalysisRun(Document):
+    """Suivi d'une analyse asynchrone d'offre, répartie en chunks sur les workers Celery."""
+    meta = {"collection": "analysis_runs", "indexes": [{"fields": ["job", "-created_at"]}]}
+
+    job = ReferenceField(Job, required=True)
+    status = StringField(choices=RUN_STATUSES, default="pending")
+    total = IntField(default=0)
+    processed = IntField(default=0)
+    failed = IntField(default=0)
+    skipped = IntField(default=0)   # analyses déjà à jour, non relancées
+    chunk_size = IntField(default=50)
+    top_n = IntField(default=5)
+    top = ListField(DictField())
+    created_at = DateTimeField(default=dt.datetime.utcnow)
+    finished_at = DateTimeField(null=True)
+
+    def elapsed(self) -> float:
+        end = self.finished_at or dt.datetime.utcnow()
+        return max((end - self.created_at).total_seconds(), 0.0)
+
+    def throughput(self) -> float:
+        # candidatures traitées par seconde depuis le lancement
+        elapsed = self.elapsed()
+        return round((self.processed + self.failed) / elapsed, 2) if elapsed else 0.0
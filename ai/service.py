@@ -1,47 +1,105 @@
 # ai/service.py
 from __future__ import annotations
+import base64
 import re
 from typing import Dict, Any, List, Optional
 
-from sentence_transformers import SentenceTransformer, util
+import numpy as np
+from django.conf import settings
+from hrms_backend.instrumentation import stage
 
-# ⚙️ Charger le modèle UNE SEULE FOIS (au démarrage du worker)
+from .backends import BACKENDS, EmbeddingBackend
+from .embeddings import EmbeddingStore
+from .skills import get_skill_extractor
+
+# ⚙️ Charger le modèle UNE SEULE FOIS (au démarrage du worker, cf. warm_up)
 # all-MiniLM-L6-v2 ~22M params, très rapide CPU
 _MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-_model: Optional[SentenceTransformer] = None
-
-def get_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        _model = SentenceTransformer(_MODEL_NAME)  # télécharge au 1er run, cache local ~/.cache
-    return _model
-
-# Petit lexique de compétences “connues” (à enrichir au besoin)
-SKILLS_CANON = [
-    "python","django","fastapi","flask",
-    "rest","graphql",
-    "mongodb","postgresql","mysql","redis",
-    "docker","kubernetes","ci/cd","git","github actions","gitlab ci",
-    "aws","gcp","azure",
-    "react","vue","angular","typescript","javascript",
-    "pandas","numpy","spark","airflow","kafka",
-]
+_backend: Optional[EmbeddingBackend] = None
+
+def get_backend() -> EmbeddingBackend:
+    global _backend
+    if _backend is None:
+        _backend = BACKENDS[settings.AI_BACKEND](_MODEL_NAME)
+    return _backend
+
+_store: Optional[EmbeddingStore] = None
+
+def get_store() -> EmbeddingStore:
+    global _store
+    if _store is None:
+        _store = EmbeddingStore(
+            get_backend().model_id,
+            max_items=settings.AI_EMBEDDING_CACHE_SIZE,
+            persist=settings.AI_EMBEDDING_STORE,
+        )
+    return _store
+
+def warm_up():
+    """Démarrage à chaud : poids du modèle + automate de compétences (worker_process_init, post_fork)."""
+    get_skill_extractor()
+    if settings.AI_EMBEDDING_MODE == "local":
+        get_backend().warm_up()
+
+def embedding_stats() -> Dict[str, Any]:
+    return get_store().stats()
+
+def compute_local(texts: List[str], batch_size: int) -> np.ndarray:
+    """Encodage dans ce process (modèle chargé ici) ou via le serveur d'embeddings."""
+    if settings.AI_EMBEDDING_MODE == "server":
+        from .embedding_server import encode_remote
+        return encode_remote(texts)
+    return get_backend().encode(texts, batch_size=batch_size)
+
+def pack_vectors(vectors: np.ndarray) -> Dict[str, Any]:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return {"shape": list(vectors.shape), "data": base64.b64encode(vectors.tobytes()).decode("ascii")}
+
+def unpack_vectors(payload: Dict[str, Any]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype=np.float32).reshape(payload["shape"])
+
+def _in_task() -> bool:
+    # une tâche (ou le mode eager) ne doit pas attendre une autre tâche : encodage sur place
+    from celery import current_task
+    return getattr(current_task, "request", None) is not None and current_task.request.id is not None
+
+def _compute(texts: List[str], batch_size: int) -> np.ndarray:
+    # AI_EMBEDDING_MODE : "local" (modèle dans ce process), "server" (ai.embedding_server)
+    # ou "celery" (process web : tâche ai.encode exécutée par un worker, torch jamais importé ici)
+    if settings.AI_EMBEDDING_MODE == "celery" and not _in_task():
+        from .tasks import encode_task   # import local : ai.tasks importe ce module
+        # une tâche par mini-batch : réparties sur les workers, chacune bornée par AI_ENCODE_TASK_TIMEOUT_S
+        results = [
+            encode_task.apply_async(args=[texts[i:i + batch_size], batch_size], queue=settings.AI_ENCODE_QUEUE)
+            for i in range(0, len(texts), batch_size)
+        ]
+        return np.vstack([unpack_vectors(r.get(timeout=settings.AI_ENCODE_TASK_TIMEOUT_S)) for r in results])
+    return compute_local(texts, batch_size)
+
+def encode(texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+    """Embeddings normalisés (N, dim), via le cache (LRU puis Mongo) puis le modèle."""
+    bs = batch_size or settings.AI_ENCODE_BATCH_SIZE
+    return get_store().get_many(texts, lambda todo: _compute(todo, bs))
+
+# Taxonomie de compétences (ai/data/skills.json) compilée en un seul automate : voir ai/skills.py
+_EDUCATION_RE = re.compile(r"(licen[sc]e|bachelor|master|ingénieur|engineer|mba|ph\.?d)", re.I)
+_EXPERIENCE_RE = re.compile(r"(\d+)\s*(ans?|years?)", re.I)
 
 def _simple_extractions(text: str) -> Dict[str, List[str]]:
     text_l = (text or "").lower()
 
-    skills = [s for s in SKILLS_CANON if s in text_l]
+    skills = get_skill_extractor().skills(text_l)
 
     education = []
-    if re.search(r"(licen[sc]e|bachelor|master|ingénieur|engineer|mba|ph\.?d)", text_l, re.I):
+    if _EDUCATION_RE.search(text_l):
         education.append("Mention de formation détectée")
 
     experience = []
-    if re.search(r"(\d+)\s*(ans?|years?)", text_l, re.I):
+    if _EXPERIENCE_RE.search(text_l):
         experience.append("Mention d'expérience détectée")
 
     return {
-        "skills": sorted(list(set(skills))),
+        "skills": skills,
         "education": education,
         "experience": experience,
     }
@@ -49,6 +107,126 @@ def _simple_extractions(text: str) -> Dict[str, List[str]]:
 def _clean(s: str) -> str:
     return (s or "").strip()
 
+def recommendations(required: set, cv_skills: List[str]) -> List[str]:
+    # Recommandations = skills “job” non vus dans CV
+    found = set(cv_skills)
+    missing = [s for s in sorted(required) if s not in found]
+    return [f"Ajoutez/illustrez '{s}' dans le CV si c'est pertinent." for s in missing]
+
+def to_score(sim: float) -> float:
+    return round(max(sim, 0.0) * 100.0, 1)     # 0..100
+
+def _build_result(ext_cv: Dict[str, List[str]], required: set, sim: float) -> Dict[str, Any]:
+    return {
+        "skills": ext_cv["skills"],
+        "education": ext_cv["education"],
+        "experience": ext_cv["experience"],
+        "score": to_score(sim),
+        "recommendations": recommendations(required, ext_cv["skills"]),
+    }
+
+# --- Découpage des CV en sections ------------------------------------------
+# MiniLM tronque vers ~256 tokens : un CV entier encodé d'un bloc n'est noté que sur
+# son début. On encode des sections (~AI_CHUNK_WORDS mots) et on agrège leurs scores.
+
+_PARAGRAPHS = re.compile(r"\n\s*\n")
+
+def split_sections(text: str, max_words: Optional[int] = None) -> List[str]:
+    """Paragraphes regroupés jusqu'à max_words mots ; les paragraphes trop longs sont coupés."""
+    max_words = max_words or settings.AI_CHUNK_WORDS
+    chunks: List[str] = []
+    current: List[str] = []
+    for para in _PARAGRAPHS.split(_clean(text)):
+        words = para.split()
+        while len(words) > max_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if len(current) + len(words) > max_words and current:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current or not chunks:
+        chunks.append(" ".join(current))
+    return chunks
+
+def chunk_vectors(cv_texts: List[str], batch_size: Optional[int] = None) -> List[np.ndarray]:
+    """Matrices (n_sections, dim) par CV, toutes les sections encodées en un seul appel."""
+    sections = [split_sections(t) for t in cv_texts]
+    flat = [c for secs in sections for c in secs]
+    vectors = encode(flat, batch_size=batch_size)
+    out, offset = [], 0
+    for secs in sections:
+        out.append(vectors[offset:offset + len(secs)])
+        offset += len(secs)
+    return out
+
+def score_chunks(matrices: List[np.ndarray], job_vec: np.ndarray) -> np.ndarray:
+    """
+    Similarité CV/offre pour N CV en une passe : un produit matriciel sur toutes
+    les sections, puis agrégation par CV (max ou moyenne des top-k sections).
+    """
+    if not matrices:
+        return np.zeros(0, dtype=np.float32)
+    sizes = np.array([m.shape[0] for m in matrices])
+    sims = np.vstack(matrices) @ job_vec
+    # matrice (N, max_sections) complétée par -inf, triée par ligne décroissante
+    padded = np.full((len(matrices), sizes.max()), -np.inf, dtype=np.float32)
+    mask = np.arange(sizes.max()) < sizes[:, None]
+    padded[mask] = sims
+    if settings.AI_CHUNK_AGGREGATION == "max":
+        return padded.max(axis=1)
+    k = min(settings.AI_CHUNK_TOPK, padded.shape[1])
+    top = -np.sort(-padded, axis=1)[:, :k]
+    counts = np.minimum(sizes, k)
+    top[np.isinf(top)] = 0.0
+    return top.sum(axis=1) / counts
+
+def encode_job(job_desc: str) -> np.ndarray:
+    return encode([_clean(job_desc)])[0]
+
+def analyze_many(cv_texts: List[str], job_desc: str, batch_size: Optional[int] = None,
+                 stored_chunks: Optional[List[Optional[np.ndarray]]] = None) -> List[Dict[str, Any]]:
+    """
+    Version batch de analyze_text : l'offre est encodée une seule fois, les
+    sections de CV par mini-batchs (AI_ENCODE_BATCH_SIZE), et tous les scores
+    sortent d'un seul calcul matriciel. `stored_chunks` fournit, par CV, les
+    vecteurs de sections déjà calculés (None = à encoder).
+    Retourne un dict par CV, dans le même ordre que cv_texts ; "chunk_vectors"
+    contient les vecteurs de sections nouvellement calculés (None si fournis).
+    """
+    cv_texts = [_clean(t) for t in cv_texts]
+    if not cv_texts:
+        return []
+    job_desc = _clean(job_desc)
+    stored_chunks = stored_chunks or [None] * len(cv_texts)
+
+    # 1) Embeddings (cache) + similarité : vecteurs normalisés => cosinus = produit scalaire
+    with stage("embedding"):
+        emb_job = encode_job(job_desc)
+        todo = [i for i, m in enumerate(stored_chunks) if m is None]
+        fresh = chunk_vectors([cv_texts[i] for i in todo], batch_size=batch_size) if todo else []
+    matrices = list(stored_chunks)
+    for i, m in zip(todo, fresh):
+        matrices[i] = m
+    with stage("score"):
+        sims = score_chunks(matrices, emb_job).tolist()  # [-1..1]
+
+    # 2) Extractions simples (l'offre une seule fois)
+    model_id = get_backend().model_id
+    results = []
+    with stage("skills"):
+        required = set(_simple_extractions(job_desc)["skills"])
+        for text, sim, m, old in zip(cv_texts, sims, matrices, stored_chunks):
+            result = _build_result(_simple_extractions(text), required, float(sim))
+            result["chunk_vectors"] = m if old is None else None
+            result["chunk_model"] = model_id
+            result["chunk_words"] = settings.AI_CHUNK_WORDS
+            results.append(result)
+    return results
+
 def analyze_text(cv_text: str, job_desc: str) -> Dict[str, Any]:
     """
     Retourne un dict:
@@ -58,30 +236,8 @@ def analyze_text(cv_text: str, job_desc: str) -> Dict[str, Any]:
       recommendations: [..]
     }
     """
-    cv_text = _clean(cv_text)
-    job_desc = _clean(job_desc)
-
-    # 1) Embeddings + similarité (score global)
-    model = get_model()
-    emb_cv = model.encode(cv_text, normalize_embeddings=True)
-    emb_job = model.encode(job_desc, normalize_embeddings=True)
-    sim = float(util.cos_sim(emb_cv, emb_job))  # [-1..1]
-    score = round(max(sim, 0.0) * 100.0, 1)     # 0..100
-
-    # 2) Extractions simples (rapides)
-    ext_cv = _simple_extractions(cv_text)
-    ext_job = _simple_extractions(job_desc)
-
-    # 3) Recommandations = skills “job” non vus dans CV
-    required = set(ext_job["skills"])
-    found = set(ext_cv["skills"])
-    missing = [s for s in sorted(required) if s not in found]
-    recs = [f"Ajoutez/illustrez '{s}' dans le CV si c'est pertinent." for s in missing]
-
-    return {
-        "skills": ext_cv["skills"],
-        "education": ext_cv["education"],
-        "experience": ext_cv["experience"],
-        "score": score,
-        "recommendations": recs,
-    }
+    result = analyze_many([cv_text], job_desc)[0]
+    result.pop("chunk_vectors")
+    result.pop("chunk_model")
+    result.pop("chunk_words")
+    return result
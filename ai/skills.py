@@ -0,0 +1,94 @@
+# ai/skills.py
+from __future__ import annotations
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+# caractères qui prolongent un token : "git" ne matche pas dans "digital", ni "c" dans "c++"
+_BOUNDARY_BEFORE = r"(?<![\w+#])"
+_BOUNDARY_AFTER = r"(?![\w+#])"
+_WS = re.compile(r"\s+")
+
+@dataclass(frozen=True)
+class SkillMatch:
+    skill: str      # forme canonique (ex. "kubernetes")
+    start: int
+    end: int
+    surface: str    # forme trouvée dans le texte (ex. "K8s")
+
+def _norm(term: str) -> str:
+    return _WS.sub(" ", term.strip().lower())
+
+def load_taxonomy(path: str) -> Dict[str, List[str]]:
+    """Fichier JSON {compétence canonique: [synonymes, ...]}."""
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+class SkillExtractor:
+    """Interface des moteurs d'extraction (AI_SKILL_EXTRACTOR)."""
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        self.taxonomy = taxonomy
+        # synonyme normalisé -> forme canonique
+        self.canonical: Dict[str, str] = {}
+        for canon, synonyms in taxonomy.items():
+            for term in (canon, *synonyms):
+                self.canonical.setdefault(_norm(term), canon)
+
+    def extract(self, text: str) -> List[SkillMatch]:
+        raise NotImplementedError
+
+    def skills(self, text: str) -> List[str]:
+        return sorted({m.skill for m in self.extract(text)})
+
+def _trie_regex(terms: Iterable[str]) -> str:
+    """Compile les termes en une seule regex en forme de trie (préfixes factorisés)."""
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        alts = [
+            (r"\s+" if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        # nœud terminal : la suite est optionnelle (gourmande => plus long match d'abord)
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+class TrieRegexExtractor(SkillExtractor):
+    """
+    Toute la taxonomie dans un seul automate regex (trie), avec limites de tokens.
+    Un seul passage sur le texte, quel que soit le nombre de compétences.
+    """
+
+    def __init__(self, taxonomy: Dict[str, List[str]]):
+        super().__init__(taxonomy)
+        pattern = _trie_regex(self.canonical) if self.canonical else r"(?!x)x"
+        self.pattern = re.compile(_BOUNDARY_BEFORE + "(?:" + pattern + ")" + _BOUNDARY_AFTER, re.IGNORECASE)
+
+    def extract(self, text: str) -> List[SkillMatch]:
+        return [
+            SkillMatch(self.canonical[_norm(m.group())], m.start(), m.end(), m.group())
+            for m in self.pattern.finditer(text or "")
+        ]
+
+_extractor: Optional[SkillExtractor] = None
+
+def get_skill_extractor() -> SkillExtractor:
+    global _extractor
+    if _extractor is None:
+        cls = import_string(settings.AI_SKILL_EXTRACTOR)
+        _extractor = cls(load_taxonomy(settings.AI_SKILLS_TAXONOMY))
+    return _extractor
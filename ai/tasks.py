@@ -1,33 +1,318 @@
-from celery import shared_task
+import datetime as dt
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional
+import numpy as np
+from celery import shared_task, chord, group
+from celery.exceptions import SoftTimeLimitExceeded
+from applications.extraction import task_time_limits
 from applications.models import Application
-from applications.utils import extract_text_from_bytes
-from ai.service import analyze_text
+from applications.utils import EXTRACTION_VERSION, TRANSIENT_EXTRACTION_ERRORS, cv_text_is_current, get_cv_text
+from jobs.models import Job
+from django.conf import settings
+from ai.service import (
+    analyze_many, encode, encode_job, get_backend, score_chunks, recommendations, to_score, _simple_extractions,
+    compute_local, pack_vectors,
+)
+from ai.models import AnalysisRun
+from ai.writer import ResultsWriter
+from ai.index import get_index
+from hrms_backend.instrumentation import stage
 
-@shared_task(name="ai.analyze_application")
+logger = logging.getLogger(__name__)
+
+# à incrémenter quand le calcul du score ou l'extraction des compétences change : rend les analyses obsolètes
+ANALYSIS_VERSION = 1
+
+def fingerprint_parts(job_desc: str) -> Dict[str, str]:
+    """
+    Empreinte de tout ce dont dépend une analyse, hors CV : description de l'offre,
+    modèle d'embeddings, version de l'extraction de texte et paramètres de scoring.
+    Le CV est couvert par l'effacement de `analysis_fp` dès que son texte change
+    (store_cv_text, nouveau fichier) ; `analysis_cv_sha256` garde le CV analysé.
+    Retourne les champs enregistrés sur la candidature : l'empreinte complète et ses
+    deux composantes, tout sauf l'offre (`analysis_fp_base`) et l'offre seule.
+    """
+    base = [
+        ANALYSIS_VERSION, EXTRACTION_VERSION, get_backend().model_id,
+        settings.AI_CHUNK_WORDS, settings.AI_CHUNK_AGGREGATION, settings.AI_CHUNK_TOPK,
+    ]
+    job_sha = hashlib.sha256((job_desc or "").encode("utf-8")).hexdigest()
+    return {
+        "analysis_fp": hashlib.sha256(json.dumps(base + [job_sha]).encode("utf-8")).hexdigest(),
+        "analysis_fp_base": hashlib.sha256(json.dumps(base).encode("utf-8")).hexdigest(),
+        "analysis_job_sha256": job_sha,
+    }
+
+def analysis_fingerprint(job_desc: str) -> str:
+    return fingerprint_parts(job_desc)["analysis_fp"]
+
+def stale_applications(job, fingerprint: str, force: bool = False):
+    """Candidatures de l'offre dont l'analyse n'a pas l'empreinte courante (index job + analysis_fp)."""
+    apps = Application.objects(job=job)
+    return apps if force else apps.filter(analysis_fp__ne=fingerprint)
+
+def stored_chunk_matrix(app: Application, model_id: str) -> Optional[np.ndarray]:
+    """Vecteurs de sections enregistrés sur la candidature, s'ils viennent du modèle et du découpage courants."""
+    if (not app.cv_chunk_vectors or app.cv_chunk_model != model_id or not app.cv_chunk_dim
+            or app.cv_chunk_words != settings.AI_CHUNK_WORDS):
+        return None
+    return np.frombuffer(app.cv_chunk_vectors, dtype=np.float32).reshape(-1, app.cv_chunk_dim)
+
+def analyze_and_save(apps: List[Application], job_desc: str, writer: Optional[ResultsWriter] = None) -> Dict[str, str]:
+    """
+    Analyse en batch des candidatures d'une même offre, puis écriture groupée.
+    Les sections de CV déjà encodées sont réutilisées telles quelles.
+    Retourne les échecs d'écriture {application_id: erreur}.
+    """
+    with stage("cv_text"):
+        texts = [get_cv_text(app) for app in apps]   # peut réextraire (et invalider les sections)
+    model_id = get_backend().model_id
+    results = analyze_many(texts, job_desc, stored_chunks=[stored_chunk_matrix(app, model_id) for app in apps])
+    fingerprint = fingerprint_parts(job_desc)
+    for app, result in zip(apps, results):
+        # extraction en échec transitoire : analyse provisoire, à refaire au prochain passage
+        result["fingerprint"] = None if app.cv_extraction_error in TRANSIENT_EXTRACTION_ERRORS else fingerprint
+    if writer is not None:
+        for app, result in zip(apps, results):
+            writer.add(app, result)
+        return writer.errors
+    with ResultsWriter() as own:
+        for app, result in zip(apps, results):
+            own.add(app, result)
+    return own.errors
+
+@shared_task(name="ai.analyze_application", **task_time_limits(1))
 def analyze_application_task(application_id: str):
-    app = Application.objects(id=application_id).first()
-    if not app:
-        return {"error": "application_not_found"}
+    with stage("load"):
+        app = Application.objects(id=application_id).first()
+        if not app:
+            return {"error": "application_not_found"}
+        job_desc = app.job.description if app.job else ""
+    errors = analyze_and_save([app], job_desc or "")
+    if errors:
+        return {"error": errors[str(app.id)]}
+
+    return {"ok": True, "score": app.score}
+
+@shared_task(name="ai.analyze_applications", **task_time_limits(settings.AI_RUN_CHUNK_SIZE))   # ajustées à l'appel
+def analyze_applications_task(application_ids: List[str], force: bool = False):
+    # regroupe par offre pour n'encoder chaque description qu'une fois
+    by_job = {}
+    for app in Application.objects(id__in=application_ids):
+        by_job.setdefault(app.job, []).append(app)
+
+    analyzed = skipped = 0
+    with ResultsWriter() as writer:
+        for job, apps in by_job.items():
+            job_desc = (job.description if job else "") or ""
+            if not force:
+                fingerprint = analysis_fingerprint(job_desc)
+                stale = [a for a in apps if a.analysis_fp != fingerprint]
+                skipped += len(apps) - len(stale)
+                apps = stale
+            if apps:
+                analyze_and_save(apps, job_desc, writer)
+                analyzed += len(apps)
+
+    return {"ok": True, "count_analyzed": analyzed - len(writer.errors), "count_skipped": skipped, "errors": writer.errors}
+
+# --- Analyse asynchrone d'une offre (fan-out en chunks) ---------------------
+
+def start_analysis_run(job, chunk_size: int, top_n: int = 5, force: bool = False) -> AnalysisRun:
+    """
+    Crée le run puis répartit les candidatures à (ré)analyser en chunks :
+    chord(group(chunks), finalize). Sans `force`, celles dont l'analyse est à jour
+    (même empreinte) sont comptées dans `skipped` et ne partent pas sur les workers.
+    """
+    fingerprint = analysis_fingerprint(job.description or "")
+    ids = [str(a.id) for a in stale_applications(job, fingerprint, force).only("id")]
+    skipped = Application.objects(job=job).count() - len(ids) if not force else 0
+    run = AnalysisRun(job=job, total=len(ids), skipped=max(skipped, 0), chunk_size=chunk_size, top_n=top_n).save()
+    if not ids:
+        finalize_analysis_run_task([], str(run.id))
+        return run.reload()
+
+    chunks = [ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    # un chunk en échec non rattrapé (worker perdu, time limit dure) empêche finalize :
+    # l'errback clôt alors le run au lieu de le laisser "running"
+    finalize = finalize_analysis_run_task.s(str(run.id)).on_error(analysis_run_failed_task.s(str(run.id)))
+    chord(
+        group(analyze_run_chunk_task.s(str(run.id), chunk).set(**task_time_limits(len(chunk))) for chunk in chunks),
+        finalize,
+    ).apply_async()
+    return run
+
+@shared_task(name="ai.analyze_run_chunk", **task_time_limits(settings.AI_RUN_CHUNK_SIZE))   # ajustées par chunk
+def analyze_run_chunk_task(run_id: str, application_ids: List[str]):
+    # tout échec est compté dans `failed` et la tâche se termine normalement : le
+    # chord n'échoue pas et finalize clôt le run
+    processed = 0
+    try:
+        run = AnalysisRun.objects(id=run_id).first()
+        if not run:
+            return {"error": "run_not_found"}
+        AnalysisRun.objects(id=run_id, status="pending").update(set__status="running")
 
-    cv_text = ""
-    if app.cv_file:
+        apps = list(Application.objects(id__in=application_ids))
+        job_desc = (run.job.description or "") if run.job else ""
         try:
-            data = app.cv_file.read()
-            filename = getattr(app.cv_file, "filename", "cv.pdf")
-            cv_text = extract_text_from_bytes(data, filename)
+            processed = len(apps) - len(analyze_and_save(apps, job_desc))
+        except SoftTimeLimitExceeded:
+            raise
         except Exception:
-            cv_text = ""
+            # le batch a échoué : on isole les candidatures fautives une par une
+            for app in apps:
+                try:
+                    processed += 0 if analyze_and_save([app], job_desc) else 1
+                except SoftTimeLimitExceeded:
+                    raise
+                except Exception:
+                    pass
+    except SoftTimeLimitExceeded:
+        pass   # limite de la tâche atteinte : le reste du chunk compte en échec, le run se termine
+    except Exception as e:
+        logger.warning("analysis run %s: chunk failed: %s", run_id, e)
 
-    job_desc = app.job.description if app.job else ""
+    failed = len(application_ids) - processed
+    AnalysisRun.objects(id=run_id).update(inc__processed=processed, inc__failed=failed)
+    return {"processed": processed, "failed": failed}
 
-    result = analyze_text(cv_text, job_desc)
+@shared_task(name="ai.analysis_run_failed")
+def analysis_run_failed_task(request, exc, traceback, run_id: str):
+    """Errback du chord : un chunk a échoué sans rendre la main, finalize ne tournera pas."""
+    logger.warning("analysis run %s failed: %r", run_id, exc)
+    AnalysisRun.objects(id=run_id, status__in=("pending", "running")).update(
+        set__status="failed", set__finished_at=dt.datetime.utcnow())
 
-    app.extracted_skills = result["skills"]
-    app.extracted_education = result["education"]
-    app.extracted_experience = result["experience"]
-    app.score = float(result["score"])
-    app.recommendations = result["recommendations"]
-    app.status = "reviewing"
-    app.save()
+@shared_task(name="ai.finalize_analysis_run")
+def finalize_analysis_run_task(chunk_results, run_id: str):
+    run = AnalysisRun.objects(id=run_id).first()
+    if not run:
+        return {"error": "run_not_found"}
 
-    return {"ok": True, "score": app.score}
+    top = Application.objects(job=run.job).order_by("-score")[:run.top_n]
+    run.top = [
+        {
+            "application": str(a.id),
+            "candidate": str(a.candidate.id) if a.candidate else None,
+            "score": a.score,
+            "skills": a.extracted_skills,
+        }
+        for a in top
+    ]
+    run.status = "done" if run.processed or not run.total else "failed"
+    run.finished_at = dt.datetime.utcnow()
+    # ne réécrit pas processed/failed (incrémentés en parallèle par les chunks)
+    run.update(set__top=run.top, set__status=run.status, set__finished_at=run.finished_at)
+    return {"ok": True, "run_id": run_id}
+
+# --- Rescoring après modification d'une offre ------------------------------
+
+@shared_task(name="ai.rescore_job")
+def rescore_job_task(job_id: str, force: bool = False):
+    """
+    Description d'offre modifiée : seul le vecteur de l'offre est recalculé, les
+    candidatures sont renotées en une passe sur leurs vecteurs de sections
+    enregistrés (ni extraction de texte, ni encodage de CV). Ne sont renotées que
+    celles dont la dernière analyse ne diffère que par l'offre (même analysis_fp_base,
+    même CV, texte à jour) ; les autres repartent en analyse complète.
+    """
+    job = Job.objects(id=job_id).first()
+    if not job:
+        return {"error": "job_not_found"}
+
+    model_id = get_backend().model_id
+    fingerprint = fingerprint_parts(job.description or "")
+    apps = list(stale_applications(job, fingerprint["analysis_fp"], force).only(
+        "id", "job", "status", "score", "extracted_skills", "extracted_education", "extracted_experience",
+        "cv_chunk_vectors", "cv_chunk_dim", "cv_chunk_model", "cv_chunk_words", "cv_sha256", "created_at",
+        "analysis_fp", "analysis_fp_base", "analysis_cv_sha256",
+        "cv_file", "cv_text_source", "cv_extraction_version", "cv_extraction_error",
+    ))
+    if not apps:
+        return {"ok": True, "rescored": 0, "reanalyzed": 0, "errors": {}}
+    job_vec = encode_job(job.description or "")
+    required = set(_simple_extractions(job.description or "")["skills"])
+
+    ready, stale = [], []
+    for app in apps:
+        only_job_changed = (
+            app.analysis_fp is not None   # effacée quand le texte du CV change
+            and app.analysis_fp_base == fingerprint["analysis_fp_base"]
+            and app.analysis_cv_sha256 == app.cv_sha256
+            and cv_text_is_current(app)
+        )
+        matrix = stored_chunk_matrix(app, model_id) if only_job_changed else None
+        if matrix is None:
+            stale.append(str(app.id))
+        else:
+            ready.append((app, matrix))
+
+    sims = score_chunks([m for _, m in ready], job_vec).tolist()
+    with ResultsWriter() as writer:
+        for (app, _), sim in zip(ready, sims):
+            writer.add(app, {
+                "skills": app.extracted_skills,
+                "education": app.extracted_education,
+                "experience": app.extracted_experience,
+                "score": to_score(sim),
+                "recommendations": recommendations(required, app.extracted_skills),
+                "status": app.status,   # un rescoring ne change pas l'étape du recrutement
+                "fingerprint": fingerprint,   # mêmes vecteurs de CV, nouvelle offre : analyse à jour
+            })
+
+    if stale:
+        analyze_applications_task.apply_async((stale,), {"force": True}, **task_time_limits(len(stale)))   # sans vecteurs exploitables : analyse complète
+    return {"ok": True, "rescored": len(ready) - len(writer.errors), "reanalyzed": len(stale), "errors": writer.errors}
+
+# --- Encodage pour les process web (AI_EMBEDDING_MODE=celery) ---------------
+
+@shared_task(name="ai.encode")
+def encode_task(texts: List[str], batch_size: Optional[int] = None):
+    """Vecteurs (float32 base64) calculés côté worker : le web n'importe jamais torch."""
+    return pack_vectors(compute_local(texts, batch_size or settings.AI_ENCODE_BATCH_SIZE))
+
+# --- Index vectoriel (recherche sémantique / recommandation) ---------------
+
+def job_text(job) -> str:
+    return f"{job.title or ''}\n{job.description or ''}"
+
+@shared_task(name="ai.index_application")
+def index_application_task(application_id: str):
+    app = Application.objects(id=application_id).first()
+    if not app:
+        get_index("cv").remove([application_id])
+        return {"error": "application_not_found"}
+    text = get_cv_text(app)
+    if not text:
+        return {"error": "no_cv_text"}
+    get_index("cv").upsert([str(app.id)], encode([text]))
+    return {"ok": True}
+
+@shared_task(name="ai.index_job")
+def index_job_task(job_id: str):
+    job = Job.objects(id=job_id).first()
+    if not job:
+        get_index("job").remove([job_id])
+        return {"error": "job_not_found"}
+    get_index("job").upsert([str(job.id)], encode([job_text(job)]))
+    return {"ok": True}
+
+@shared_task(name="ai.rebuild_indexes")
+def rebuild_indexes_task(batch_size: int = 256):
+    """Reconstruit les index "cv" et "job" depuis MongoDB (vecteurs servis par le cache d'embeddings)."""
+    ids, texts = [], []
+    for app in Application.objects(cv_file__ne=None).no_cache():
+        text = get_cv_text(app)
+        if text:
+            ids.append(str(app.id))
+            texts.append(text)
+    cv_vectors = [encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    # toujours une nouvelle génération, vide au besoin : l'ancienne (candidatures supprimées) disparaît
+    get_index("cv").rebuild(ids, np.vstack(cv_vectors) if cv_vectors else None)
+
+    jobs = list(Job.objects)
+    get_index("job").rebuild([str(j.id) for j in jobs], encode([job_text(j) for j in jobs]) if jobs else None)
+    return {"ok": True, "cv": len(ids), "job": len(jobs)}
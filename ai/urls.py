@@ -1,3 +1,7 @@
 from django.urls import path
-# Placeholder urls – à compléter
-urlpatterns = []
+from .views import search_cvs, recommend_jobs
+
+urlpatterns = [
+    path('search/', search_cvs, name='ai-search'),                                        # recherche sémantique dans les CV
+    path('candidates/<str:candidate_id>/jobs/', recommend_jobs, name='ai-recommend-jobs'), # offres recommandées pour un candidat
+]
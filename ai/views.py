@@ -1 +1,77 @@
-# Placeholder views – à compléter
+from bson import ObjectId
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from accounts.permissions import IsRecruiter
+from applications.models import Application
+from jobs.models import Job
+from .index import get_index
+from .service import encode
+
+def _k(request, default=10, maximum=100) -> int:
+    try:
+        return max(1, min(int(request.query_params.get("k", default)), maximum))
+    except ValueError:
+        return default
+
+@api_view(['GET'])
+@permission_classes([IsRecruiter])
+def search_cvs(request):
+    """Recherche sémantique libre sur tous les CV indexés."""
+    q = (request.query_params.get('q') or '').strip()
+    if not q:
+        return Response({'detail': "Paramètre 'q' requis"}, status=400)
+
+    hits = get_index("cv").search(encode([q])[0], _k(request))
+    apps = {
+        str(a.id): a
+        for a in Application.objects(id__in=[h[0] for h in hits]).no_dereference()
+        .only('id', 'candidate', 'job', 'score', 'status', 'extracted_skills')
+    }
+    results = [
+        {
+            'application': app_id,
+            'candidate': str(apps[app_id].candidate.id) if apps[app_id].candidate else None,   # CV importé en masse
+            'job': str(apps[app_id].job.id),
+            'similarity': round(sim, 4),
+            'score': apps[app_id].score,
+            'status': apps[app_id].status,
+            'skills': apps[app_id].extracted_skills,
+        }
+        for app_id, sim in hits if app_id in apps
+    ]
+    return Response({'query': q, 'results': results})
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recommend_jobs(request, candidate_id=None):
+    """Meilleures offres ouvertes pour un candidat, à partir du vecteur de son dernier CV indexé."""
+    user = request.user
+    if getattr(user, 'role', None) not in ('admin', 'recruiter') and str(user.id) != candidate_id:
+        return Response({'detail': 'Forbidden'}, status=403)
+    if not ObjectId.is_valid(candidate_id):
+        return Response({'detail': 'Candidat introuvable'}, status=404)
+
+    cv_index = get_index("cv")
+    applied, vector = [], None
+    for a in Application.objects(candidate=candidate_id).no_dereference().only('id', 'job').order_by('-created_at'):
+        applied.append(str(a.job.id))
+        if vector is None:
+            vector = cv_index.get(str(a.id))
+    if vector is None:
+        return Response({'detail': 'Aucun CV indexé pour ce candidat'}, status=404)
+
+    k = _k(request, default=5)
+    hits = get_index("job").search(vector, k * 3, exclude=applied)   # marge pour filtrer les offres fermées
+    jobs = {str(j.id): j for j in Job.objects(id__in=[h[0] for h in hits], status='open')}
+    results = [
+        {
+            'job': job_id,
+            'title': jobs[job_id].title,
+            'department': jobs[job_id].department,
+            'location': jobs[job_id].location,
+            'similarity': round(sim, 4),
+        }
+        for job_id, sim in hits if job_id in jobs
+    ][:k]
+    return Response({'candidate': candidate_id, 'results': results})
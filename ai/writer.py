@@ -0,0 +1,77 @@
+# ai/writer.py
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from analytics.stats import StatsDelta
+from hrms_backend.http_cache import invalidate, top_scope
+from hrms_backend.instrumentation import stage
+from hrms_backend.serializers import reference_id
+from applications.models import Application
+
+class ResultsWriter:
+    """
+    Accumule les résultats d'analyse et les écrit par lots : bulk_write non ordonné
+    de `$set` limités aux champs d'analyse (+ updated_at), au lieu d'un save() complet
+    par candidature. Les échecs sont remontés par document dans `errors`.
+
+        with ResultsWriter() as writer:
+            for app, result in zip(apps, results):
+                writer.add(app, result)
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or settings.AI_WRITE_BATCH_SIZE
+        self._ops: List[UpdateOne] = []
+        self._pks: List[Any] = []
+        self._jobs = set()   # offres dont le top en cache (http_cache) est à invalider
+        self.written = 0
+        self.errors: Dict[str, str] = {}
+        self._stats = StatsDelta()
+
+    def add(self, app: Application, result: Dict[str, Any]):
+        old_status, old_score = app.status, app.score
+        fields = app.apply_analysis(result)
+        job_id = reference_id(app._data.get("job"))
+        self._stats.change(app.pk, old_status, app.status, old_score, app.score, job=job_id, created_at=app.created_at)
+        self._ops.append(UpdateOne({"_id": app.pk}, {"$set": fields}))
+        self._pks.append(app.pk)
+        self._jobs.add(job_id)
+        if len(self._ops) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._ops:
+            return
+        ops, pks, jobs = self._ops, self._pks, self._jobs - {None}
+        self._ops, self._pks, self._jobs = [], [], set()
+        try:
+            with stage("write"):
+                res = Application._get_collection().bulk_write(ops, ordered=False)
+            self.written += res.matched_count
+            missing = len(ops) - res.matched_count
+        except BulkWriteError as e:
+            details = e.details or {}
+            write_errors = details.get("writeErrors", [])
+            self.written += details.get("nMatched", 0)
+            for err in write_errors:
+                self.errors[str(pks[err["index"]])] = err.get("errmsg", "write_error")
+            missing = len(ops) - details.get("nMatched", 0) - len(write_errors)
+        if missing:
+            # documents supprimés entre la lecture et l'écriture
+            found = {d["_id"] for d in Application._get_collection().find({"_id": {"$in": pks}}, {"_id": 1})}
+            for pk in pks:
+                if pk not in found and str(pk) not in self.errors:
+                    self.errors[str(pk)] = "application_not_found"
+        self._stats.commit(exclude=self.errors)
+        invalidate(*(top_scope(job_id) for job_id in jobs))
+
+    def __enter__(self) -> "ResultsWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
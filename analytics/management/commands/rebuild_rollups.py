@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from analytics.rollups import reconcile_rollups
+
+class Command(BaseCommand):
+    help = "Recalcule les séries quotidiennes daily_stats depuis les candidatures (par défaut : tout l'historique)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=0, help="ne recalculer que les N derniers jours")
+
+    def handle(self, *args, **opts):
+        res = reconcile_rollups(opts["days"])
+        self.stdout.write(self.style.SUCCESS(f"{res['documents']} document(s) recalculé(s), {res['removed']} supprimé(s)"))
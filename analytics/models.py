@@ -1 +1,35 @@
-# Placeholder models – à compléter
+import datetime as dt
+from mongoengine import Document, StringField, IntField, FloatField, DictField, DateTimeField
+
+class ApplicationStats(Document):
+    """
+    Compteurs globaux des candidatures, maintenus par $inc à chaque création,
+    changement de statut ou écriture de score (ANALYTICS_MATERIALIZED_STATS).
+    """
+    meta = {"collection": "application_stats"}
+
+    key = StringField(primary_key=True, default="global")
+    total = IntField(default=0)
+    score_sum = FloatField(default=0.0)
+    score_count = IntField(default=0)
+    by_status = DictField()
+    updated_at = DateTimeField(default=dt.datetime.utcnow)
+    reconciled_at = DateTimeField(null=True)
+
+class DailyStat(Document):
+    """
+    Série quotidienne pré-agrégée (analytics.rollups) pour une offre, un département
+    ou l'ensemble : candidatures créées ce jour-là et, pour ces candidatures, leur
+    statut actuel et l'histogramme de leur score. Maintenue par $inc, recalée par beat.
+    """
+    meta = {"collection": "daily_stats", "indexes": [{"fields": ["scope", "key", "day"]}, "day"]}
+
+    id = StringField(primary_key=True)   # "<scope>|<key>|<AAAA-MM-JJ>"
+    scope = StringField(choices=("job", "department", "global"))
+    key = StringField()
+    day = DateTimeField()
+    created = IntField(default=0)
+    by_status = DictField()
+    score_hist = DictField()   # borne inférieure de la classe -> effectif
+    score_sum = FloatField(default=0.0)
+    updated_at = DateTimeField(default=dt.datetime.utcnow)
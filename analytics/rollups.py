@@ -0,0 +1,237 @@
+# analytics/rollups.py
+# Séries quotidiennes pré-agrégées (collection daily_stats) par offre, par département
+# et globales. Chaque document porte, pour les candidatures créées ce jour-là :
+# leur nombre, leur statut actuel (entonnoir) et l'histogramme de leurs scores.
+# Écritures : $inc à la création, à la suppression et à chaque écriture d'analyse ;
+# recalage périodique par agrégation (tâche beat). Les endpoints ne lisent que ces documents.
+import bisect
+import datetime as dt
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from pymongo import ReplaceOne, UpdateOne
+
+from applications.models import Application
+from jobs.models import Job
+from .models import DailyStat
+
+# classes de score [b_i, b_i+1[ (bornes inférieures incluses, comme $bucket), la dernière fermée à 100
+SCORE_BOUNDARIES = (0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+
+# étapes successives du recrutement ; "rejected" peut survenir à toute étape après la réception
+FUNNEL = ("received", "reviewing", "shortlisted", "hired")
+
+GLOBAL_KEY = "all"
+
+def score_bin(score: Optional[float]) -> str:
+    i = bisect.bisect_right(SCORE_BOUNDARIES, score or 0.0) - 1
+    return str(SCORE_BOUNDARIES[min(max(i, 0), len(SCORE_BOUNDARIES) - 2)])
+
+def _score_bin_expr() -> Dict:
+    """score_bin() côté serveur ($bucket ne sait pas partitionner par offre et par jour)."""
+    score = {"$ifNull": ["$score", 0]}
+    branches = [{"case": {"$lt": [score, upper]}, "then": str(lower)}
+                for lower, upper in zip(SCORE_BOUNDARIES[:-2], SCORE_BOUNDARIES[1:-1])]
+    return {"$switch": {"branches": branches, "default": str(SCORE_BOUNDARIES[-2])}}
+
+def day_of(moment: Optional[dt.datetime]) -> dt.datetime:
+    moment = moment or dt.datetime.utcnow()
+    return dt.datetime(moment.year, moment.month, moment.day)
+
+def rollup_id(scope: str, key: str, day: dt.datetime) -> str:
+    return f"{scope}|{key}|{day:%Y-%m-%d}"
+
+def _targets(job_id: str, departments: Dict[str, str]) -> List[Tuple[str, str]]:
+    targets = [("job", job_id), ("global", GLOBAL_KEY)]
+    if departments.get(job_id):
+        targets.append(("department", departments[job_id]))
+    return targets
+
+def _departments(job_ids: Iterable[str]) -> Dict[str, str]:
+    ids = [j for j in set(job_ids) if j]
+    return {str(j.pk): j.department for j in Job.objects(id__in=ids).only("department")} if ids else {}
+
+class RollupDelta:
+    """Variations d'un lot d'écritures, appliquées en un seul bulk_write de $inc (upsert)."""
+
+    def __init__(self):
+        self._inc: Dict[Tuple[str, dt.datetime], Counter] = defaultdict(Counter)
+
+    def created(self, job_id, created_at, status: str, score: Optional[float], sign: int = 1):
+        """Création (sign=1) ou suppression (sign=-1) d'une candidature."""
+        if not job_id:
+            return
+        inc = self._inc[(str(job_id), day_of(created_at))]
+        inc["created"] += sign
+        inc[f"by_status.{status}"] += sign
+        inc[f"score_hist.{score_bin(score)}"] += sign
+        inc["score_sum"] += sign * (score or 0.0)
+
+    def changed(self, job_id, created_at, by_status: Counter, old_score: Optional[float], new_score: Optional[float]):
+        """Analyse écrite : by_status contient -1 pour l'ancien statut et +1 pour le nouveau."""
+        if not job_id:
+            return
+        inc = self._inc[(str(job_id), day_of(created_at))]
+        for status, n in by_status.items():
+            inc[f"by_status.{status}"] += n
+        old_bin, new_bin = score_bin(old_score), score_bin(new_score)
+        if old_bin != new_bin:
+            inc[f"score_hist.{old_bin}"] -= 1
+            inc[f"score_hist.{new_bin}"] += 1
+        inc["score_sum"] += (new_score or 0.0) - (old_score or 0.0)
+
+    def commit(self):
+        pending, self._inc = self._inc, defaultdict(Counter)
+        if not settings.ANALYTICS_ROLLUPS or not pending:
+            return
+        departments = _departments(job_id for job_id, _ in pending)
+        by_doc: Dict[Tuple[str, str, dt.datetime], Counter] = defaultdict(Counter)
+        for (job_id, day), inc in pending.items():
+            for scope, key in _targets(job_id, departments):
+                by_doc[(scope, key, day)].update(inc)
+
+        now = dt.datetime.utcnow()
+        ops = []
+        for (scope, key, day), inc in by_doc.items():
+            inc = {k: v for k, v in inc.items() if v}
+            if inc:
+                ops.append(UpdateOne(
+                    {"_id": rollup_id(scope, key, day)},
+                    {"$inc": inc, "$set": {"updated_at": now}, "$setOnInsert": {"scope": scope, "key": key, "day": day}},
+                    upsert=True,
+                ))
+        if ops:
+            DailyStat._get_collection().bulk_write(ops, ordered=False)
+
+# --- Recalage -------------------------------------------------------------------
+
+def reconcile_rollups(days: Optional[int] = None) -> Dict:
+    """
+    Recalcule depuis `applications` les jours [aujourd'hui - days, aujourd'hui] et
+    remplace les documents correspondants (days=0 : tout l'historique). Corrige les
+    dérives des $inc (écriture perdue, offre changée de département...).
+    """
+    days = settings.ANALYTICS_ROLLUP_RECONCILE_DAYS if days is None else days
+    since = day_of(None) - dt.timedelta(days=days) if days else None
+    pipeline = [{"$match": {"created_at": {"$gte": since}}}] if since else []
+    pipeline.append({"$group": {
+        "_id": {
+            "job": "$job",
+            "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            "status": "$status",
+            "bin": _score_bin_expr(),
+        },
+        "count": {"$sum": 1},
+        "score_sum": {"$sum": {"$ifNull": ["$score", 0]}},
+    }})
+    rows = list(Application._get_collection().aggregate(pipeline, allowDiskUse=True))
+    departments = _departments(str(row["_id"]["job"]) for row in rows if row["_id"].get("job"))
+
+    docs: Dict[str, Dict] = {}
+    now = dt.datetime.utcnow()
+    for row in rows:
+        group = row["_id"]
+        if not group.get("job") or not group.get("day"):
+            continue
+        day = dt.datetime.strptime(group["day"], "%Y-%m-%d")
+        for scope, key in _targets(str(group["job"]), departments):
+            doc_id = rollup_id(scope, key, day)
+            doc = docs.setdefault(doc_id, {
+                "_id": doc_id, "scope": scope, "key": key, "day": day,
+                "created": 0, "by_status": {}, "score_hist": {}, "score_sum": 0.0, "updated_at": now,
+            })
+            doc["created"] += row["count"]
+            doc["score_sum"] += row["score_sum"]
+            if group.get("status"):
+                doc["by_status"][group["status"]] = doc["by_status"].get(group["status"], 0) + row["count"]
+            doc["score_hist"][group["bin"]] = doc["score_hist"].get(group["bin"], 0) + row["count"]
+
+    coll = DailyStat._get_collection()
+    if docs:
+        coll.bulk_write([ReplaceOne({"_id": doc_id}, doc, upsert=True) for doc_id, doc in docs.items()], ordered=False)
+    # jours de la fenêtre qui n'ont plus aucune candidature
+    stale = {"_id": {"$nin": list(docs)}}
+    if since:
+        stale["day"] = {"$gte": since}
+    removed = coll.delete_many(stale).deleted_count
+    return {"since": since.date().isoformat() if since else None, "documents": len(docs), "removed": removed}
+
+# --- Lecture --------------------------------------------------------------------
+
+def funnel(by_status: Dict[str, int]) -> List[Dict]:
+    """
+    Candidatures ayant atteint chaque étape (statut actuel à cette étape ou au-delà) et
+    taux de passage depuis l'étape précédente. Une candidature rejetée a été examinée.
+    """
+    total = sum(by_status.values())
+    reached = {
+        "received": total,
+        "reviewing": total - by_status.get("received", 0),
+        "shortlisted": by_status.get("shortlisted", 0) + by_status.get("hired", 0),
+        "hired": by_status.get("hired", 0),
+    }
+    steps, previous = [], None
+    for status in FUNNEL:
+        rate = round(reached[status] / reached[previous], 4) if previous and reached[previous] else None
+        steps.append({"status": status, "reached": reached[status], "conversion": rate})
+        previous = status
+    return steps
+
+def percentiles(hist: Dict[str, int], qs=(50, 75, 90, 99)) -> Dict[str, Optional[float]]:
+    """Percentiles approchés depuis l'histogramme (interpolation linéaire dans la classe)."""
+    total = sum(hist.values())
+    bins = [(SCORE_BOUNDARIES[i], SCORE_BOUNDARIES[i + 1], hist.get(str(SCORE_BOUNDARIES[i]), 0))
+            for i in range(len(SCORE_BOUNDARIES) - 1)]
+    out = {}
+    for q in qs:
+        if total <= 0:
+            out[f"p{q}"] = None
+            continue
+        rank, seen = total * q / 100.0, 0
+        value = float(SCORE_BOUNDARIES[-1])
+        for lower, upper, n in bins:
+            if n > 0 and seen + n >= rank:
+                value = lower + (upper - lower) * (rank - seen) / n
+                break
+            seen += max(n, 0)
+        out[f"p{q}"] = round(value, 1)
+    return out
+
+def series(scope: str, key: str, start: dt.date, end: dt.date) -> Dict:
+    """Série quotidienne [start, end] et totaux de la période, lus dans daily_stats uniquement."""
+    first, last = dt.datetime.combine(start, dt.time()), dt.datetime.combine(end, dt.time())
+    docs = DailyStat.objects(scope=scope, key=key, day__gte=first, day__lte=last).order_by("day")   # index (scope, key, day)
+
+    days, by_status, hist = [], Counter(), Counter()
+    created, score_sum = 0, 0.0
+    for doc in docs.as_pymongo():
+        created += doc.get("created", 0)
+        score_sum += doc.get("score_sum", 0.0)
+        by_status.update(doc.get("by_status") or {})
+        hist.update(doc.get("score_hist") or {})
+        days.append({
+            "day": doc["day"].date().isoformat(),
+            "created": doc.get("created", 0),
+            "by_status": {s: n for s, n in (doc.get("by_status") or {}).items() if n},   # $inc laisse des zéros
+            "score_avg": round(doc.get("score_sum", 0.0) / doc["created"], 2) if doc.get("created") else None,
+        })
+    by_status = {s: n for s, n in by_status.items() if n}
+    return {
+        "scope": scope,
+        "key": key,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "days": days,
+        "totals": {
+            "created": created,
+            "by_status": by_status,
+            "funnel": funnel(by_status),
+            "score_avg": round(score_sum / created, 2) if created else None,
+            "score_histogram": [
+                {"min": lower, "max": upper, "count": hist.get(str(lower), 0)}
+                for lower, upper in zip(SCORE_BOUNDARIES[:-1], SCORE_BOUNDARIES[1:])
+            ],
+            "score_percentiles": percentiles(hist),
+        },
+    }
@@ -0,0 +1,147 @@
+# analytics/stats.py
+import datetime as dt
+from collections import Counter
+from typing import Dict, Optional
+
+from django.conf import settings
+
+from applications.models import Application
+from hrms_backend.http_cache import METRICS_SCOPE, invalidate
+from hrms_backend.mongo import heavy_reads
+from hrms_backend.serializers import reference_id
+from .models import ApplicationStats
+from .rollups import RollupDelta
+
+STATUSES = ['received', 'reviewing', 'shortlisted', 'rejected', 'hired']
+_KEY = "global"
+
+def aggregate_metrics(secondary_ok: bool = False) -> Dict:
+    """
+    Un seul aller-retour : $group par statut (effectif, somme et nombre de scores).
+    secondary_ok : lecture selon MONGO_HEAVY_READ_PREFERENCE (jamais pour un recalage persistant).
+    """
+    pipeline = [{"$group": {
+        "_id": "$status",
+        "count": {"$sum": 1},
+        "score_sum": {"$sum": "$score"},
+        "score_count": {"$sum": {"$cond": [{"$isNumber": "$score"}, 1, 0]}},
+    }}]
+    total, score_sum, score_count, by_status = 0, 0.0, 0, {}
+    coll = Application._get_collection()
+    for row in (heavy_reads(coll) if secondary_ok else coll).aggregate(pipeline):
+        total += row["count"]
+        score_sum += row["score_sum"]
+        score_count += row["score_count"]
+        if row["_id"] is not None:
+            by_status[row["_id"]] = row["count"]
+    return {"total": total, "score_sum": score_sum, "score_count": score_count, "by_status": by_status}
+
+def _payload(total: int, score_sum: float, score_count: int, by_status: Dict[str, int]) -> Dict:
+    avg = score_sum / score_count if score_count else 0
+    return {
+        'applications_total': total,
+        'score_avg': round(avg, 2),
+        'by_status': {s: by_status.get(s, 0) for s in STATUSES},
+    }
+
+def reconcile() -> Dict:
+    """Recalcule les compteurs par agrégation et écrase le document matérialisé."""
+    agg = aggregate_metrics()
+    now = dt.datetime.utcnow()
+    ApplicationStats.objects(key=_KEY).update_one(
+        upsert=True,
+        set__total=agg["total"],
+        set__score_sum=agg["score_sum"],
+        set__score_count=agg["score_count"],
+        set__by_status=agg["by_status"],
+        set__updated_at=now,
+        set__reconciled_at=now,
+    )
+    invalidate(METRICS_SCOPE)
+    return agg
+
+def metrics_validators():
+    """Validateurs HTTP : date du document matérialisé ; sinon ETag calculé sur la réponse."""
+    if not settings.ANALYTICS_MATERIALIZED_STATS:
+        return None
+    stats = heavy_reads(ApplicationStats.objects(key=_KEY)).only("updated_at").first()
+    if stats is None or stats.updated_at is None:
+        return None
+    return stats.updated_at.isoformat(), stats.updated_at
+
+def get_metrics(force: bool = False) -> Dict:
+    if not settings.ANALYTICS_MATERIALIZED_STATS:
+        return _payload(**aggregate_metrics(secondary_ok=True))
+    stats = None if force else heavy_reads(ApplicationStats.objects(key=_KEY)).first()
+    if stats is None:
+        return _payload(**reconcile())
+    return _payload(stats.total, stats.score_sum, stats.score_count, stats.by_status or {})
+
+# --- Mises à jour incrémentales ---------------------------------------------
+
+def record(total: int = 0, score_sum: float = 0.0, score_count: int = 0, by_status: Optional[Counter] = None):
+    """Applique des deltas au document matérialisé (un seul $inc)."""
+    inc = {"total": total, "score_sum": score_sum, "score_count": score_count}
+    inc.update({f"by_status.{s}": n for s, n in (by_status or {}).items()})
+    inc = {k: v for k, v in inc.items() if v}
+    if not inc:
+        return
+    invalidate(METRICS_SCOPE)   # réponses /metrics en cache (matérialisées ou non)
+    if not settings.ANALYTICS_MATERIALIZED_STATS:
+        return
+    # pas d'upsert : tant que le document n'existe pas, le premier get_metrics() le crée par agrégation
+    ApplicationStats._get_collection().update_one(
+        {"_id": _KEY}, {"$inc": inc, "$set": {"updated_at": dt.datetime.utcnow()}}
+    )
+
+def record_created(*apps: Application):
+    """Une ou plusieurs créations (import en masse) : un seul $inc et un seul bulk_write de séries."""
+    rollups = RollupDelta()
+    for app in apps:
+        rollups.created(reference_id(app._data.get("job")), app.created_at, app.status, app.score)
+    record(total=len(apps), score_sum=sum(app.score or 0.0 for app in apps), score_count=len(apps),
+           by_status=Counter(app.status for app in apps))
+    rollups.commit()
+
+def record_deleted(app: Application):
+    record(total=-1, score_sum=-(app.score or 0.0), score_count=-1, by_status=Counter({app.status: -1}))
+    rollups = RollupDelta()
+    rollups.created(reference_id(app._data.get("job")), app.created_at, app.status, app.score, sign=-1)
+    rollups.commit()
+
+class StatsDelta:
+    """
+    Cumule les variations (statut, score) d'un lot de candidatures avant un seul record()
+    et un seul bulk_write des séries quotidiennes (job et created_at : document daily_stats visé).
+    """
+
+    def __init__(self):
+        self._by_pk: Dict = {}
+
+    def change(self, pk, old_status: str, new_status: str, old_score: float, new_score: float,
+               job=None, created_at: Optional[dt.datetime] = None):
+        by_status = Counter()
+        if old_status != new_status:
+            by_status[old_status] -= 1
+            by_status[new_status] += 1
+        prev = self._by_pk.get(pk)
+        if prev:
+            # même document vu deux fois : on cumule depuis l'état d'origine
+            by_status.update(prev[0])
+            old_score = prev[1]
+        self._by_pk[pk] = (by_status, old_score, new_score, job, created_at)
+
+    def commit(self, exclude=()):
+        total = Counter()
+        score_sum = 0.0
+        rollups = RollupDelta()
+        for pk, (by_status, old_score, new_score, job, created_at) in self._by_pk.items():
+            if str(pk) in exclude:
+                continue
+            total.update(by_status)
+            score_sum += (new_score or 0.0) - (old_score or 0.0)
+            if job is not None:
+                rollups.changed(job, created_at, by_status, old_score, new_score)
+        self._by_pk.clear()
+        record(score_sum=score_sum, by_status=Counter({k: v for k, v in total.items() if v}))
+        rollups.commit()
@@ -0,0 +1,8 @@
+from typing import Optional
+from celery import shared_task
+from .rollups import reconcile_rollups
+
+@shared_task(name="analytics.reconcile_rollups")
+def reconcile_rollups_task(days: Optional[int] = None):
+    """Planifiée par beat (CELERY_BEAT_SCHEDULE) : recale les derniers jours de daily_stats."""
+    return reconcile_rollups(days)
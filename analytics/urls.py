@@ -1,3 +1,9 @@
 from django.urls import path
-from .views import metrics
-urlpatterns = [ path('metrics/', metrics) ]
+from .views import metrics, global_rollups, job_rollups, department_rollups
+urlpatterns = [
+    path('metrics/', metrics),
+    # séries quotidiennes pré-agrégées (analytics.rollups)
+    path('rollups/', global_rollups),
+    path('rollups/jobs/<str:job_id>/', job_rollups),
+    path('rollups/departments/<str:department>/', department_rollups),
+]
@@ -1,13 +1,43 @@
+import datetime as dt
+from django.conf import settings
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from applications.models import Application
+from hrms_backend.http_cache import METRICS_SCOPE, cached_response
+from .rollups import GLOBAL_KEY, series
+from .stats import get_metrics, metrics_validators
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def metrics(request):
-    total = Application.objects.count()
-    avg = Application.objects.average('score') or 0
-    statuses = ['received','reviewing','shortlisted','rejected','hired']
-    by = {s: Application.objects(status=s).count() for s in statuses}
-    return Response({'applications_total': total, 'score_avg': round(avg,2), 'by_status': by})
+    # ?recompute=1 : recalcule par agrégation et recale les compteurs matérialisés
+    force = request.query_params.get('recompute', '').lower() in ('1', 'true', 'yes')
+    if force:
+        return Response(get_metrics(force=True))
+    return cached_response(request, METRICS_SCOPE, metrics_validators, get_metrics)
+
+def _rollup_response(request, scope, key):
+    # ?from=AAAA-MM-JJ&to=AAAA-MM-JJ (par défaut : les 30 derniers jours)
+    try:
+        end = dt.date.fromisoformat(request.query_params['to']) if request.query_params.get('to') else dt.datetime.utcnow().date()
+        start = dt.date.fromisoformat(request.query_params['from']) if request.query_params.get('from') else end - dt.timedelta(days=29)
+    except ValueError:
+        return Response({'detail': 'from/to : dates AAAA-MM-JJ attendues'}, status=400)
+    if start > end or (end - start).days >= settings.ANALYTICS_ROLLUP_MAX_DAYS:
+        return Response({'detail': f'période invalide (au plus {settings.ANALYTICS_ROLLUP_MAX_DAYS} jours)'}, status=400)
+    return Response(series(scope, key, start, end))
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def global_rollups(request):
+    return _rollup_response(request, 'global', GLOBAL_KEY)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def job_rollups(request, job_id):
+    return _rollup_response(request, 'job', job_id)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def department_rollups(request, department):
+    return _rollup_response(request, 'department', department)
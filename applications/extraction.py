@@ -0,0 +1,203 @@
+# applications/extraction.py
+# Extraction de texte isolée dans un pool de processus : un PDF malformé ou énorme
+# ne bloque ni le worker Celery ni la requête (timeout par document compté dans le
+# process qui extrait, limites de pages/octets, pages extraites en parallèle pour les
+# gros PDF). Les tâches qui extraient portent en plus des time limits (task_time_limits).
+import logging
+import math
+import multiprocessing
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional
+
+import billiard
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+
+from .utils import ExtractionTimeout, extract_document, extract_pdf_pages
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ExtractionResult:
+    text: str = ""
+    pages: int = 0            # pages du document
+    pages_parsed: int = 0     # pages effectivement extraites
+    truncated: bool = False
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+def _pdf_page_count(data: bytes) -> int:
+    return extract_pdf_pages(data, 0, 0)[1]
+
+def _pdf_range(data: bytes, start: int, stop: int) -> str:
+    return "\n".join(extract_pdf_pages(data, start, stop)[0])
+
+def _on_alarm(signum, frame):
+    raise ExtractionTimeout()
+
+def _limited(timeout: float, fn, *args):
+    """
+    Exécute fn sous alarme (SIGALRM) : le délai part quand le travail démarre
+    réellement (pas à la soumission au pool), et un dépassement lève ExtractionTimeout
+    dans le process qui extrait, sans avoir à le tuer. Thread principal uniquement.
+    """
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return fn(*args)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+# marge laissée à un worker du pool pour honorer son alarme avant qu'on le considère bloqué
+_KILL_GRACE_S = 5.0
+
+class ExtractionService:
+    def __init__(self, workers: int, timeout: float, max_pages: int, max_bytes: int, parallel_pages: int):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.parallel_pages = parallel_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # --- pool ------------------------------------------------------------
+    def _use_pool(self) -> bool:
+        return self.workers > 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # un process daemon (enfant prefork Celery) n'a pas le droit de créer des
+                # processus multiprocessing : ceux de billiard (fork de Celery) le peuvent
+                context = billiard.get_context("fork") if multiprocessing.current_process().daemon else None
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def _kill_pool(self, pool: ProcessPoolExecutor):
+        """
+        Dernier recours, pour un worker sourd à son alarme (bloqué hors de l'interpréteur) :
+        on tue ce pool, recréé à la demande. Les extractions qu'il portait échouent en
+        BrokenProcessPool, erreur transitoire retentée plus tard.
+        """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        for proc in list((getattr(pool, "_processes", None) or {}).values()):   # pas d'API publique pour tuer
+            proc.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    # --- extraction --------------------------------------------------------
+    def extract(self, data: bytes, filename: str = "") -> ExtractionResult:
+        t0 = time.perf_counter()
+        if len(data) > self.max_bytes:
+            return ExtractionResult(error="too_large", duration=time.perf_counter() - t0)
+
+        try:
+            if self._use_pool():
+                result = self._extract_pooled(data, filename)
+            else:
+                result = self._extract_inline(data, filename)
+        except SoftTimeLimitExceeded:
+            raise   # limite de la tâche Celery : c'est à elle de conclure
+        except ExtractionTimeout:
+            logger.warning("extraction timeout (%ss) for %s", self.timeout, filename)
+            result = ExtractionResult(error="timeout")
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is not None and self._pool._broken:
+                    self._pool = None   # sera recréé à la demande
+            logger.warning("extraction pool broken while extracting %s", filename)
+            result = ExtractionResult(error="BrokenProcessPool")
+        except Exception as e:
+            logger.warning("extraction failed for %s: %s", filename, e)
+            result = ExtractionResult(error=e.__class__.__name__)
+
+        result.duration = round(time.perf_counter() - t0, 4)
+        return result
+
+    def _result(self, text: str, pages: int) -> ExtractionResult:
+        parsed = min(pages, self.max_pages)
+        return ExtractionResult(text=text, pages=pages, pages_parsed=parsed, truncated=pages > self.max_pages)
+
+    def _extract_inline(self, data: bytes, filename: str) -> ExtractionResult:
+        if threading.current_thread() is threading.main_thread():
+            text, pages = _limited(self.timeout, extract_document, data, filename, self.max_pages)
+        else:   # alarme impossible hors du thread principal : bornes de pages/octets seulement
+            text, pages = extract_document(data, filename, max_pages=self.max_pages)
+        return self._result(text, pages)
+
+    def _run(self, pool: ProcessPoolExecutor, calls: List[tuple]) -> list:
+        """
+        Soumet les appels au pool (chacun sous alarme dans son worker) et attend leurs
+        résultats. Un appel n'est compté qu'à partir de son démarrage (file d'attente du
+        pool exclue) ; au-delà du délai + marge, son worker est réputé bloqué.
+        """
+        futures = [pool.submit(_limited, self.timeout, *call) for call in calls]
+        started: Dict[object, float] = {}
+        while True:
+            pending = [f for f in futures if not f.done()]
+            if not pending:
+                return [f.result() for f in futures]   # ExtractionTimeout relevée dans le worker
+            now = time.perf_counter()
+            for f in pending:
+                if f.running():
+                    started.setdefault(f, now)
+            if any(now - started[f] > self.timeout + _KILL_GRACE_S for f in pending if f in started):
+                for f in futures:
+                    f.cancel()
+                self._kill_pool(pool)
+                raise ExtractionTimeout()
+            wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+
+    def _extract_pooled(self, data: bytes, filename: str) -> ExtractionResult:
+        pool = self._get_pool()
+        is_pdf = (filename or "").lower().endswith(".pdf")
+        if not is_pdf or self.workers < 2:
+            [(text, pages)] = self._run(pool, [(extract_document, data, filename, self.max_pages)])
+            return self._result(text, pages)
+
+        [pages] = self._run(pool, [(_pdf_page_count, data)])
+        to_parse = min(pages, self.max_pages)
+        if to_parse < self.parallel_pages:
+            [text] = self._run(pool, [(_pdf_range, data, 0, to_parse)])
+            return self._result(text, pages)
+
+        # gros PDF : une plage de pages par worker, chacun relit le document
+        step = math.ceil(to_parse / self.workers)
+        parts = self._run(pool, [(_pdf_range, data, i, min(i + step, to_parse)) for i in range(0, to_parse, step)])
+        return self._result("\n".join(parts), pages)
+
+_service: Optional[ExtractionService] = None
+
+def task_time_limits(documents: int = 1) -> dict:
+    """Time limits Celery (filet de sécurité) d'une tâche pouvant extraire `documents` CV."""
+    soft = settings.EXTRACTION_TIMEOUT_S * max(documents, 1) + 60
+    return {"soft_time_limit": soft, "time_limit": soft + 30}
+
+def get_extraction_service() -> ExtractionService:
+    global _service
+    if _service is None:
+        _service = ExtractionService(
+            workers=settings.EXTRACTION_POOL_WORKERS,
+            timeout=settings.EXTRACTION_TIMEOUT_S,
+            max_pages=settings.EXTRACTION_MAX_PAGES,
+            max_bytes=settings.EXTRACTION_MAX_BYTES,
+            parallel_pages=settings.EXTRACTION_PARALLEL_PAGES,
+        )
+    return _service
@@ -0,0 +1,181 @@
+# applications/imports.py
+# Import en masse de CV pour une offre (salons, cabinets) : archives ZIP lues entrée par
+# entrée et copiées en streaming dans GridFS (jamais décompressées en entier en mémoire),
+# candidatures créées par insert_many, extraction + analyse confiées à des tâches par lots.
+import datetime as dt
+import os
+import zipfile
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from django.conf import settings
+
+from analytics.stats import record_created
+from hrms_backend.http_cache import invalidate, top_scope
+from .models import Application, ImportRun
+from .storage import UploadTooLarge, store_stream
+from .utils import reusable_extraction
+
+ALLOWED_EXTENSIONS = (".pdf", ".docx", ".txt")
+_CHUNK = 256 * 1024
+
+class ImportRejected(Exception):
+    """Requête refusée avant tout stockage (archive illisible, trop de fichiers...)."""
+
+# (nom, taille annoncée, ouverture → itérateur d'octets)
+Entry = Tuple[str, int, Callable[[], Iterable[bytes]]]
+
+def _read_chunks(stream) -> Iterator[bytes]:
+    with stream:
+        while True:
+            chunk = stream.read(_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+def collect_entries(files) -> List[Entry]:
+    """CV à importer : entrées des ZIP (métadonnées seulement, rien n'est décompressé) et fichiers isolés."""
+    entries: List[Entry] = []
+    for f in files:
+        name = getattr(f, "name", "") or ""
+        if f.size and f.size > settings.APPLICATIONS_IMPORT_MAX_BYTES:
+            raise ImportRejected(f"{name} : fichier trop volumineux (max {settings.APPLICATIONS_IMPORT_MAX_BYTES // (1024 * 1024)} Mo)")
+        if not name.lower().endswith(".zip"):
+            entries.append((os.path.basename(name), f.size or 0, f.chunks))
+            continue
+        try:
+            archive = zipfile.ZipFile(f)   # lit le répertoire central ; le fichier uploadé reste sur disque
+        except zipfile.BadZipFile:
+            raise ImportRejected(f"{name} : archive ZIP illisible")
+        for info in archive.infolist():
+            base = os.path.basename(info.filename)
+            if info.is_dir() or not base or base.startswith(".") or info.filename.startswith("__MACOSX/"):
+                continue
+            entries.append((base, info.file_size, lambda archive=archive, info=info: _read_chunks(archive.open(info))))
+    if not entries:
+        raise ImportRejected("aucun fichier à importer")
+    if len(entries) > settings.APPLICATIONS_IMPORT_MAX_FILES:
+        raise ImportRejected(f"maximum {settings.APPLICATIONS_IMPORT_MAX_FILES} CV par import")
+    return entries
+
+def _store_entry(entry: Entry, status: dict):
+    """Copie un CV dans GridFS ; None (et `status` renseigné) si le fichier est refusé."""
+    name, size, open_chunks = entry
+    if not name.lower().endswith(ALLOWED_EXTENSIONS):
+        status.update(status="rejected", error="unsupported_type")
+        return None
+    if size > settings.APPLICATIONS_MAX_CV_BYTES:
+        status.update(status="rejected", error="too_large")
+        return None
+    try:
+        # la taille réelle est revérifiée au fil de l'eau (entête ZIP mensonger, bombe de décompression)
+        return store_stream(open_chunks(), filename=name)
+    except UploadTooLarge:
+        status.update(status="rejected", error="too_large")
+    except Exception as e:   # entrée chiffrée ou corrompue
+        status.update(status="rejected", error=f"unreadable: {e.__class__.__name__}")
+    return None
+
+def _insert_batch(run: ImportRun, batch: List[Tuple[int, object]], seen: set) -> List[Tuple[int, str]]:
+    """Crée les candidatures d'un lot en un insert_many ; écarte les CV déjà déposés pour cette offre."""
+    shas = [stored.sha256 for _, stored in batch]
+    seen.update(a.cv_sha256 for a in Application.objects(job=run.job, cv_sha256__in=shas).only("cv_sha256"))
+
+    apps, indexes = [], []
+    for i, stored in batch:
+        status = run.files[i]
+        if stored.sha256 in seen:
+            status.update(status="rejected", error="duplicate")
+            continue
+        seen.add(stored.sha256)
+        apps.append(Application(job=run.job, cv_file=stored.proxy(), import_run=run.pk,
+                                **reusable_extraction(stored.sha256, stored.grid_id)))
+        indexes.append(i)
+    if not apps:
+        return []
+
+    ids = Application._get_collection().insert_many([a.to_mongo().to_dict() for a in apps], ordered=False).inserted_ids
+    for app, pk in zip(apps, ids):
+        app.pk = pk
+    record_created(*apps)
+    items = []
+    for i, pk in zip(indexes, ids):
+        run.files[i].update(status="stored", application=str(pk))
+        items.append((i, str(pk)))
+    _save_progress(run, indexes)
+    return items
+
+def _save_progress(run: ImportRun, indexes: Iterable[int]):
+    """
+    Écrit l'état des fichiers donnés et le battement du run : si le process web est
+    tué en cours d'ingestion (timeout gunicorn), le run reste lisible et
+    applications.sweep_import_runs le clôt.
+    """
+    update = {f"files.{i}": run.files[i] for i in indexes}
+    ImportRun._get_collection().update_one(
+        {"_id": run.pk}, {"$set": {**update, "bytes": run.bytes, "heartbeat_at": dt.datetime.utcnow()}})
+
+def ingest(job, files, user=None, analyze: bool = True) -> Tuple[ImportRun, List[List[Tuple[int, str]]]]:
+    """
+    Stocke les CV reçus et crée leurs candidatures. Retourne le run et les lots
+    [(index du fichier, application_id)] à confier à applications.process_import_batch.
+    """
+    entries = collect_entries(files)
+    run = ImportRun(job=job, created_by=user, analyze=analyze, total=len(entries), heartbeat_at=dt.datetime.utcnow(),
+                    files=[{"name": name, "size": size, "status": "pending"} for name, size, _ in entries]).save()
+
+    batch_size = max(settings.APPLICATIONS_IMPORT_BATCH_SIZE, 1)
+    batches, pending, seen = [], [], set()
+    for i, entry in enumerate(entries):
+        stored = _store_entry(entry, run.files[i])
+        if stored is not None:
+            run.files[i]["size"] = stored.size
+            run.bytes += stored.size
+        _save_progress(run, [i])
+        if stored is None:
+            continue
+        pending.append((i, stored))
+        if len(pending) >= batch_size:
+            batches.append(_insert_batch(run, pending, seen))
+            pending = []
+    if pending:
+        batches.append(_insert_batch(run, pending, seen))
+    batches = [b for b in batches if b]
+
+    run.queued = sum(len(b) for b in batches)
+    run.rejected = run.total - run.queued
+    run.stored_at = dt.datetime.utcnow()
+    run.status = "processing" if run.queued else "done"
+    if not run.queued:
+        run.finished_at = run.stored_at
+    # les tâches de traitement ne partent qu'après ; un run déjà clos par le balayage n'est pas rouvert
+    closed = not ImportRun.objects(id=run.pk, status="storing").update(
+        set__status=run.status, set__files=run.files, set__queued=run.queued, set__rejected=run.rejected,
+        set__bytes=run.bytes, set__stored_at=run.stored_at, set__finished_at=run.finished_at)
+    if run.queued:
+        invalidate(top_scope(job.pk))
+    return run, [] if closed else batches
+
+def sweep_import_runs(stale_s: float) -> int:
+    """
+    Clôt en échec les imports restés en "storing" sans battement depuis `stale_s` :
+    requête interrompue (worker web tué, redémarrage). Les fichiers non encore
+    confiés aux workers passent en "failed" (interrupted) ; les candidatures déjà
+    créées restent et seront traitées par la prochaine analyse de l'offre.
+    """
+    now = dt.datetime.utcnow()
+    limit = now - dt.timedelta(seconds=stale_s)
+    swept = 0
+    for run in ImportRun.objects(status="storing", heartbeat_at__lt=limit).only("id", "files", "heartbeat_at"):
+        update, rejected = {}, 0
+        for i, status in enumerate(run.files):
+            if status.get("status") == "rejected":
+                rejected += 1
+            else:
+                update[f"files.{i}.status"] = "failed"
+                update[f"files.{i}.error"] = "interrupted"
+        update.update(status="failed", failed=len(run.files) - rejected, rejected=rejected, stored_at=now, finished_at=now)
+        # battement inchangé : une ingestion qui reprend entre-temps n'est pas clôturée
+        result = ImportRun._get_collection().update_one(
+            {"_id": run.pk, "status": "storing", "heartbeat_at": run.heartbeat_at}, {"$set": update})
+        swept += result.modified_count
+    return swept
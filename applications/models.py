@@ -1,17 +1,55 @@
-from mongoengine import Document, ReferenceField, StringField, DateTimeField, FloatField, ListField, FileField
+from mongoengine import (
+    Document, ReferenceField, StringField, DateTimeField, FloatField, ListField, FileField,
+    IntField, ObjectIdField, BooleanField, BinaryField, DictField,
+)
 import datetime as dt
 from accounts.models import User
 from jobs.models import Job  # ajuste si ton modèle est ailleurs
 
 class Application(Document):
-    meta = {"collection": "applications"}
+    meta = {
+        "collection": "applications",
+        "indexes": [
+            {"fields": ["job", "-score"]},          # top N d'une offre
+            {"fields": ["job", "-updated_at"]},     # validateurs HTTP du top (dernière modification)
+            {"fields": ["job", "analysis_fp"]},     # candidatures à réanalyser (empreinte périmée)
+            {"fields": ["status", "created_at"]},   # compteurs par statut (analytics)
+            {"fields": ["candidate", "created_at"]},
+            "cv_sha256",                            # réutilisation des extractions (CV dédoublonnés)
+        ],
+    }
 
-    candidate = ReferenceField(User, required=True)
+    candidate = ReferenceField(User, null=True)   # absent pour les CV importés en masse (ImportRun)
     job = ReferenceField(Job, required=True)
+    import_run = ObjectIdField(null=True)
 
     # Nouveau champ pour stocker le fichier CV
     cv_file = FileField()   # <--- IMPORTANT
 
+    # Texte extrait une seule fois après l'upload (applications.extract_cv_text)
+    cv_text = StringField(null=True)
+    cv_pages = IntField(null=True)
+    cv_truncated = BooleanField(default=False)      # limite de pages atteinte
+    cv_extraction_error = StringField(null=True)    # timeout, fichier trop gros, illisible...
+    cv_sha256 = StringField(null=True)
+    cv_extracted_at = DateTimeField(null=True)
+    cv_extraction_version = IntField(null=True)
+    cv_text_source = ObjectIdField(null=True)   # grid_id du fichier d'où vient cv_text
+
+    # Vecteurs des sections du CV (float32, n x dim) : rescoring sans réencoder le CV
+    cv_chunk_vectors = BinaryField(null=True)
+    cv_chunk_dim = IntField(null=True)
+    cv_chunk_model = StringField(null=True)
+    cv_chunk_words = IntField(null=True)   # AI_CHUNK_WORDS du découpage : autre valeur = vecteurs à refaire
+
+    # Empreinte de la dernière analyse (ai.tasks.fingerprint_parts : offre, modèle, versions),
+    # effacée quand le CV change ; une réanalyse à empreinte égale est sautée
+    analysis_fp = StringField(null=True)
+    analysis_cv_sha256 = StringField(null=True)
+    # ses composantes : tout sauf l'offre, et l'offre seule (un rescoring ne vaut que si seule l'offre a changé)
+    analysis_fp_base = StringField(null=True)
+    analysis_job_sha256 = StringField(null=True)
+
     extracted_skills = ListField(StringField())
     extracted_education = ListField(StringField())
     extracted_experience = ListField(StringField())
@@ -21,6 +59,87 @@ class Application(Document):
     created_at = DateTimeField(default=dt.datetime.utcnow)
     updated_at = DateTimeField(default=dt.datetime.utcnow)
 
+    # champs volumineux jamais renvoyés par l'API : exclus des listes
+    HEAVY_FIELDS = ("cv_text", "cv_chunk_vectors")
+
+    def apply_analysis(self, result: dict) -> dict:
+        """Applique un résultat d'analyse et retourne les champs modifiés (pour un $set)."""
+        fields = {
+            "extracted_skills": result["skills"],
+            "extracted_education": result["education"],
+            "extracted_experience": result["experience"],
+            "score": float(result["score"]),
+            "recommendations": result["recommendations"],
+            "status": result.get("status", "reviewing"),
+            "updated_at": dt.datetime.utcnow(),
+        }
+        if result.get("fingerprint"):
+            fields.update(result["fingerprint"])   # analysis_fp et ses composantes (ai.tasks.fingerprint_parts)
+            fields["analysis_cv_sha256"] = self.cv_sha256
+        chunks = result.get("chunk_vectors")
+        if chunks is not None:
+            fields["cv_chunk_vectors"] = chunks.astype("float32").tobytes()
+            fields["cv_chunk_dim"] = int(chunks.shape[1])
+            fields["cv_chunk_model"] = result["chunk_model"]
+            fields["cv_chunk_words"] = result["chunk_words"]
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return fields
+
+    def delete(self, *args, **kwargs):
+        # CV dédoublonné : le fichier GridFS peut être partagé avec d'autres candidatures
+        grid_id = self.cv_file.grid_id if self.cv_file else None
+        if grid_id and Application._get_collection().find_one({"cv_file": grid_id, "_id": {"$ne": self.pk}}, {"_id": 1}):
+            self._data["cv_file"] = None
+        return super().delete(*args, **kwargs)
+
+    @classmethod
+    def release_cv_file(cls, grid_id):
+        """Supprime un CV remplacé, sauf s'il reste référencé (dédoublonnage)."""
+        from .storage import delete_file
+        if grid_id and not cls._get_collection().find_one({"cv_file": grid_id}, {"_id": 1}):
+            delete_file(grid_id)
+
     def save(self, *args, **kwargs):
         self.updated_at = dt.datetime.utcnow()
         return super().save(*args, **kwargs)
+
+
+IMPORT_STATUSES = ("storing", "processing", "done", "failed")
+
+class ImportRun(Document):
+    """
+    Import en masse de CV pour une offre (ZIP ou fichiers multiples) : fichiers copiés
+    dans GridFS et candidatures créées pendant la requête, extraction et analyse par
+    lots sur les workers. `files[i]` suit chaque fichier reçu, écrit au fil de l'ingestion.
+    """
+    meta = {"collection": "import_runs", "indexes": [{"fields": ["job", "-created_at"]}, {"fields": ["status", "heartbeat_at"]}]}
+
+    job = ReferenceField(Job, required=True)
+    created_by = ReferenceField(User, null=True)
+    status = StringField(choices=IMPORT_STATUSES, default="storing")
+    analyze = BooleanField(default=True)   # False : extraction et indexation seulement
+    total = IntField(default=0)       # fichiers reçus
+    queued = IntField(default=0)      # candidatures créées, à traiter
+    rejected = IntField(default=0)    # non importés : type, taille, doublon, illisible
+    processed = IntField(default=0)
+    failed = IntField(default=0)
+    bytes = IntField(default=0)       # octets des CV stockés
+    files = ListField(DictField())    # {"name", "size", "status", "error", "application"}
+    created_at = DateTimeField(default=dt.datetime.utcnow)
+    stored_at = DateTimeField(null=True)
+    heartbeat_at = DateTimeField(null=True)   # dernier fichier ingéré (balayage des runs interrompus)
+    finished_at = DateTimeField(null=True)
+
+    def ingest_seconds(self) -> float:
+        end = self.stored_at or dt.datetime.utcnow()
+        return max((end - self.created_at).total_seconds(), 0.0)
+
+    def elapsed(self) -> float:
+        end = self.finished_at or dt.datetime.utcnow()
+        return max((end - self.created_at).total_seconds(), 0.0)
+
+    def throughput(self) -> float:
+        # candidatures traitées (extraction + analyse) par seconde depuis le lancement
+        elapsed = self.elapsed()
+        return round((self.processed + self.failed) / elapsed, 2) if elapsed else 0.0
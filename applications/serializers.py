@@ -1,4 +1,8 @@
+from rest_framework import serializers as drf_serializers
 from rest_framework_mongoengine import serializers
+from accounts.models import User
+from jobs.models import Job
+from hrms_backend.serializers import LeanReadSerializer, ReferenceSummaryField, ObjectIdStrField
 from .models import Application
 
 class ApplicationWriteSerializer(serializers.DocumentSerializer):
@@ -9,8 +13,31 @@ class ApplicationWriteSerializer(serializers.DocumentSerializer):
             "job",
             "cv_file",    # ⬅️ IMPORTANT: correspond au champ du modèle
         )
+        # facultatif sur le modèle (imports en masse), obligatoire pour un dépôt individuel
+        extra_kwargs = {"candidate": {"required": True, "allow_null": False}}
 
-class ApplicationReadSerializer(serializers.DocumentSerializer):
-    class Meta:
-        model = Application
-        fields = "__all__"
+class ApplicationReadSerializer(LeanReadSerializer):
+    # champs explicites : texte intégral / vecteurs du CV (HEAVY_FIELDS) jamais renvoyés
+    id = drf_serializers.CharField(read_only=True)
+    candidate = ReferenceSummaryField(User, ("full_name", "email"))
+    job = ReferenceSummaryField(Job, ("title", "department", "status"))
+    import_run = ObjectIdStrField()
+    cv_file = ObjectIdStrField()
+    cv_pages = drf_serializers.IntegerField(read_only=True)
+    cv_truncated = drf_serializers.BooleanField(read_only=True)
+    cv_extraction_error = drf_serializers.CharField(read_only=True)
+    cv_sha256 = drf_serializers.CharField(read_only=True)
+    cv_extracted_at = drf_serializers.DateTimeField(read_only=True)
+    cv_extraction_version = drf_serializers.IntegerField(read_only=True)
+    cv_text_source = ObjectIdStrField()
+    cv_chunk_dim = drf_serializers.IntegerField(read_only=True)
+    cv_chunk_model = drf_serializers.CharField(read_only=True)
+    cv_chunk_words = drf_serializers.IntegerField(read_only=True)
+    extracted_skills = drf_serializers.ListField(child=drf_serializers.CharField(), read_only=True)
+    extracted_education = drf_serializers.ListField(child=drf_serializers.CharField(), read_only=True)
+    extracted_experience = drf_serializers.ListField(child=drf_serializers.CharField(), read_only=True)
+    score = drf_serializers.FloatField(read_only=True)
+    recommendations = drf_serializers.ListField(child=drf_serializers.CharField(), read_only=True)
+    status = drf_serializers.CharField(read_only=True)
+    created_at = drf_serializers.DateTimeField(read_only=True)
+    updated_at = drf_serializers.DateTimeField(read_only=True)
@@ -0,0 +1,88 @@
+# applications/storage.py
+# Upload des CV en streaming dans GridFS : copie chunk par chunk, SHA-256 calculé au fil
+# de l'eau, taille plafonnée, et dédoublonnage par contenu (un seul fichier par hash).
+import hashlib
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import gridfs
+from django.conf import settings
+from mongoengine.connection import get_db
+from mongoengine.fields import GridFSProxy
+
+_COLLECTION = "fs"   # collection par défaut des FileField mongoengine
+_indexed = False
+
+class UploadTooLarge(Exception):
+    pass
+
+@dataclass
+class StoredFile:
+    grid_id: object
+    sha256: str
+    size: int
+    filename: str
+    deduplicated: bool
+
+    def proxy(self) -> GridFSProxy:
+        """Valeur à affecter à un FileField pour référencer ce fichier."""
+        return GridFSProxy(grid_id=self.grid_id, key="cv_file", collection_name=_COLLECTION)
+
+def _fs() -> gridfs.GridFS:
+    global _indexed
+    db = get_db()
+    if not _indexed:
+        db[f"{_COLLECTION}.files"].create_index("sha256")
+        _indexed = True
+    return gridfs.GridFS(db, collection=_COLLECTION)
+
+def store_stream(chunks: Iterable[bytes], filename: str, content_type: Optional[str] = None,
+                 max_bytes: Optional[int] = None) -> StoredFile:
+    """
+    Écrit `chunks` dans GridFS sans jamais tout garder en mémoire. Si le contenu
+    existe déjà (même SHA-256), le nouveau fichier est supprimé et l'existant
+    référencé : le plus ancien _id gagne, ce qui reste cohérent en cas d'uploads
+    concurrents du même CV.
+    """
+    max_bytes = max_bytes or settings.APPLICATIONS_MAX_CV_BYTES
+    fs = _fs()
+    h = hashlib.sha256()
+    size = 0
+
+    grid_in = fs.new_file(filename=filename, content_type=content_type)
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"Fichier trop volumineux (max {max_bytes // (1024 * 1024)} Mo)")
+            h.update(chunk)
+            grid_in.write(chunk)
+        grid_in.sha256 = h.hexdigest()   # attribut supplémentaire du document fs.files
+        grid_in.close()
+    except BaseException:
+        grid_in.abort()
+        raise
+
+    sha = h.hexdigest()
+    files = get_db()[f"{_COLLECTION}.files"]
+    oldest = files.find_one({"sha256": sha}, {"_id": 1}, sort=[("_id", 1)])
+    if oldest and oldest["_id"] != grid_in._id:
+        fs.delete(grid_in._id)
+        return StoredFile(oldest["_id"], sha, size, filename, deduplicated=True)
+    return StoredFile(grid_in._id, sha, size, filename, deduplicated=False)
+
+def store_upload(file_obj, max_bytes: Optional[int] = None) -> StoredFile:
+    """Variante pour un UploadedFile Django (lu via .chunks())."""
+    max_bytes = max_bytes or settings.APPLICATIONS_MAX_CV_BYTES
+    if file_obj.size and file_obj.size > max_bytes:
+        raise UploadTooLarge(f"Fichier trop volumineux (max {max_bytes // (1024 * 1024)} Mo)")
+    return store_stream(
+        file_obj.chunks(),
+        filename=getattr(file_obj, "name", "cv"),
+        content_type=getattr(file_obj, "content_type", None),
+        max_bytes=max_bytes,
+    )
+
+def delete_file(grid_id):
+    """Supprime un fichier GridFS (l'appelant vérifie qu'aucune candidature ne le référence)."""
+    _fs().delete(grid_id)
@@ -0,0 +1,101 @@
+import datetime as dt
+from typing import Dict, List
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from pymongo import ReturnDocument
+from ai.index import get_index
+from ai.service import encode
+from ai.tasks import analyze_and_save
+from .extraction import task_time_limits
+from .imports import sweep_import_runs
+from .models import Application, ImportRun
+from .utils import get_cv_text, has_fresh_cv_text, store_cv_text
+
+# time limits : filet de sécurité quand l'extraction se fait en ligne (enfant prefork sans pool)
+@shared_task(name="applications.extract_cv_text", **task_time_limits(1))
+def extract_cv_text_task(application_id: str):
+    app = Application.objects(id=application_id).first()
+    if not app:
+        return {"error": "application_not_found"}
+    if not app.cv_file:
+        return {"error": "no_cv_file"}
+    if has_fresh_cv_text(app):
+        return {"ok": True, "skipped": True}
+
+    store_cv_text(app)
+    if app.cv_extraction_error:
+        return {"error": app.cv_extraction_error}
+    return {"ok": True, "pages": app.cv_pages, "truncated": app.cv_truncated, "chars": len(app.cv_text or "")}
+
+@shared_task(name="applications.process_import_batch", **task_time_limits(settings.APPLICATIONS_IMPORT_BATCH_SIZE))
+def process_import_batch_task(run_id: str, items: List[List]):
+    """
+    Lot d'un import en masse : extraction + analyse groupée (offre encodée une fois,
+    écriture par bulk_write) puis ajout à l'index vectoriel en un seul encodage.
+    items : [(index du fichier dans run.files, application_id)].
+    """
+    run = ImportRun.objects(id=run_id).only("job", "analyze").first()
+    if not run:
+        return {"error": "run_not_found"}
+    apps = {str(a.id): a for a in Application.objects(id__in=[app_id for _, app_id in items])}
+    batch = list(apps.values())
+
+    errors: Dict[str, str] = {}
+    finished_ids = set()
+    try:
+        if run.analyze:
+            job_desc = (run.job.description or "") if run.job else ""
+            try:
+                errors = analyze_and_save(batch, job_desc)
+                finished_ids.update(str(a.id) for a in batch)
+            except SoftTimeLimitExceeded:
+                raise
+            except Exception:
+                # le lot a échoué : on isole les candidatures fautives une par une
+                for app in batch:
+                    try:
+                        errors.update(analyze_and_save([app], job_desc))
+                    except SoftTimeLimitExceeded:
+                        raise
+                    except Exception as e:
+                        errors[str(app.id)] = str(e) or e.__class__.__name__
+                    finished_ids.add(str(app.id))
+        else:
+            for app in batch:
+                get_cv_text(app)
+                finished_ids.add(str(app.id))
+    except SoftTimeLimitExceeded:
+        # limite de la tâche atteinte : le reste du lot est compté en échec, le run se clôt quand même
+        errors.update({app_id: "time_limit" for app_id in apps if app_id not in finished_ids})
+
+    indexed = [a for a in batch if a.cv_text and str(a.id) not in errors]
+    if indexed:
+        get_index("cv").upsert([str(a.id) for a in indexed], encode([a.cv_text for a in indexed]))
+
+    ok_status = "analyzed" if run.analyze else "extracted"
+    update, processed = {}, 0
+    for index, app_id in items:
+        app = apps.get(app_id)
+        error = "application_not_found" if app is None else errors.get(app_id) or app.cv_extraction_error
+        update[f"files.{index}.status"] = "failed" if error else ok_status
+        update[f"files.{index}.error"] = error
+        processed += 0 if error else 1
+    failed = len(items) - processed
+
+    # compteurs incrémentés atomiquement : le lot qui complète l'import le clôture
+    counts = ImportRun._get_collection().find_one_and_update(
+        {"_id": run.pk},
+        {"$set": update, "$inc": {"processed": processed, "failed": failed}},
+        projection={"processed": 1, "failed": 1, "queued": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if counts and counts["processed"] + counts["failed"] >= counts.get("queued", 0):
+        ImportRun.objects(id=run.pk, status="processing").update(
+            set__status="done" if counts["processed"] else "failed", set__finished_at=dt.datetime.utcnow())
+    return {"processed": processed, "failed": failed}
+
+@shared_task(name="applications.sweep_import_runs")
+def sweep_import_runs_task():
+    """Planifiée par beat (CELERY_BEAT_SCHEDULE) : clôt les imports interrompus pendant l'ingestion."""
+    return {"failed": sweep_import_runs(settings.APPLICATIONS_IMPORT_STALE_S)}
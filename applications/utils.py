@@ -1,27 +1,156 @@
+import datetime as dt
+import hashlib
 import io
+import re
+from typing import List, Optional, Tuple
 from PyPDF2 import PdfReader
 import docx
+from celery.exceptions import SoftTimeLimitExceeded
+from hrms_backend.http_cache import invalidate, top_scope
+from hrms_backend.instrumentation import stage
+from hrms_backend.serializers import reference_id
 
-def extract_text_from_bytes(data: bytes, filename: str = "") -> str:
+# à incrémenter quand l'extraction/normalisation change : rend les textes stockés obsolètes
+EXTRACTION_VERSION = 1
+
+class ExtractionTimeout(Exception):
+    """Délai d'extraction dépassé (alarme posée par applications.extraction)."""
+
+# échecs liés aux conditions d'exécution, pas au document : jamais enregistrés comme définitifs
+TRANSIENT_EXTRACTION_ERRORS = ("timeout", "BrokenProcessPool")
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANKS = re.compile(r"\n{3,}")
+
+def normalize_text(text: str) -> str:
+    # espaces compactés par ligne, au plus une ligne vide entre deux blocs
+    lines = (_SPACES.sub(" ", line).strip() for line in (text or "").replace("\x00", "").splitlines())
+    return _BLANKS.sub("\n\n", "\n".join(lines)).strip()
+
+def extract_pdf_pages(data: bytes, start: int = 0, stop: Optional[int] = None) -> Tuple[List[str], int]:
+    """Textes des pages [start, stop) d'un PDF et nombre total de pages."""
+    reader = PdfReader(io.BytesIO(data))
+    total = len(reader.pages)
+    parts = []
+    for i in range(start, min(total, stop if stop is not None else total)):
+        try:
+            txt = reader.pages[i].extract_text() or ""
+        except (ExtractionTimeout, SoftTimeLimitExceeded):
+            raise
+        except Exception:
+            txt = ""
+        if txt:
+            parts.append(txt)
+    return parts, total
+
+def extract_document(data: bytes, filename: str = "", max_pages: Optional[int] = None) -> Tuple[str, int]:
+    """Retourne (texte brut, nombre de pages) ; 1 page pour les formats sans pagination."""
     name = (filename or "").lower()
     if name.endswith(".pdf"):
-        reader = PdfReader(io.BytesIO(data))
-        parts = []
-        for page in reader.pages:
-            try:
-                txt = page.extract_text() or ""
-            except Exception:
-                txt = ""
-            if txt:
-                parts.append(txt)
-        return "\n".join(parts)
+        parts, total = extract_pdf_pages(data, 0, max_pages)
+        return "\n".join(parts), total
 
     if name.endswith(".docx"):
         d = docx.Document(io.BytesIO(data))
-        return "\n".join(p.text for p in d.paragraphs if p.text)
+        return "\n".join(p.text for p in d.paragraphs if p.text), 1
 
     # fallback: texte brut
     try:
-        return data.decode("utf-8")
+        return data.decode("utf-8"), 1
+    except Exception:
+        return data.decode("latin-1", errors="ignore"), 1
+
+def extract_text_from_bytes(data: bytes, filename: str = "") -> str:
+    with stage("extract_text"):
+        return extract_document(data, filename)[0]
+
+def cv_text_is_current(app) -> bool:
+    """has_fresh_cv_text sans lire cv_text (champ lourd) : extraction du fichier actuel, version courante."""
+    return (
+        app.cv_extraction_version == EXTRACTION_VERSION
+        and bool(app.cv_file)
+        and app.cv_text_source == app.cv_file.grid_id
+        and app.cv_extraction_error not in TRANSIENT_EXTRACTION_ERRORS
+    )
+
+def has_fresh_cv_text(app) -> bool:
+    """Texte stocké présent, extrait du fichier GridFS actuel avec la version courante."""
+    return app.cv_text is not None and cv_text_is_current(app)
+
+def store_cv_text(app) -> str:
+    """Lit le CV GridFS, l'extrait une fois (pool sandboxé) et enregistre texte/pages/hash sur la candidature."""
+    from .extraction import get_extraction_service   # import local : le service importe ce module
+
+    if not app.cv_file:
+        return ""
+    try:
+        with stage("gridfs_read"):
+            data = app.cv_file.read()
+            filename = getattr(app.cv_file, "filename", "cv.pdf")
     except Exception:
-        return data.decode("latin-1", errors="ignore")
+        return ""
+    with stage("extract"):   # pool inclus (l'extraction tourne dans un autre process)
+        result = get_extraction_service().extract(data, filename)
+
+    if result.error in TRANSIENT_EXTRACTION_ERRORS:
+        # timeout, pool cassé : erreur visible, mais texte non marqué à jour (nouvelle tentative plus tard)
+        app.update(set__cv_extraction_error=result.error, set__updated_at=dt.datetime.utcnow())
+        app.cv_extraction_error = result.error
+        return ""
+
+    # échec propre au document (PDF corrompu, trop gros) : enregistré, pas de nouvelle tentative à chaque analyse
+    fields = {
+        "cv_text": normalize_text(result.text),
+        "cv_pages": result.pages,
+        "cv_truncated": result.truncated,
+        "cv_extraction_error": result.error,
+        "cv_sha256": hashlib.sha256(data).hexdigest(),
+        "cv_extracted_at": dt.datetime.utcnow(),
+        "cv_extraction_version": EXTRACTION_VERSION,
+        "cv_text_source": app.cv_file.grid_id,
+        "updated_at": dt.datetime.utcnow(),
+        # nouveau texte : les vecteurs de sections seront recalculés à la prochaine analyse
+        "cv_chunk_vectors": None,
+        "cv_chunk_dim": None,
+        "cv_chunk_model": None,
+        "cv_chunk_words": None,
+        "analysis_fp": None,
+        "analysis_fp_base": None,
+    }
+    app.update(**{f"set__{k}": v for k, v in fields.items()})
+    for k, v in fields.items():
+        setattr(app, k, v)
+    invalidate(top_scope(reference_id(app._data.get("job"))))   # le top expose pages/erreur d'extraction
+    return app.cv_text
+
+def reusable_extraction(sha256: str, grid_id) -> dict:
+    """
+    Champs d'extraction d'une autre candidature au même CV (même SHA-256),
+    à passer tels quels à la nouvelle : évite de réextraire un CV déjà vu.
+    """
+    from .models import Application   # import local : models n'importe pas utils
+
+    other = (
+        Application.objects(
+            cv_sha256=sha256, cv_extraction_version=EXTRACTION_VERSION, cv_text__ne=None, cv_extraction_error=None,
+        )
+        .only("cv_text", "cv_pages", "cv_truncated", "cv_extracted_at")
+        .first()
+    )
+    if not other:
+        return {"cv_sha256": sha256}
+    return {
+        "cv_text": other.cv_text,
+        "cv_pages": other.cv_pages,
+        "cv_truncated": other.cv_truncated,
+        "cv_sha256": sha256,
+        "cv_extracted_at": other.cv_extracted_at,
+        "cv_extraction_version": EXTRACTION_VERSION,
+        "cv_text_source": grid_id,   # mêmes octets : le texte vaut pour ce fichier
+    }
+
+def get_cv_text(app) -> str:
+    """Texte du CV : version stockée si à jour, sinon (ré)extraction depuis GridFS."""
+    if has_fresh_cv_text(app):
+        return app.cv_text
+    return store_cv_text(app)
@@ -1,21 +1,82 @@
 from rest_framework_mongoengine.viewsets import ModelViewSet
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from hrms_backend.http_cache import invalidate, top_scope
+from hrms_backend.serializers import reference_id
+from hrms_backend.listing import KeysetPagination, FieldsProjectionMixin, LazyQuerySet
 from .models import Application
 from .serializers import ApplicationWriteSerializer, ApplicationReadSerializer
+from celery import chain
+from ai.tasks import index_application_task
+from analytics.rollups import RollupDelta
+from analytics.stats import record_created, record_deleted
+from .storage import store_upload, UploadTooLarge
+from .tasks import extract_cv_text_task
+from .utils import reusable_extraction
 
-class ApplicationViewSet(ModelViewSet):
+class ApplicationViewSet(FieldsProjectionMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Application.objects
+    queryset = LazyQuerySet(lambda: Application.objects.exclude(*Application.HEAVY_FIELDS))   # jamais renvoyés : inutile de les charger
+    pagination_class = KeysetPagination
 
     def get_serializer_class(self):
         return ApplicationWriteSerializer if self.action in ("create","update","partial_update") else ApplicationReadSerializer
 
     def perform_create(self, serializer):
-        app = serializer.save()
         file_obj = self.request.FILES.get("cv_file")  # ⬅️ clé form-data
-        if file_obj:
-            data = file_obj.read()             # lire une seule fois
-            filename = getattr(file_obj, "name", "cv")
-            # éviter GridFSError “already has a file”
-            app.cv_file.replace(data, filename=filename)
-            app.save()
+        if not file_obj:
+            app = serializer.save()
+            record_created(app)
+            invalidate(top_scope(reference_id(app._data.get("job"))))
+            return
+
+        # streaming vers GridFS (taille plafonnée, dédoublonnage par SHA-256)
+        try:
+            stored = store_upload(file_obj)
+        except UploadTooLarge as e:
+            raise ValidationError({"cv_file": str(e)})
+        extraction = reusable_extraction(stored.sha256, stored.grid_id)
+        app = serializer.save(cv_file=stored.proxy(), **extraction)
+        record_created(app)
+        invalidate(top_scope(reference_id(app._data.get("job"))))
+
+        if "cv_text" in extraction:
+            index_application_task.delay(str(app.id))   # CV déjà extrait : rien à refaire
+        else:
+            # extraction du texte une fois pour toutes, puis ajout à l'index vectoriel
+            chain(extract_cv_text_task.si(str(app.id)), index_application_task.si(str(app.id))).delay()
+
+    def perform_update(self, serializer):
+        old_job = reference_id(serializer.instance._data.get("job"))
+        old_cv = serializer.instance.cv_file.grid_id if serializer.instance.cv_file else None
+        file_obj = self.request.FILES.get("cv_file")
+        if not file_obj:
+            app = serializer.save()
+        else:
+            # même chemin qu'à la création : jamais d'affectation du fichier brut au FileField,
+            # qui supprimerait l'ancien fichier GridFS, peut-être partagé (dédoublonnage)
+            try:
+                stored = store_upload(file_obj)
+            except UploadTooLarge as e:
+                raise ValidationError({"cv_file": str(e)})
+            extraction = reusable_extraction(stored.sha256, stored.grid_id)
+            app = serializer.save(cv_file=stored.proxy(), analysis_fp=None, analysis_fp_base=None, **extraction)   # nouveau CV : à réanalyser
+            if stored.grid_id != old_cv:
+                Application.release_cv_file(old_cv)
+                if "cv_text" in extraction:
+                    index_application_task.delay(str(app.id))
+                else:
+                    chain(extract_cv_text_task.si(str(app.id)), index_application_task.si(str(app.id))).delay()
+        new_job = reference_id(app._data.get("job"))
+        if new_job != old_job:
+            # candidature déplacée : ses compteurs quotidiens changent d'offre (et de département)
+            rollups = RollupDelta()
+            rollups.created(old_job, app.created_at, app.status, app.score, sign=-1)
+            rollups.created(new_job, app.created_at, app.status, app.score)
+            rollups.commit()
+        invalidate(top_scope(old_job), top_scope(new_job))
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        record_deleted(instance)
+        invalidate(top_scope(reference_id(instance._data.get("job"))))
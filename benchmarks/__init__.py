@@ -0,0 +1 @@
+# Benchmarks reproductibles des chemins critiques (python -m benchmarks.<module>)
@@ -0,0 +1,141 @@
+"""
+Benchmark des chemins critiques de l'ATS : analyse IA, extraction de texte, API.
+
+    python -m benchmarks.bench_ats --mongo mongomock --backend stub --cvs 200 --out ats.json
+    python -m benchmarks.bench_ats --mongo mongodb://localhost:27017 --backend torch --only analyze top
+    python -m benchmarks.bench_ats --redis redis://localhost:6379/15 --only top top_304 top_cached
+
+Corpus synthétiques à graine fixe (benchmarks.corpus), base dédiée vidée au démarrage
+(benchmarks.env). Les vues sont appelées via APIRequestFactory avec un vrai JWT,
+authentification et rendu JSON compris. Sortie : p50/p95, débit, pic de RSS.
+"""
+import argparse
+import itertools
+import time
+
+from benchmarks import corpus
+from benchmarks.env import setup
+from benchmarks.stats import peak_rss_mb, timed, write_results
+
+BENCHMARKS = ("simple_extractions", "analyze_text", "extract", "analyze", "top", "top_304", "top_cached", "metrics", "auth")
+
+def seed(cvs, jobs):
+    """Recruteur, offres, candidatures (CV stockés dans GridFS, texte extrait une fois)."""
+    from accounts.models import User
+    from applications.models import Application
+    from applications.storage import store_stream
+    from applications.utils import store_cv_text
+    from jobs.models import Job
+
+    recruiter = User(email="bench@example.com", full_name="Bench", role="recruiter")
+    recruiter.set_password("bench")
+    recruiter.save()
+    job_docs = [Job(**data).save() for data in jobs]
+    t0 = time.perf_counter()
+    for i, (_, filename, data) in enumerate(cvs):
+        stored = store_stream([data], filename)
+        app = Application(candidate=recruiter, job=job_docs[i % len(job_docs)], cv_file=stored.proxy()).save()
+        store_cv_text(app)
+    return recruiter, job_docs, time.perf_counter() - t0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongomock", help="mongomock ou URI MongoDB locale")
+    parser.add_argument("--backend", default="stub", help="backend d'embeddings (ai.backends)")
+    parser.add_argument("--cvs", type=int, default=100, help="candidatures générées")
+    parser.add_argument("--jobs", type=int, default=5)
+    parser.add_argument("--words", type=int, default=400, help="mots par CV")
+    parser.add_argument("--formats", nargs="+", default=list(corpus.FORMATS), choices=corpus.FORMATS)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--redis", help="Redis dédié (vidé) pour top_cached : corps servis depuis le cache HTTP")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    setup(mongo=args.mongo, backend=args.backend)
+
+    from rest_framework.test import APIRequestFactory
+    from accounts.jwt_utils import create_jwt
+    from accounts.views import me
+    from ai.service import _simple_extractions, analyze_text, warm_up
+    from analytics.views import metrics
+    from applications.utils import extract_text_from_bytes
+    from jobs.views import JobViewSet
+
+    cvs = corpus.cvs(args.cvs, seed=args.seed, words=args.words, formats=tuple(args.formats))
+    jobs = corpus.jobs(args.jobs, seed=args.seed)
+    t0 = time.perf_counter()
+    warm_up()
+    results = {"config": {k: v for k, v in vars(args).items() if k != "out"},
+               "warm_up_s": round(time.perf_counter() - t0, 3)}
+    texts = [text for text, _, _ in cvs]
+    description = jobs[0]["description"]
+
+    if "simple_extractions" in args.only:
+        next_text = itertools.cycle(texts).__next__
+        results["simple_extractions"] = timed(lambda: _simple_extractions(next_text()), args.repeat * 10)
+    if "analyze_text" in args.only:
+        next_text = itertools.cycle(texts).__next__
+        results["analyze_text"] = timed(lambda: analyze_text(next_text(), description), args.repeat)
+    if "extract" in args.only:
+        results["extract"] = {}
+        for fmt in args.formats:
+            samples = [(f, d) for _, f, d in cvs if f.endswith("." + fmt)] or [corpus.cv_file(texts[0], fmt)]
+            next_sample = itertools.cycle(samples).__next__
+            results["extract"][fmt] = timed(lambda: extract_text_from_bytes(*next_sample()[::-1]), args.repeat)
+
+    if {"analyze", "top", "top_304", "top_cached", "metrics", "auth"} & set(args.only):
+        recruiter, job_docs, seed_s = seed(cvs, jobs)
+        results["seed"] = {"applications": len(cvs), "seconds": round(seed_s, 3)}
+        token = create_jwt({"uid": str(recruiter.id), "role": recruiter.role, "email": recruiter.email})
+        factory = APIRequestFactory()
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+        job = job_docs[0]
+        per_job = sum(1 for i in range(len(cvs)) if i % len(job_docs) == 0)
+
+        def call(view, method, path, headers=None, **kwargs):
+            request = getattr(factory, method)(path, format="json", **auth, **(headers or {}))
+            response = view(request, **kwargs)
+            if hasattr(response, "render"):   # réponses http_cache : HttpResponse déjà rendue
+                response.render()
+            assert response.status_code < 400, (path, response.status_code, getattr(response, "data", response.content[:200]))
+            return response
+
+        if "analyze" in args.only:
+            view = JobViewSet.as_view({"post": "analyze_applications"})
+            # force=1 : sinon, après la première passe, toutes les empreintes sont à jour et rien n'est analysé
+            results["analyze"] = {"applications": per_job, **timed(
+                lambda: call(view, "post", f"/api/jobs/{job.id}/analyze/?force=1", id=str(job.id)),
+                max(args.repeat // 4, 3), items=per_job)}
+        top_view, top_path = JobViewSet.as_view({"get": "top"}), f"/api/jobs/{job.id}/top/"
+        if "top" in args.only:
+            results["top"] = timed(lambda: call(top_view, "get", top_path, id=str(job.id)), args.repeat)
+        if "top_304" in args.only:
+            # client à jour : validateurs seuls, ni calcul ni corps
+            etag = call(top_view, "get", top_path, id=str(job.id))["ETag"]
+            def not_modified():
+                response = call(top_view, "get", top_path, headers={"HTTP_IF_NONE_MATCH": etag}, id=str(job.id))
+                assert response.status_code == 304, response.status_code
+            results["top_304"] = timed(not_modified, args.repeat)
+        if "top_cached" in args.only:
+            if not args.redis:
+                results["top_cached"] = {"skipped": "--redis requis"}
+            else:
+                from django.conf import settings
+                from hrms_backend.http_cache import _redis
+                # activé ici seulement : top et top_304 mesurent le chemin sans cache de corps
+                settings.HTTP_CACHE_REDIS, settings.REDIS_URL = True, args.redis
+                _redis().flushdb()
+                call(top_view, "get", top_path, id=str(job.id))   # remplit le cache
+                results["top_cached"] = timed(lambda: call(top_view, "get", top_path, id=str(job.id)), args.repeat)
+        if "metrics" in args.only:
+            results["metrics"] = timed(lambda: call(metrics, "get", "/api/analytics/metrics/"), args.repeat)
+        if "auth" in args.only:
+            results["auth"] = timed(lambda: call(me, "get", "/api/accounts/auth/me/"), args.repeat * 10)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    write_results("ats", results, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compare les backends d'embeddings (ai.backends) : chargement, latence, débit, RSS.
+
+    python -m benchmarks.bench_backends --backends torch quantized stub --out backends.json
+
+Chaque backend tourne dans son propre sous-process pour que le pic de RSS soit le sien.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import time
+
+from benchmarks.stats import peak_rss_mb, timed, write_results
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+_WORDS = ("python django docker kubernetes aws react mongodb équipe projet développement "
+          "données api cloud sécurité tests agile expérience ingénieur backend frontend").split()
+
+def _texts(n: int, words: int, seed: int):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(_WORDS, k=words)) for _ in range(n)]
+
+def run_one(name: str, batch: int, words: int, repeat: int, seed: int) -> dict:
+    from ai.backends import BACKENDS
+
+    backend = BACKENDS[name](MODEL_NAME)
+    t0 = time.perf_counter()
+    backend.warm_up()
+    load_s = time.perf_counter() - t0
+
+    single = _texts(1, words, seed)
+    many = _texts(batch, words, seed + 1)
+    return {
+        "backend": name,
+        "load_s": round(load_s, 3),
+        "single": timed(lambda: backend.encode(single), repeat),
+        "batch": {"size": batch, **timed(lambda: backend.encode(many, batch_size=batch), max(repeat // 10, 3), items=batch)},
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "quantized", "stub"])
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--words", type=int, default=200, help="mots par texte")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out")
+    parser.add_argument("--single", help=argparse.SUPPRESS)   # mode sous-process
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_one(args.single, args.batch, args.words, args.repeat, args.seed)))
+        return
+
+    results = []
+    for name in args.backends:
+        cmd = [sys.executable, "-m", "benchmarks.bench_backends", "--single", name,
+               "--batch", str(args.batch), "--words", str(args.words),
+               "--repeat", str(args.repeat), "--seed", str(args.seed)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            results.append({"backend": name, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]})
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    write_results("backends", results, args.out)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Temps de démarrage et empreinte mémoire d'un process Django selon son rôle.
+
+    python -m benchmarks.bench_imports --roles web worker --out imports.json
+    python -m benchmarks.bench_imports --roles web --assert-no-ml   # échoue si torch est chargé côté web
+
+Chaque rôle démarre dans un sous-process `python -X importtime` qui exécute
+django.setup() et charge l'URLconf et l'application WSGI (ce que fait un worker
+gunicorn). La sortie -X importtime est agrégée : temps total, modules les plus
+coûteux, RSS, et modules ML présents dans sys.modules.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from benchmarks.stats import write_results
+
+ML_MODULES = ("torch", "sentence_transformers", "transformers", "sklearn", "scipy")
+
+_PROBE = """
+import json, sys
+import django
+django.setup()
+import hrms_backend.urls, hrms_backend.wsgi
+if {warm_up!r}:
+    from ai.service import warm_up
+    warm_up()
+from benchmarks.stats import peak_rss_mb
+print(json.dumps({{"peak_rss_mb": peak_rss_mb(), "modules": len(sys.modules),
+                  "ml_modules": sorted(m for m in {ml!r} if m in sys.modules)}}))
+"""
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(stderr: str):
+    """(module, self_us, cumulative_us, profondeur) par ligne -X importtime."""
+    rows = []
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), (len(m.group(3)) - 1) // 2))
+    return rows
+
+def run_role(role: str, warm_up: bool, top: int) -> dict:
+    env = dict(os.environ, PROCESS_ROLE=role, DJANGO_SETTINGS_MODULE="hrms_backend.settings")
+    env.setdefault("AI_WARMUP_WEB", "false")
+    probe = _PROBE.format(warm_up=warm_up, ml=ML_MODULES)
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", probe], capture_output=True, text=True, env=env)
+    wall = time.perf_counter() - t0
+    if proc.returncode != 0:
+        return {"role": role, "error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+
+    rows = parse_importtime(proc.stderr)
+    roots = [r for r in rows if r[3] == 0]
+    by_package = {}
+    for name, _, cumulative, _ in roots:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + cumulative
+    return {
+        "role": role,
+        "warm_up": warm_up,
+        "wall_s": round(wall, 3),
+        "import_ms": round(sum(r[2] for r in roots) / 1000.0, 1),
+        "top_packages_ms": {k: round(v / 1000.0, 1) for k, v in
+                            sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]},
+        **json.loads(proc.stdout.strip().splitlines()[-1]),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--roles", nargs="+", default=["web", "worker"])
+    parser.add_argument("--warm-up", action="store_true", help="appelle ai.service.warm_up() comme au démarrage")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--assert-no-ml", action="store_true",
+                        help="code de sortie 1 si un module ML est chargé dans un process web")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    results = [run_role(role, args.warm_up, args.top) for role in args.roles]
+    write_results("imports", results, args.out)
+
+    if args.assert_no_ml:
+        offenders = {r["role"]: r.get("ml_modules", r.get("error")) for r in results
+                     if r["role"] == "web" and (r.get("ml_modules") or r.get("error"))}
+        if offenders:
+            print(f"modules ML chargés côté web : {offenders}", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
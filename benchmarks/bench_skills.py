@@ -0,0 +1,91 @@
+"""
+Débit de l'extraction de compétences en fonction de la taille de la taxonomie.
+
+    python -m benchmarks.bench_skills --sizes 50 500 5000 50000 --out skills.json
+
+Compare le moteur compilé (ai.skills.TrieRegexExtractor) à l'ancienne boucle
+`skill in text` : le premier doit rester ~constant quand la taxonomie grossit.
+La première ligne porte sur la taxonomie livrée (--taxonomy, synonymes compris).
+"""
+import argparse
+import json
+import random
+import string
+import time
+from pathlib import Path
+
+from ai.skills import TrieRegexExtractor, load_taxonomy
+
+def synthetic_taxonomy(size: int, rng: random.Random) -> dict:
+    taxonomy = {}
+    while len(taxonomy) < size:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        if rng.random() < 0.2:
+            word += " " + "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 6)))
+        taxonomy[word] = [word + "x"] if rng.random() < 0.3 else []
+    return taxonomy
+
+def synthetic_text(taxonomy: dict, words: int, rng: random.Random) -> str:
+    skills = [term for canon, synonyms in taxonomy.items() for term in (canon, *synonyms)]
+    out = []
+    for _ in range(words):
+        if rng.random() < 0.05:
+            out.append(rng.choice(skills))
+        else:
+            out.append("".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9))))
+    return " ".join(out)
+
+def _naive(taxonomy: dict, text: str):
+    text_l = text.lower()
+    return [s for s in taxonomy if s in text_l]
+
+def bench(size: int, words: int, repeat: int, seed: int, taxonomy: dict = None) -> dict:
+    rng = random.Random(seed)
+    taxonomy = taxonomy or synthetic_taxonomy(size, rng)
+    text = synthetic_text(taxonomy, words, rng)
+    mb = len(text.encode("utf-8")) / 1e6
+
+    t0 = time.perf_counter()
+    extractor = TrieRegexExtractor(taxonomy)
+    compile_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        extractor.extract(text)
+    engine_s = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        _naive(taxonomy, text)
+    naive_s = (time.perf_counter() - t0) / repeat
+
+    return {
+        "taxonomy_size": len(taxonomy),
+        "terms": sum(1 + len(synonyms) for synonyms in taxonomy.values()),
+        "text_mb": round(mb, 3),
+        "compile_s": round(compile_s, 4),
+        "engine_mb_per_s": round(mb / engine_s, 2),
+        "naive_mb_per_s": round(mb / naive_s, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000, 50000])
+    parser.add_argument("--words", type=int, default=20000, help="taille du texte (mots)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--taxonomy", default=str(Path(__file__).resolve().parent.parent / "ai" / "data" / "skills.json"))
+    parser.add_argument("--out", help="fichier JSON de sortie (stdout sinon)")
+    args = parser.parse_args()
+
+    shipped = load_taxonomy(args.taxonomy)
+    results = [{"taxonomy": "shipped", **bench(0, args.words, args.repeat, args.seed, taxonomy=shipped)}]
+    results += [bench(size, args.words, args.repeat, args.seed) for size in args.sizes]
+    payload = json.dumps({"benchmark": "skills", "results": results}, indent=2)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(payload)
+    print(payload)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Corpus synthétiques et reproductibles (graine fixe) : CV txt/pdf/docx et offres.
+
+Le PDF est écrit à la main (texte Helvetica, une page par tranche de lignes) pour
+ne dépendre que de ce que l'extraction lit déjà ; le DOCX passe par python-docx.
+"""
+import io
+import random
+from typing import Dict, List, Tuple
+
+FORMATS = ("txt", "pdf", "docx")
+
+_SKILLS = ("python django flask fastapi mongodb postgresql redis celery docker kubernetes aws gcp azure "
+           "react vue angular typescript javascript java spring go rust git linux terraform ansible "
+           "pandas numpy pytorch tensorflow scikit-learn spark kafka graphql rest").split()
+_FILLER = ("équipe projet développement données api cloud sécurité tests agile client produit "
+           "conception livraison maintenance performance migration architecture service plateforme "
+           "responsable mise en place amélioration suivi qualité documentation").split()
+_EDUCATION = ("Master informatique", "Licence mathématiques", "Bachelor engineering", "Doctorat", "BTS SIO")
+_TITLES = ("Backend developer", "Data engineer", "DevOps engineer", "Fullstack developer", "ML engineer")
+
+def cv_text(rng: random.Random, words: int = 400) -> str:
+    """Texte de CV : sections, années d'expérience, diplôme, compétences mêlées au texte."""
+    paragraphs, remaining = [], words
+    while remaining > 0:
+        n = min(remaining, rng.randint(40, 120))
+        body = [rng.choice(_SKILLS) if rng.random() < 0.15 else rng.choice(_FILLER) for _ in range(n)]
+        paragraphs.append(" ".join(body) + ".")
+        remaining -= n
+    header = f"Expérience\n{rng.randint(1, 15)} ans d'expérience. {rng.choice(_EDUCATION)}."
+    return header + "\n\n" + "\n\n".join(paragraphs)
+
+def job(rng: random.Random) -> Dict[str, object]:
+    skills = rng.sample(_SKILLS, 6)
+    return {
+        "title": rng.choice(_TITLES),
+        "description": f"Nous recherchons un profil maîtrisant {', '.join(skills)}. "
+                       + " ".join(rng.choices(_FILLER, k=60)),
+        "required_skills": skills,
+        "department": rng.choice(("tech", "data", "infra")),
+        "status": "open",
+    }
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def to_pdf(text: str, lines_per_page: int = 45, width: int = 90) -> bytes:
+    lines: List[str] = []
+    for paragraph in text.split("\n"):
+        words, current = paragraph.split(), ""
+        for word in words:
+            if len(current) + len(word) + 1 > width:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}".strip()
+        lines.append(current)
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[""]]
+
+    # objets : 1 catalogue, 2 pages, 3 police, puis (page, contenu) par page
+    objects = {1: b"<< /Type /Catalog /Pages 2 0 R >>",
+               3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"}
+    kids = []
+    for i, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        ops += [f"({_pdf_escape(line)}) '" for line in page_lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("cp1252", "replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id)
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (num, objects[num]))
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for num in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[num])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+def to_docx(text: str) -> bytes:
+    import docx
+
+    document = docx.Document()
+    for paragraph in text.split("\n"):
+        document.add_paragraph(paragraph)
+    out = io.BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+def cv_file(text: str, fmt: str, name: str = "cv") -> Tuple[str, bytes]:
+    """(nom de fichier, contenu) d'un CV dans le format demandé."""
+    if fmt == "pdf":
+        return f"{name}.pdf", to_pdf(text)
+    if fmt == "docx":
+        return f"{name}.docx", to_docx(text)
+    return f"{name}.txt", text.encode("utf-8")
+
+def cvs(n: int, seed: int = 42, words: int = 400, formats=FORMATS) -> List[Tuple[str, str, bytes]]:
+    """n CV (texte, nom de fichier, contenu), formats en alternance."""
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        text = cv_text(rng, words)
+        filename, data = cv_file(text, formats[i % len(formats)], name=f"cv{i}")
+        out.append((text, filename, data))
+    return out
+
+def jobs(n: int, seed: int = 7) -> List[Dict[str, object]]:
+    rng = random.Random(seed)
+    return [job(rng) for _ in range(n)]
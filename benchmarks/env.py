@@ -0,0 +1,57 @@
+"""
+Environnement Django des benchmarks : MongoDB local (base dédiée, sans TLS) ou
+mongomock en mémoire, backend d'embeddings au choix, Celery en mode eager.
+
+À appeler avant tout import de modèle :
+
+    from benchmarks.env import setup
+    setup(mongo="mongomock", backend="stub")
+"""
+import os
+import sys
+
+def setup(mongo: str = "mongomock", backend: str = "stub", db: str = "hrms_bench"):
+    """
+    mongo : "mongomock" ou une URI (mongodb://localhost:27017). La base `db` est
+    vidée au démarrage : ne jamais pointer vers une base de production.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hrms_backend.settings")
+    os.environ["AI_BACKEND"] = backend
+    os.environ["AI_EMBEDDING_MODE"] = "local"
+    os.environ.setdefault("AI_INDEX_DIR", os.path.join("var", "bench-index"))
+    os.environ.setdefault("EXTRACTION_POOL_WORKERS", "0")   # extraction en ligne : mesure le code, pas le pool
+    os.environ.setdefault("ALLOWED_HOSTS", "testserver,localhost")
+
+    os.environ["MONGO_DB"] = db
+    os.environ["MONGO_TLS"] = "false"
+    if mongo == "mongomock":
+        try:
+            import mongomock
+            import mongomock.gridfs
+        except ImportError:
+            sys.exit("mongomock n'est pas installé : pip install mongomock, ou --mongo mongodb://localhost:27017")
+        mongomock.gridfs.enable_gridfs_integration()
+        from mongoengine import connection
+
+        # hrms_backend.mongo enregistre la connexion : on y substitue le client mongomock
+        register = connection.register_connection
+        connection.register_connection = lambda alias, **kwargs: register(
+            alias, db=db, host="mongodb://localhost", mongo_client_class=mongomock.MongoClient)
+    else:
+        os.environ["MONGO_URI"] = mongo
+
+    import django
+    from django.conf import settings
+
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    settings.CELERY_TASK_EAGER_PROPAGATES = True
+    settings.CELERY_RESULT_BACKEND = "cache+memory://"
+    settings.EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
+    django.setup()
+
+    from hrms_backend.celery import app
+    app.conf.task_always_eager = True
+    app.conf.task_eager_propagates = True
+
+    from mongoengine.connection import get_db
+    get_db().client.drop_database(db)
@@ -0,0 +1,53 @@
+# Utilitaires communs aux benchmarks : percentiles, RSS, sortie JSON
+import json
+import platform
+import resource
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ko sous Linux, octets sous macOS
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+def timed(fn: Callable[[], object], repeat: int, warmup: int = 1, items: int = 1) -> Dict[str, float]:
+    """Exécute fn `repeat` fois ; latences en ms, débit en items/s."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    t_start = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    total = time.perf_counter() - t_start
+    return {
+        "runs": repeat,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        "throughput_per_s": round(repeat * items / total, 2) if total else 0.0,
+    }
+
+def write_results(name: str, results, out: Optional[str] = None) -> str:
+    payload = json.dumps({
+        "benchmark": name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }, indent=2)
+    if out:
+        with open(out, "w") as fh:
+            fh.write(payload)
+    print(payload)
+    return payload
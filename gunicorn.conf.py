@@ -0,0 +1,22 @@
+# Chargé automatiquement par gunicorn depuis le répertoire courant (cf. Dockerfile)
+import os
+import sys
+
+# process web : modèle jamais chargé ici, encodage délégué aux workers (cf. AI_EMBEDDING_MODE)
+os.environ.setdefault("PROCESS_ROLE", "web")
+
+def post_fork(server, worker):
+    # AI_WARMUP_WEB=true : le worker web charge le modèle avant sa première requête
+    if os.getenv("AI_WARMUP_WEB", "false").lower() != "true":
+        return
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hrms_backend.settings")
+    import django
+    django.setup()
+    from ai.service import warm_up
+    warm_up()
+
+def worker_exit(server, worker):
+    # ferme le client MongoDB du worker (créé après le fork, cf. hrms_backend.mongo)
+    if "hrms_backend.mongo" in sys.modules:
+        from hrms_backend.mongo import shutdown
+        shutdown()
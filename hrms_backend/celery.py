@@ -1,9 +1,31 @@
 import os
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hrms_backend.settings")
 
 app = Celery("hrms_backend")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 # autodécouverte des tasks.py dans les apps
-app.autodiscover_tasks(["ai", "notifications", "applications"])
+app.autodiscover_tasks(["ai", "notifications", "applications", "analytics"])
+
+# durée des tâches et attente en file (hrms_backend.instrumentation)
+from hrms_backend.instrumentation import connect_celery_signals  # noqa: E402
+connect_celery_signals()
+
+@worker_process_init.connect
+def _warm_up_worker(**kwargs):
+    # chaque process enfant charge le modèle avant sa première tâche
+    from django.conf import settings
+    if settings.AI_WARMUP_WORKER:
+        from ai.service import warm_up
+        warm_up()
+    if settings.INSTRUMENTATION_WORKER_PORT:
+        from billiard.process import current_process
+        from hrms_backend.instrumentation import serve_worker_metrics
+        serve_worker_metrics(settings.INSTRUMENTATION_WORKER_PORT + (getattr(current_process(), "index", 0) or 0))
+
+@worker_process_shutdown.connect
+def _close_mongo(**kwargs):
+    from hrms_backend.mongo import shutdown
+    shutdown()
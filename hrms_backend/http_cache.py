@@ -0,0 +1,148 @@
+# hrms_backend/http_cache.py
+# GET conditionnels (ETag / Last-Modified → 304) et cache Redis optionnel des corps
+# JSON pour les endpoints interrogés en boucle (offre, top, métriques).
+#
+# Chaque réponse appartient à un "scope" (job:<id>, top:<job_id>, metrics). Les
+# écritures invalident précisément leurs scopes (invalidate) : le hash Redis du scope
+# est supprimé et son numéro de génération incrémenté, ce qui empêche une requête
+# en cours de réinsérer un corps calculé avant l'écriture.
+import datetime as dt
+import hashlib
+import json
+import logging
+from typing import Any, Callable, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe, parse_etags
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+METRICS_SCOPE = "metrics"
+
+# (empreinte des données, date de dernière modification) ; None = pas de validateur léger (ETag sur le corps)
+Validators = Optional[Tuple[str, Optional[dt.datetime]]]
+
+def job_scope(job_id) -> str:
+    return f"job:{job_id}"
+
+def top_scope(job_id) -> str:
+    return f"top:{job_id}"
+
+_client = None
+
+def _redis():
+    global _client
+    if not settings.HTTP_CACHE_REDIS:
+        return None
+    if _client is None:
+        import redis
+        _client = redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.2)
+    return _client
+
+def _body_key(scope: str) -> str:
+    return f"http:body:{scope}"
+
+def _gen_key(scope: str) -> str:
+    return f"http:gen:{scope}"
+
+def invalidate(*scopes: str):
+    """À appeler après toute écriture qui change la réponse d'un scope."""
+    client = _redis()
+    if client is None or not scopes:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for scope in set(scopes):
+            pipe.incr(_gen_key(scope))
+            pipe.expire(_gen_key(scope), settings.HTTP_CACHE_TTL * 2)
+            pipe.delete(_body_key(scope))
+        pipe.execute()
+    except Exception:
+        logger.warning("http_cache: invalidation impossible pour %s", scopes, exc_info=True)
+
+def _etag(scope: str, variant: str, fingerprint: str) -> str:
+    return '"%s"' % hashlib.sha1(f"{scope}|{variant}|{fingerprint}".encode("utf-8")).hexdigest()
+
+def _not_modified(request, etag: str, last_modified: Optional[float]) -> bool:
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        # comparaison faible (RFC 9110) : W/"x" == "x"
+        tags = {t[2:] if t.startswith("W/") else t for t in parse_etags(if_none_match)}
+        return "*" in tags or etag in tags
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return since is not None and last_modified is not None and int(last_modified) <= since
+
+def _with_headers(response, etag: str, last_modified: Optional[float]):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"   # revalidation à chaque fois (304 si inchangé)
+    return response
+
+def _respond(request, body: bytes, etag: str, last_modified: Optional[float]):
+    if _not_modified(request, etag, last_modified):
+        return _with_headers(HttpResponseNotModified(), etag, last_modified)
+    return _with_headers(HttpResponse(body, content_type="application/json"), etag, last_modified)
+
+def cached_response(request, scope: str, validators: Callable[[], Validators], build: Callable[[], Any]):
+    """
+    Réponse JSON d'un GET à partir de :
+      - validators() : requête légère → (empreinte, last_modified) des données,
+        ou None (l'ETag est alors l'empreinte du corps calculé) ;
+      - build() : calcul complet des données (sérialisation comprise).
+    Ordre : corps en cache Redis (aucune requête Mongo) → 304 si le client est à
+    jour → build(), mis en cache si la génération du scope n'a pas bougé.
+    """
+    if not settings.HTTP_CACHE_ENABLED:
+        return HttpResponse(JSONRenderer().render(build()), content_type="application/json")
+
+    variant = request.META.get("QUERY_STRING", "")
+    client = _redis()
+    generation = None
+    if client is not None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.hget(_body_key(scope), variant)
+            pipe.get(_gen_key(scope))
+            cached, generation = pipe.execute()
+        except Exception:
+            cached, client = None, None
+        if cached:
+            entry = json.loads(cached)
+            return _respond(request, entry["body"].encode("utf-8"), entry["etag"], entry["last_modified"])
+
+    found = validators()
+    if found is not None:
+        fingerprint, modified = found
+        last_modified = modified.replace(tzinfo=dt.timezone.utc).timestamp() if modified else None
+        etag = _etag(scope, variant, fingerprint)
+        if _not_modified(request, etag, last_modified):
+            return _with_headers(HttpResponseNotModified(), etag, last_modified)
+
+    body = JSONRenderer().render(build())
+    if found is None:
+        # pas de validateur bon marché : empreinte du corps (économise au moins le transfert)
+        etag, last_modified = _etag(scope, variant, hashlib.sha1(body).hexdigest()), None
+    if client is not None:
+        _store(client, scope, variant, generation, body, etag, last_modified)
+    return _respond(request, body, etag, last_modified)
+
+def _store(client, scope: str, variant: str, generation, body: bytes, etag: str, last_modified: Optional[float]):
+    import redis
+
+    entry = json.dumps({"body": body.decode("utf-8"), "etag": etag, "last_modified": last_modified})
+    try:
+        with client.pipeline(transaction=True) as pipe:
+            pipe.watch(_gen_key(scope))
+            if pipe.get(_gen_key(scope)) != generation:
+                return   # écriture concurrente : le corps calculé est peut-être déjà périmé
+            pipe.multi()
+            pipe.hset(_body_key(scope), variant, entry)
+            pipe.expire(_body_key(scope), settings.HTTP_CACHE_TTL)
+            pipe.execute()
+    except redis.WatchError:
+        pass
+    except Exception:
+        logger.warning("http_cache: écriture impossible pour %s", scope, exc_info=True)
@@ -0,0 +1,236 @@
+# hrms_backend/instrumentation.py
+# Mesures par process (latences HTTP, tâches Celery, étapes d'analyse) exposées au format Prometheus
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+# bornes (secondes) communes à tous les histogrammes
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+HELP = {
+    "hrms_http_request_seconds": "Latence des requêtes HTTP par route",
+    "hrms_celery_task_seconds": "Durée d'exécution des tâches Celery",
+    "hrms_celery_queue_wait_seconds": "Attente en file entre publication et début d'exécution",
+    "hrms_stage_seconds": "Durée des étapes internes (lecture GridFS, extraction, embeddings...)",
+    "hrms_embedding_cache_total": "Textes servis par le cache d'embeddings (LRU, Mongo) ou encodés (miss)",
+}
+
+class Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+class Registry:
+    """Histogrammes agrégés dans le process courant (pas d'état partagé entre workers)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float] = {}
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            hist = self._series.get(key)
+            if hist is None:
+                hist = self._series[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        """Compteur monotone (type Prometheus counter)."""
+        if not amount:
+            return
+        key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            series = sorted(self._series.items())
+            snapshot = [(name, labels, list(h.counts), h.total, h.count) for (name, labels), h in series]
+            counters = sorted(self._counters.items())
+        lines, seen = [], set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{name}{{{base}}} {value:g}" if base else f"{name} {value:g}")
+        for name, labels, counts, total, count in snapshot:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, n in zip(BUCKETS, counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{{base}{sep}le="+Inf"}} {count}')
+            lines.append(f"{name}_sum{{{base}}} {total:.6f}" if base else f"{name}_sum {total:.6f}")
+            lines.append(f"{name}_count{{{base}}} {count}" if base else f"{name}_count {count}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+_registry = Registry()
+
+def get_registry() -> Registry:
+    return _registry
+
+@contextmanager
+def stage(name: str):
+    """Chronomètre une étape : `with stage("embedding"): ...` → hrms_stage_seconds{stage=...}."""
+    if not settings.INSTRUMENTATION_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe("hrms_stage_seconds", time.perf_counter() - t0, stage=name)
+
+# --- HTTP ---------------------------------------------------------------------
+
+class TimingMiddleware:
+    """
+    Latence par route (motif d'URL, pas le chemin : cardinalité bornée), méthode et
+    statut. Si INSTRUMENTATION_PROFILE_SAMPLE > 0, une fraction des requêtes est
+    profilée (cProfile) et le profil est écrit quand la requête dépasse
+    INSTRUMENTATION_SLOW_REQUEST_S.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.INSTRUMENTATION_ENABLED:
+            return self.get_response(request)
+        profiler = None
+        if settings.INSTRUMENTATION_PROFILE_SAMPLE and random.random() < settings.INSTRUMENTATION_PROFILE_SAMPLE:
+            profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+        elapsed = time.perf_counter() - t0
+
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match and match.route else "unmatched"
+        _registry.observe("hrms_http_request_seconds", elapsed,
+                          route=route, method=request.method, status=response.status_code)
+        if profiler and elapsed >= settings.INSTRUMENTATION_SLOW_REQUEST_S:
+            _dump_profile(profiler, f"{request.method}_{route}", elapsed)
+        return response
+
+def _dump_profile(profiler: cProfile.Profile, label: str, elapsed: float):
+    os.makedirs(settings.INSTRUMENTATION_PROFILE_DIR, exist_ok=True)
+    safe = "".join(c if c.isalnum() else "_" for c in label).strip("_")[:80]
+    path = os.path.join(settings.INSTRUMENTATION_PROFILE_DIR,
+                        f"{time.strftime('%Y%m%dT%H%M%S')}_{int(elapsed * 1000)}ms_{safe}_{os.getpid()}.prof")
+    profiler.dump_stats(path)
+
+def _authorized(request) -> bool:
+    token = settings.INSTRUMENTATION_METRICS_TOKEN
+    if token:
+        return request.META.get("HTTP_AUTHORIZATION", "") == f"Bearer {token}"
+    # sans jeton : accès local uniquement
+    return request.META.get("REMOTE_ADDR") in ("127.0.0.1", "::1")
+
+def metrics_view(request):
+    """Endpoint interne (hors /api) : métriques du process qui répond, format texte Prometheus."""
+    if not _authorized(request):
+        return HttpResponseForbidden()
+    return HttpResponse(_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+# --- Celery -------------------------------------------------------------------
+
+_PUBLISHED_HEADER = "hrms_published_at"
+_started: Dict[str, float] = {}
+
+def _before_publish(headers=None, **kwargs):
+    if headers is not None:
+        headers[_PUBLISHED_HEADER] = time.time()
+
+def _task_prerun(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.perf_counter()
+    request = getattr(task, "request", None)
+    published = getattr(request, _PUBLISHED_HEADER, None) or (getattr(request, "headers", None) or {}).get(_PUBLISHED_HEADER)
+    if published and not getattr(request, "is_eager", False):
+        _registry.observe("hrms_celery_queue_wait_seconds", max(0.0, time.time() - float(published)), task=task.name)
+
+def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+    t0 = _started.pop(task_id, None)
+    if t0 is not None:
+        _registry.observe("hrms_celery_task_seconds", time.perf_counter() - t0, task=task.name, state=state or "")
+
+def connect_celery_signals():
+    from celery.signals import before_task_publish, task_prerun, task_postrun
+
+    before_task_publish.connect(_before_publish, weak=False)
+    task_prerun.connect(_task_prerun, weak=False)
+    task_postrun.connect(_task_postrun, weak=False)
+
+def serve_worker_metrics(port: int) -> Optional[threading.Thread]:
+    """
+    Expose les métriques d'un process worker sur http://<hôte>:<port>/metrics
+    (thread démon). Chaque enfant du pool prefork a son propre port. Même règle que
+    metrics_view : sans INSTRUMENTATION_METRICS_TOKEN, écoute sur la boucle locale seulement.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            token = settings.INSTRUMENTATION_METRICS_TOKEN
+            if token and self.headers.get("Authorization", "") != f"Bearer {token}":
+                self.send_response(403)
+                self.end_headers()
+                return
+            body = _registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    try:
+        host = "0.0.0.0" if settings.INSTRUMENTATION_METRICS_TOKEN else "127.0.0.1"
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError:
+        return None
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,96 @@
+# hrms_backend/listing.py
+# Listes paginées par curseur (keyset sur _id) et projection ?fields=a,b,c
+from bson import ObjectId
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from hrms_backend.mongo import heavy_reads
+
+class KeysetPagination(BasePagination):
+    """
+    Pagination keyset sur _id décroissant (ObjectId ~ ordre de création) :
+    `?cursor=<dernier id reçu>&page_size=50`. Pas de skip/count : coût constant
+    quelle que soit la page, via l'index _id.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+
+    def _page_size(self, request) -> int:
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self._page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            if not ObjectId.is_valid(cursor):
+                raise ValidationError({self.cursor_query_param: "Curseur invalide"})
+            queryset = queryset.filter(id__lt=ObjectId(cursor))
+
+        items = list(heavy_reads(queryset).order_by("-id")[: size + 1])
+        self.has_next = len(items) > size
+        items = items[:size]
+        self.next_cursor = str(items[-1].pk) if self.has_next else None
+        return items
+
+    def get_paginated_response(self, data):
+        next_url = None
+        if self.next_cursor:
+            next_url = replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+        return Response({"next": next_url, "next_cursor": self.next_cursor, "results": data})
+
+class LazyQuerySet:
+    """
+    `queryset = LazyQuerySet(lambda: Doc.objects...)` : le QuerySet n'est construit qu'à
+    la requête. `Doc.objects` évalué à la définition de la classe ouvrirait la connexion
+    Mongo dès l'import des urls (avant le fork gunicorn, cf. hrms_backend.mongo).
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __get__(self, instance, owner=None):
+        return self if instance is None else self.factory()
+
+class FieldsProjectionMixin:
+    """
+    `?fields=a,b,c` sur list/retrieve : ne charge que ces champs depuis Mongo
+    (QuerySet.only) et ne sérialise qu'eux. `id` est toujours renvoyé.
+    """
+    fields_query_param = "fields"
+    projected_actions = ("list", "retrieve")
+
+    def requested_fields(self):
+        request = getattr(self, "request", None)
+        if request is None or self.action not in self.projected_actions:
+            return None
+        raw = request.query_params.get(self.fields_query_param)
+        if not raw:
+            return None
+        return {f.strip() for f in raw.split(",") if f.strip()} | {"id"}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.requested_fields()
+        if fields:
+            known = [f for f in fields if f in queryset._document._fields]
+            queryset = queryset.only(*known)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.requested_fields()
+        if fields:
+            target = getattr(serializer, "child", serializer)
+            for name in list(target.fields):
+                if name not in fields:
+                    target.fields.pop(name)
+        return serializer
@@ -0,0 +1,86 @@
+# hrms_backend/mongo.py
+# Cycle de vie de la connexion MongoDB : enregistrée au démarrage, créée au premier
+# accès (donc après le fork gunicorn/Celery), oubliée dans les process enfants,
+# fermée proprement à l'arrêt.
+import atexit
+import os
+
+import certifi
+from django.conf import settings
+from mongoengine import connection as me_connection
+from mongoengine.base import _document_registry
+from pymongo import ReadPreference
+
+ALIAS = "default"
+
+_READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+_configured = False
+
+def client_options() -> dict:
+    """Options pymongo lues dans la configuration (pool, délais, TLS, nom d'application)."""
+    options = {
+        "maxPoolSize": settings.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": settings.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": settings.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGO_SOCKET_TIMEOUT_MS or None,
+        "waitQueueTimeoutMS": settings.MONGO_WAIT_QUEUE_TIMEOUT_MS or None,
+        "appname": settings.MONGO_APPNAME,
+    }
+    if settings.MONGO_TLS:
+        options.update(tls=True, tlsCAFile=certifi.where())
+    return {k: v for k, v in options.items() if v is not None}
+
+def configure():
+    """
+    Enregistre la connexion sans la créer : mongoengine ouvre le MongoClient au
+    premier accès, dans le process qui l'utilise. Idempotent.
+    """
+    global _configured
+    if _configured:
+        return
+    me_connection.register_connection(ALIAS, db=settings.MONGO_DB, host=settings.MONGO_URI, **client_options())
+    if hasattr(os, "register_at_fork"):
+        os.register_at_fork(after_in_child=_forget_clients)
+    atexit.register(shutdown)
+    _configured = True
+
+def _forget_clients():
+    """
+    Process enfant : abandonne (sans les fermer, les sockets appartiennent au parent)
+    les clients hérités ; le prochain accès en recrée un propre à ce process.
+    """
+    me_connection._connections.clear()
+    me_connection._dbs.clear()
+    for document in _document_registry.values():
+        if "_collection" in document.__dict__:
+            document._collection = None
+
+def shutdown():
+    """Ferme les clients du process courant (arrêt d'un worker gunicorn/Celery)."""
+    for alias in list(me_connection._connections):
+        me_connection.disconnect(alias)
+
+def heavy_read_preference():
+    return _READ_PREFERENCES.get(settings.MONGO_HEAVY_READ_PREFERENCE, ReadPreference.PRIMARY)
+
+def heavy_reads(target):
+    """
+    Lectures lourdes tolérant un léger retard de réplication (métriques, top, listes) :
+    applique MONGO_HEAVY_READ_PREFERENCE à un QuerySet ou à une collection pymongo.
+    Les écritures et lectures suivant une écriture restent sur le primaire.
+    """
+    preference = heavy_read_preference()
+    if preference is ReadPreference.PRIMARY:
+        return target
+    if hasattr(target, "read_preference") and callable(target.read_preference):
+        return target.read_preference(preference)
+    return target.with_options(read_preference=preference)
@@ -0,0 +1,95 @@
+# hrms_backend/serializers.py
+# Sérialiseurs de lecture "légers" : références résolues par lot ($in), sans N+1
+from bson import DBRef
+from mongoengine import Document
+from rest_framework import serializers
+
+def reference_id(value):
+    """Id brut d'une référence telle que stockée dans `_data` (ObjectId, DBRef ou document déjà chargé)."""
+    if isinstance(value, Document):
+        return value.pk
+    if isinstance(value, DBRef):
+        return value.id
+    return value
+
+class ReferenceSummaryField(serializers.Field):
+    """
+    Référence rendue en résumé compact {"id", <champs>} sans déréférencement par ligne :
+    l'id est lu dans `_data` et le résumé pris dans le lot préchargé par le sérialiseur.
+    Référence supprimée : {"id"} seul.
+    """
+
+    def __init__(self, document, fields, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+        self.document = document
+        self.summary_fields = tuple(fields)
+
+    def get_attribute(self, instance):
+        return reference_id(instance._data.get(self.source))
+
+    def to_representation(self, value):
+        summary = self.parent._summaries.get(self.field_name, {}).get(value)
+        return summary if summary is not None else {"id": str(value)}
+
+    def fetch(self, ids):
+        rows = self.document._get_collection().find(
+            {"_id": {"$in": list(ids)}}, {name: 1 for name in self.summary_fields})
+        return {
+            row["_id"]: {"id": str(row["_id"]), **{name: row.get(name) for name in self.summary_fields}}
+            for row in rows
+        }
+
+class BatchedReferenceListSerializer(serializers.ListSerializer):
+    """Précharge les références de toute la page (une requête $in par champ) avant de sérialiser."""
+
+    def to_representation(self, data):
+        items = list(data)
+        self.child.prefetch(items)
+        try:
+            return [self.child.to_representation(item) for item in items]
+        finally:
+            self.child._summaries = None
+
+class LeanReadSerializer(serializers.Serializer):
+    """
+    Sérialiseur de lecture à champs explicites (pas d'introspection DocumentSerializer).
+    Les ReferenceSummaryField sont résolus par lot : `many=True` → une requête par
+    champ de référence pour toute la page, instance seule → une requête par champ.
+    Les champs retirés par ?fields= ne sont pas chargés.
+    """
+    _summaries = None
+
+    class Meta:
+        list_serializer_class = BatchedReferenceListSerializer
+
+    def prefetch(self, instances):
+        self._summaries = {}
+        for name, field in self.fields.items():
+            if not isinstance(field, ReferenceSummaryField):
+                continue
+            ids = {field.get_attribute(inst) for inst in instances} - {None}
+            self._summaries[name] = field.fetch(ids) if ids else {}
+
+    def to_representation(self, instance):
+        if self._summaries is not None:
+            return super().to_representation(instance)
+        self.prefetch([instance])
+        try:
+            return super().to_representation(instance)
+        finally:
+            self._summaries = None
+
+class ObjectIdStrField(serializers.Field):
+    """ObjectId (ou fichier GridFS) rendu en chaîne."""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        value = instance._data.get(self.source)
+        return getattr(value, "grid_id", value)
+
+    def to_representation(self, value):
+        return str(value)
@@ -19,6 +19,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "hrms_backend.instrumentation.TimingMiddleware",   # en premier : latence complète de la requête
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",  
@@ -46,19 +47,110 @@ EMAIL_HOST_PASSWORD = os.getenv("EMAIL_HOST_PASSWORD")
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "true").lower() == "true"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
 
+# Notifications en masse : lots envoyés sur une seule connexion SMTP
+NOTIFICATIONS_BULK_MAX = int(os.getenv("NOTIFICATIONS_BULK_MAX", "5000"))           # notifications par requête
+NOTIFICATIONS_BATCH_SIZE = int(os.getenv("NOTIFICATIONS_BATCH_SIZE", "100"))        # messages par connexion
+NOTIFICATIONS_MAX_PER_MINUTE = int(os.getenv("NOTIFICATIONS_MAX_PER_MINUTE", "0"))  # 0 = pas de limite
+NOTIFICATIONS_CLAIM_TIMEOUT_S = int(os.getenv("NOTIFICATIONS_CLAIM_TIMEOUT_S", "600"))  # lot abandonné (worker mort)
+
+# Instrumentation (hrms_backend.instrumentation) : histogrammes par process, /internal/metrics
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "true").lower() == "true"
+INSTRUMENTATION_METRICS_TOKEN = os.getenv("INSTRUMENTATION_METRICS_TOKEN", "")   # vide = accès local uniquement
+INSTRUMENTATION_WORKER_PORT = int(os.getenv("INSTRUMENTATION_WORKER_PORT", "0"))  # 0 = pas d'endpoint worker ; sinon port + index du process (127.0.0.1 sans jeton)
+INSTRUMENTATION_PROFILE_SAMPLE = float(os.getenv("INSTRUMENTATION_PROFILE_SAMPLE", "0"))   # fraction de requêtes profilées
+INSTRUMENTATION_SLOW_REQUEST_S = float(os.getenv("INSTRUMENTATION_SLOW_REQUEST_S", "1.0"))
+INSTRUMENTATION_PROFILE_DIR = os.getenv("INSTRUMENTATION_PROFILE_DIR", os.path.join("var", "profiles"))
+
+# GET conditionnels (ETag/Last-Modified) et cache Redis des corps JSON (hrms_backend.http_cache)
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_REDIS = os.getenv("HTTP_CACHE_REDIS", "false").lower() == "true"
+HTTP_CACHE_TTL = int(os.getenv("HTTP_CACHE_TTL", "300"))   # filet de sécurité : l'invalidation est explicite
+
 # MongoEngine
 MONGO_URI = os.getenv("MONGO_URI")
 MONGO_DB = os.getenv("MONGO_DB", "hrms")
+# Pool par process (hrms_backend.mongo) : à ajuster par type de process (api / worker) via l'env
+MONGO_TLS = os.getenv("MONGO_TLS", "true").lower() == "true"
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))        # 0 = pas de limite
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))  # 0 = attente illimitée d'une connexion du pool
+MONGO_APPNAME = os.getenv("MONGO_APPNAME", "hrms")
+# métriques, top, listes : "secondaryPreferred" pour décharger le primaire (replica set)
+MONGO_HEAVY_READ_PREFERENCE = os.getenv("MONGO_HEAVY_READ_PREFERENCE", "primary")
 
 # JWT
 JWT_SECRET = os.getenv("JWT_SECRET", "unsafe-jwt")
 JWT_ALGO = os.getenv("JWT_ALGO", "HS256")
 JWT_EXPIRE_MIN = int(os.getenv("JWT_EXPIRE_MIN", "60"))
+# GET/HEAD/OPTIONS : utilisateur reconstruit depuis les claims uid/role/email, sans lecture Mongo
+# (un changement de rôle ou une désactivation n'est alors visible qu'à l'expiration du token)
+JWT_TRUST_CLAIMS_SAFE_METHODS = os.getenv("JWT_TRUST_CLAIMS_SAFE_METHODS", "false").lower() == "true"
+
+# Cache des utilisateurs authentifiés (accounts.cache)
+AUTH_PRINCIPAL_CACHE_TTL = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60"))
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "10000"))
+AUTH_PRINCIPAL_CACHE_REDIS = os.getenv("AUTH_PRINCIPAL_CACHE_REDIS", "false").lower() == "true"
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
+# Candidatures
+APPLICATIONS_MAX_CV_BYTES = int(os.getenv("APPLICATIONS_MAX_CV_BYTES", str(10 * 1024 * 1024)))   # taille max d'un CV
+APPLICATIONS_IMPORT_MAX_FILES = int(os.getenv("APPLICATIONS_IMPORT_MAX_FILES", "1000"))   # CV par import en masse
+APPLICATIONS_IMPORT_MAX_BYTES = int(os.getenv("APPLICATIONS_IMPORT_MAX_BYTES", str(500 * 1024 * 1024)))   # taille max d'une archive
+APPLICATIONS_IMPORT_BATCH_SIZE = int(os.getenv("APPLICATIONS_IMPORT_BATCH_SIZE", "50"))   # insert_many et tâche de traitement
+# import resté en "storing" sans nouveau fichier ingéré depuis ce délai : requête interrompue, run clos en échec
+APPLICATIONS_IMPORT_STALE_S = float(os.getenv("APPLICATIONS_IMPORT_STALE_S", "300"))
+APPLICATIONS_IMPORT_SWEEP_EVERY_S = float(os.getenv("APPLICATIONS_IMPORT_SWEEP_EVERY_S", "60"))
+
+# Extraction de texte (applications.extraction) : pool de processus, limites par document
+EXTRACTION_POOL_WORKERS = int(os.getenv("EXTRACTION_POOL_WORKERS", "2"))   # 0 = extraction en ligne
+EXTRACTION_TIMEOUT_S = float(os.getenv("EXTRACTION_TIMEOUT_S", "20"))
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "50"))
+EXTRACTION_MAX_BYTES = int(os.getenv("EXTRACTION_MAX_BYTES", str(APPLICATIONS_MAX_CV_BYTES)))
+EXTRACTION_PARALLEL_PAGES = int(os.getenv("EXTRACTION_PARALLEL_PAGES", "20"))   # seuil d'extraction parallèle
+
+# IA
+AI_ENCODE_BATCH_SIZE = int(os.getenv("AI_ENCODE_BATCH_SIZE", "32"))   # taille des mini-batchs d'encodage
+AI_EMBEDDING_CACHE_SIZE = int(os.getenv("AI_EMBEDDING_CACHE_SIZE", "4096"))   # LRU en mémoire (par process)
+AI_WRITE_BATCH_SIZE = int(os.getenv("AI_WRITE_BATCH_SIZE", "500"))   # taille des bulk_write de résultats
+AI_RUN_CHUNK_SIZE = int(os.getenv("AI_RUN_CHUNK_SIZE", "50"))   # candidatures par tâche en mode async
+AI_EMBEDDING_STORE = os.getenv("AI_EMBEDDING_STORE", "true").lower() == "true"   # persistance Mongo `embeddings`
+AI_CHUNK_WORDS = int(os.getenv("AI_CHUNK_WORDS", "150"))   # mots par section de CV (~256 tokens MiniLM)
+AI_CHUNK_AGGREGATION = os.getenv("AI_CHUNK_AGGREGATION", "topk_mean")   # max | topk_mean
+AI_CHUNK_TOPK = int(os.getenv("AI_CHUNK_TOPK", "3"))
+AI_BACKEND = os.getenv("AI_BACKEND", "torch")   # torch | quantized (int8) | stub
+AI_WARMUP_WORKER = os.getenv("AI_WARMUP_WORKER", "true").lower() == "true"   # worker_process_init Celery
+AI_WARMUP_WEB = os.getenv("AI_WARMUP_WEB", "false").lower() == "true"   # post_fork gunicorn (gunicorn.conf.py)
+# Rôle du process : "web" (gunicorn.conf.py) ne charge jamais le modèle, l'encodage part sur les workers
+PROCESS_ROLE = os.getenv("PROCESS_ROLE", "all")   # web | worker | all
+AI_EMBEDDING_MODE = os.getenv("AI_EMBEDDING_MODE", "celery" if PROCESS_ROLE == "web" else "local")   # local | server | celery
+AI_ENCODE_QUEUE = os.getenv("AI_ENCODE_QUEUE", "celery")   # file de la tâche ai.encode (mode celery)
+AI_ENCODE_TASK_TIMEOUT_S = float(os.getenv("AI_ENCODE_TASK_TIMEOUT_S", "30"))   # par tâche ai.encode (un mini-batch)
+# Serveur d'embeddings partagé (python manage.py run_embedding_server)
+AI_EMBEDDING_SERVER_URL = os.getenv("AI_EMBEDDING_SERVER_URL", REDIS_URL)
+AI_EMBEDDING_QUEUE = os.getenv("AI_EMBEDDING_QUEUE", "ai:embed")
+AI_EMBEDDING_SERVER_MAX_BATCH = int(os.getenv("AI_EMBEDDING_SERVER_MAX_BATCH", "128"))   # textes par micro-batch
+AI_EMBEDDING_SERVER_MAX_WAIT_MS = float(os.getenv("AI_EMBEDDING_SERVER_MAX_WAIT_MS", "10"))   # budget de latence
+AI_EMBEDDING_SERVER_TIMEOUT_S = float(os.getenv("AI_EMBEDDING_SERVER_TIMEOUT_S", "30"))
+AI_SKILLS_TAXONOMY = os.getenv("AI_SKILLS_TAXONOMY", str(BASE_DIR / "ai" / "data" / "skills.json"))
+AI_SKILL_EXTRACTOR = os.getenv("AI_SKILL_EXTRACTOR", "ai.skills.TrieRegexExtractor")
+AI_INDEX_DIR = os.getenv("AI_INDEX_DIR", str(BASE_DIR / "var" / "index"))   # index vectoriels (.npy, mmap) ; volume partagé api/worker
+AI_INDEX_COMPACT_EVERY = int(os.getenv("AI_INDEX_COMPACT_EVERY", "1000"))   # opérations journalisées avant fusion dans l'instantané
+
+# Analytics
+ANALYTICS_MATERIALIZED_STATS = os.getenv("ANALYTICS_MATERIALIZED_STATS", "false").lower() == "true"   # compteurs O(1) pour /metrics/
+ANALYTICS_ROLLUPS = os.getenv("ANALYTICS_ROLLUPS", "true").lower() == "true"   # séries quotidiennes daily_stats
+ANALYTICS_ROLLUP_RECONCILE_DAYS = int(os.getenv("ANALYTICS_ROLLUP_RECONCILE_DAYS", "7"))   # jours recalés par la tâche beat
+ANALYTICS_ROLLUP_RECONCILE_EVERY_S = float(os.getenv("ANALYTICS_ROLLUP_RECONCILE_EVERY_S", "3600"))
+ANALYTICS_ROLLUP_MAX_DAYS = int(os.getenv("ANALYTICS_ROLLUP_MAX_DAYS", "366"))   # fenêtre maximale d'une requête
 
 # Celery
-CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
-CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
 CELERY_TASK_ALWAYS_EAGER = False   # True pour déboguer sans worker
 CELERY_TIMEZONE = "UTC"
 CELERY_TASK_SERIALIZER = "json"
@@ -66,3 +158,13 @@ CELERY_RESULT_SERIALIZER = "json"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_ACKS_LATE = True
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_BEAT_SCHEDULE = {
+    "analytics-reconcile-rollups": {
+        "task": "analytics.reconcile_rollups",
+        "schedule": ANALYTICS_ROLLUP_RECONCILE_EVERY_S,
+    },
+    "applications-sweep-import-runs": {
+        "task": "applications.sweep_import_runs",
+        "schedule": APPLICATIONS_IMPORT_SWEEP_EVERY_S,
+    },
+}
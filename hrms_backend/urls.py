@@ -1,4 +1,5 @@
 from django.urls import path, include
+from hrms_backend.instrumentation import metrics_view
 
 urlpatterns = [
     path("api/accounts/", include("accounts.urls")),
@@ -6,4 +7,6 @@ urlpatterns = [
     path("api/applications/", include("applications.urls")),
     path("api/notifications/", include("notifications.urls")),  
     path("api/analytics/", include("analytics.urls")),
+    path("api/ai/", include("ai.urls")),
+    path("internal/metrics", metrics_view),   # Prometheus, hors API publique
 ]
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from jobs.models import Job
+
+class Command(BaseCommand):
+    help = "Renseigne updated_at (= created_at) des offres créées avant l'ajout du champ (validateurs HTTP)."
+
+    def handle(self, *args, **opts):
+        res = Job._get_collection().update_many({"updated_at": {"$exists": False}}, [{"$set": {"updated_at": "$created_at"}}])
+        self.stdout.write(self.style.SUCCESS(f"{res.modified_count} offre(s) mise(s) à jour"))
@@ -1,7 +1,13 @@
 import datetime as dt
 from mongoengine import Document, StringField, DateTimeField, ListField
 class Job(Document):
-    meta = {'collection':'jobs'}
+    meta = {
+        'collection': 'jobs',
+        'indexes': [
+            {'fields': ['status', '-created_at']},
+            'department',
+        ],
+    }
     title = StringField(required=True)
     description = StringField()
     location = StringField()
@@ -9,4 +15,11 @@ class Job(Document):
     seniority = StringField()  # junior/mid/senior
     required_skills = ListField(StringField())
     created_at = DateTimeField(default=dt.datetime.utcnow)
+    # ETag / Last-Modified (hrms_backend.http_cache) ; posé par save(), sans défaut : une offre
+    # antérieure au champ retombe sur created_at au lieu de "maintenant" à chaque lecture
+    updated_at = DateTimeField(null=True)
     status = StringField(default='open')  # open/closed
+
+    def save(self, *args, **kwargs):
+        self.updated_at = dt.datetime.utcnow()
+        return super().save(*args, **kwargs)
@@ -1,6 +1,20 @@
+from rest_framework import serializers as drf_serializers
 from rest_framework_mongoengine import serializers
+from hrms_backend.serializers import LeanReadSerializer
 from .models import Job
 class JobSerializer(serializers.DocumentSerializer):
     class Meta:
         model = Job
         fields = '__all__'
+
+class JobReadSerializer(LeanReadSerializer):
+    id = drf_serializers.CharField(read_only=True)
+    title = drf_serializers.CharField(read_only=True)
+    description = drf_serializers.CharField(read_only=True)
+    location = drf_serializers.CharField(read_only=True)
+    department = drf_serializers.CharField(read_only=True)
+    seniority = drf_serializers.CharField(read_only=True)
+    required_skills = drf_serializers.ListField(child=drf_serializers.CharField(), read_only=True)
+    created_at = drf_serializers.DateTimeField(read_only=True)
+    updated_at = drf_serializers.DateTimeField(read_only=True)
+    status = drf_serializers.CharField(read_only=True)
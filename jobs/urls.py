@@ -2,13 +2,19 @@ from django.urls import path
 from .views import JobViewSet
 
 job_list = JobViewSet.as_view({"get": "list", "post": "create"})
-job_detail = JobViewSet.as_view({"get": "retrieve"})
+job_detail = JobViewSet.as_view({"get": "retrieve", "put": "update", "patch": "partial_update"})
 job_analyze = JobViewSet.as_view({"post": "analyze_applications"})
 job_top = JobViewSet.as_view({"get": "top"})
+job_analysis_run = JobViewSet.as_view({"get": "analysis_run"})
+job_import = JobViewSet.as_view({"post": "import_cvs"})
+job_import_run = JobViewSet.as_view({"get": "import_run"})
 
 urlpatterns = [
     path("", job_list, name="jobs-list"),
     path("<str:id>/", job_detail, name="jobs-detail"),         # lookup "id"
     path("<str:id>/analyze/", job_analyze, name="job-analyze"),# déclenche l’analyse de toutes les applications
     path("<str:id>/top/", job_top, name="job-top"),            # récupère le Top 5 (scores déjà calculés)
+    path("<str:id>/analyze/runs/<str:run_id>/", job_analysis_run, name="job-analysis-run"),  # progression d'une analyse async
+    path("<str:id>/import/", job_import, name="job-import"),   # import en masse de CV (ZIP / fichiers multiples)
+    path("<str:id>/imports/<str:run_id>/", job_import_run, name="job-import-run"),  # suivi par fichier d'un import
 ]
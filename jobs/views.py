@@ -1,60 +1,203 @@
+from django.conf import settings
+from django.http import Http404
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from bson import ObjectId
+from hrms_backend.http_cache import cached_response, invalidate, job_scope, top_scope
+from hrms_backend.instrumentation import stage
+from hrms_backend.mongo import heavy_reads
+from hrms_backend.listing import KeysetPagination, FieldsProjectionMixin, LazyQuerySet
 from .models import Job
-from .serializers import JobSerializer
-from applications.models import Application
+from .serializers import JobSerializer, JobReadSerializer
+from applications.imports import ImportRejected, ingest
+from applications.models import Application, ImportRun
+from applications.tasks import process_import_batch_task
 from applications.serializers import ApplicationReadSerializer
-from applications.utils import extract_text_from_bytes
-from ai.service import analyze_text
+from ai.models import AnalysisRun
+from ai.tasks import (
+    analyze_and_save, analysis_fingerprint, stale_applications, start_analysis_run, index_job_task, rescore_job_task,
+)
 
-class JobViewSet(viewsets.ModelViewSet):
+def _truthy(value) -> bool:
+    return str(value).lower() in ("1", "true", "yes")
+
+def _run_payload(run: AnalysisRun) -> dict:
+    done = run.processed + run.failed
+    return {
+        "run_id": str(run.id),
+        "job_id": str(run.job.id),
+        "status": run.status,
+        "total": run.total,
+        "processed": run.processed,
+        "failed": run.failed,
+        "skipped": run.skipped,
+        "progress": round(100.0 * done / run.total, 1) if run.total else 100.0,
+        "elapsed_s": round(run.elapsed(), 2),
+        "throughput_per_s": run.throughput(),
+        "top": run.top if run.status == "done" else [],
+    }
+
+def _import_payload(run: ImportRun, with_files: bool = True) -> dict:
+    done = run.processed + run.failed
+    ingest_s = run.ingest_seconds() if run.stored_at else 0.0
+    payload = {
+        "import_id": str(run.id),
+        "job_id": str(run.job.id),
+        "status": run.status,
+        "analyze": run.analyze,
+        "total": run.total,
+        "queued": run.queued,
+        "rejected": run.rejected,
+        "processed": run.processed,
+        "failed": run.failed,
+        "progress": round(100.0 * done / run.queued, 1) if run.queued else 100.0,
+        "bytes": run.bytes,
+        "ingest_s": round(ingest_s, 2),
+        "ingest_files_per_s": round(run.total / ingest_s, 2) if ingest_s else 0.0,   # fichiers lus (refusés compris)
+        "ingest_mb_per_s": round(run.bytes / (1024 * 1024) / ingest_s, 2) if ingest_s else 0.0,
+        "elapsed_s": round(run.elapsed(), 2),
+        "throughput_per_s": run.throughput(),
+    }
+    if with_files:
+        payload["files"] = run.files
+    return payload
+
+def _job_validators(job_id):
+    """(empreinte, dernière modification) d'une offre, sans la charger."""
+    if not ObjectId.is_valid(job_id):
+        return None
+    job = heavy_reads(Job.objects(id=job_id)).only("updated_at", "created_at").first()
+    if not job:
+        return None
+    modified = job.updated_at or job.created_at
+    return modified.isoformat(), modified
+
+def _top_validators(job_id):
+    """Le top change si l'offre, une de ses candidatures (updated_at) ou leur nombre change."""
+    found = _job_validators(job_id)
+    if not found:
+        return None
+    apps = heavy_reads(Application.objects(job=job_id))
+    last = apps.order_by("-updated_at").only("updated_at").first()   # index (job, -updated_at)
+    modified = max(found[1], last.updated_at) if last and last.updated_at else found[1]
+    return f"{apps.count()}:{modified.isoformat()}", modified
+
+class JobViewSet(FieldsProjectionMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     lookup_field = "id"
     lookup_url_kwarg = "id"               # ⬅️ très important
-    queryset = Job.objects
+    queryset = LazyQuerySet(lambda: Job.objects)
     serializer_class = JobSerializer
+    pagination_class = KeysetPagination
+
+    def get_serializer_class(self):
+        return JobReadSerializer if self.action in ("list", "retrieve") else JobSerializer
+
+    def get_object(self):
+        # get_object de DRF suppose un QuerySet Django (queryset.model) : offre absente → 500
+        job_id = self.kwargs[self.lookup_url_kwarg]
+        job = self.get_queryset().filter(id=job_id).first() if ObjectId.is_valid(job_id) else None
+        if job is None:
+            raise Http404
+        self.check_object_permissions(self.request, job)
+        return job
+
+    def perform_create(self, serializer):
+        job = serializer.save()
+        index_job_task.delay(str(job.id))
+
+    def retrieve(self, request, *args, **kwargs):
+        # interrogé en boucle par l'UI : 304 si inchangé, corps éventuellement servi depuis Redis
+        job_id = kwargs.get("id")
+        return cached_response(request, job_scope(job_id), lambda: _job_validators(job_id),
+                               lambda: super(JobViewSet, self).retrieve(request, *args, **kwargs).data)
+
+    def perform_update(self, serializer):
+        old_description = serializer.instance.description
+        job = serializer.save()
+        invalidate(job_scope(job.id), top_scope(job.id))   # le top embarque le résumé de l'offre
+        index_job_task.delay(str(job.id))
+        if job.description != old_description:
+            rescore_job_task.delay(str(job.id))   # seul le vecteur de l'offre est recalculé
 
     @action(detail=True, methods=["post"])
     def analyze_applications(self, request, id=None):
         job = self.get_object()
-        apps = list(Application.objects(job=job))  # toutes les candidatures de cette offre
-
-        scored = []
-        for app in apps:
-            # 1) Récupérer le texte du CV
-            cv_text = ""
-            if app.cv_file:
-                try:
-                    data = app.cv_file.read()
-                    filename = getattr(app.cv_file, "filename", "cv.pdf")
-                    cv_text = extract_text_from_bytes(data, filename)
-                except Exception:
-                    cv_text = ""
-
-            # 2) Analyser (embeddings + extractions)
-            result = analyze_text(cv_text, job.description or "")
-            app.extracted_skills = result["skills"]
-            app.extracted_education = result["education"]
-            app.extracted_experience = result["experience"]
-            app.score = float(result["score"])
-            app.recommendations = result["recommendations"]
-            app.status = "reviewing"
-            app.save()
-            scored.append(app)
-
-        # 3) Top 5
-        top5 = sorted(scored, key=lambda a: a.score, reverse=True)[:5]
+        # force=1 : tout réanalyser, même les candidatures dont l'empreinte est à jour
+        force = _truthy(request.query_params.get("force", request.data.get("force", "")))
+
+        # Mode asynchrone : 202 + id de run, l'analyse part en chunks sur les workers
+        if _truthy(request.query_params.get("async", request.data.get("async", ""))):
+            try:
+                chunk_size = int(request.data.get("chunk_size") or settings.AI_RUN_CHUNK_SIZE)
+            except (TypeError, ValueError):
+                return Response({"detail": "chunk_size doit être un entier"}, status=status.HTTP_400_BAD_REQUEST)
+            run = start_analysis_run(job, chunk_size=max(chunk_size, 1), force=force)
+            return Response(_run_payload(run), status=status.HTTP_202_ACCEPTED)
+
+        with stage("load"):
+            # seulement les candidatures périmées (index job + analysis_fp)
+            apps = list(stale_applications(job, analysis_fingerprint(job.description or ""), force))
+            total = Application.objects(job=job).count() if not force else len(apps)
+
+        # 1) Texte des CV + 2) analyse batch (offre encodée une seule fois) + écriture groupée
+        errors = analyze_and_save(apps, job.description or "") if apps else {}
+
+        # 3) Top 5 (candidatures sautées comprises)
+        top5 = Application.objects(job=job).exclude(*Application.HEAVY_FIELDS).order_by("-score")[:5]   # index (job, -score)
+        with stage("serialize"):
+            top5_data = ApplicationReadSerializer(top5, many=True).data
         return Response({
             "job_id": str(job.id),
-            "count_analyzed": len(scored),
-            "top5": ApplicationReadSerializer(top5, many=True).data
+            "count_analyzed": len(apps) - len(errors),
+            "count_skipped": max(total - len(apps), 0),
+            "errors": errors,
+            "top5": top5_data,
         }, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=["post"])
+    def import_cvs(self, request, id=None):
+        """
+        Import en masse (multipart, champ `files` : un ou plusieurs ZIP et/ou CV) :
+        CV stockés et candidatures créées pendant la requête, extraction + analyse
+        par lots en tâche de fond. 202 + suivi par fichier (imports/<import_id>/).
+        """
+        job = self.get_object()
+        files = request.FILES.getlist("files")
+        if not files:
+            return Response({"detail": "champ multipart `files` attendu (ZIP ou CV)"}, status=status.HTTP_400_BAD_REQUEST)
+        analyze = str(request.data.get("analyze", "true")).lower() not in ("0", "false", "no")
+        try:
+            run, batches = ingest(job, files, user=request.user if getattr(request.user, "pk", None) else None, analyze=analyze)
+        except ImportRejected as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        for batch in batches:
+            process_import_batch_task.delay(str(run.id), batch)
+        return Response(_import_payload(run.reload()), status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=["get"])
+    def import_run(self, request, id=None, run_id=None):
+        job = self.get_object()
+        run = ImportRun.objects(id=run_id, job=job).first() if ObjectId.is_valid(run_id) else None
+        if not run:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_import_payload(run, with_files=_truthy(request.query_params.get("files", "1"))), status=200)
+
     @action(detail=True, methods=["get"])
     def top(self, request, id=None):
+        def build():
+            job = self.get_object()
+            apps = heavy_reads(Application.objects(job=job)).exclude(*Application.HEAVY_FIELDS).order_by("-score")[:5]   # index (job, -score)
+            return ApplicationReadSerializer(apps, many=True).data
+        return cached_response(request, top_scope(id), lambda: _top_validators(id), build)
+
+    @action(detail=True, methods=["get"])
+    def analysis_run(self, request, id=None, run_id=None):
         job = self.get_object()
-        apps = Application.objects(job=job).order_by("-score")[:5]
-        return Response(ApplicationReadSerializer(apps, many=True).data, status=200)
+        run = AnalysisRun.objects(id=run_id, job=job).first() if ObjectId.is_valid(run_id) else None
+        if not run:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(_run_payload(run), status=200)
@@ -2,7 +2,7 @@ from datetime import datetime
 from mongoengine import Document, StringField, EmailField, ReferenceField, DateTimeField
 from accounts.models import User  # si import croisé pose souci, importe localement dans la vue
 
-STATUS_CHOICES = ("pending", "queued", "sent", "failed")
+STATUS_CHOICES = ("pending", "queued", "sending", "sent", "failed")
 CHANNEL_CHOICES = ("email",)
 
 class Notification(Document):
@@ -18,6 +18,10 @@ class Notification(Document):
     updated_at = DateTimeField(default=datetime.utcnow)
     sent_at = DateTimeField(null=True)
 
+    # envoi par lots : lot qui a réservé la notification (status "sending")
+    claim_id = StringField(null=True)
+    claimed_at = DateTimeField(null=True)
+
     meta = {
         "collection": "notifications",
         "indexes": [
@@ -1,15 +1,21 @@
+from rest_framework import serializers as drf_serializers
 from rest_framework_mongoengine import serializers as me_serializers
+from accounts.models import User
+from hrms_backend.serializers import LeanReadSerializer, ReferenceSummaryField
 from .models import Notification
 
-class NotificationReadSerializer(me_serializers.DocumentSerializer):
-    class Meta:
-        model = Notification
-        fields = (
-            "id", "recipient", "recipient_email",
-            "subject", "message", "channel", "status",
-            "error", "created_at", "updated_at", "sent_at"
-        )
-        read_only_fields = fields
+class NotificationReadSerializer(LeanReadSerializer):
+    id = drf_serializers.CharField(read_only=True)
+    recipient = ReferenceSummaryField(User, ("full_name", "email"))
+    recipient_email = drf_serializers.CharField(read_only=True)
+    subject = drf_serializers.CharField(read_only=True)
+    message = drf_serializers.CharField(read_only=True)
+    channel = drf_serializers.CharField(read_only=True)
+    status = drf_serializers.CharField(read_only=True)
+    error = drf_serializers.CharField(read_only=True)
+    created_at = drf_serializers.DateTimeField(read_only=True)
+    updated_at = drf_serializers.DateTimeField(read_only=True)
+    sent_at = drf_serializers.DateTimeField(read_only=True)
 
 class NotificationWriteSerializer(me_serializers.DocumentSerializer):
     class Meta:
@@ -1,32 +1,135 @@
-from datetime import datetime
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Tuple
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection, send_mail
+from bson import ObjectId
+from pymongo import UpdateOne
 from django.conf import settings
 from .models import Notification
 
 @shared_task(name="notifications.send_email")
 def send_email_task(notification_id: str):
-    notif = Notification.objects(id=notification_id).first()
-    if not notif:
+    # réservation atomique queued -> sending : si un lot (send_batch) l'a déjà prise, rien à faire
+    if not ObjectId.is_valid(notification_id):
         return {"error": "notification_not_found"}
+    coll = Notification._get_collection()
+    now = datetime.utcnow()
+    claim_id = uuid.uuid4().hex
+    doc = coll.find_one_and_update(
+        {"_id": ObjectId(notification_id), "status": "queued"},
+        {"$set": {"status": "sending", "claim_id": claim_id, "claimed_at": now, "updated_at": now}},
+        projection={"recipient_email": 1, "subject": 1, "message": 1},
+    )
+    if not doc:
+        if not Notification.objects(id=notification_id).count():
+            return {"error": "notification_not_found"}
+        return {"ok": True, "skipped": True}   # déjà envoyée, ou réservée par un lot
 
     try:
         send_mail(
-            subject=notif.subject,
-            message=notif.message,
+            subject=doc["subject"],
+            message=doc["message"],
             from_email=getattr(settings, "DEFAULT_FROM_EMAIL", "no-reply@example.com"),
-            recipient_list=[notif.recipient_email],
+            recipient_list=[doc["recipient_email"]],
             fail_silently=False,
         )
-        notif.status = "sent"
-        notif.sent_at = datetime.utcnow()
-        notif.error = None
-        notif.touch()
-        notif.save()
-        return {"ok": True}
+        update, result = {"status": "sent", "sent_at": datetime.utcnow(), "error": None}, {"ok": True}
     except Exception as e:
-        notif.status = "failed"
-        notif.error = str(e)
-        notif.touch()
-        notif.save()
-        return {"error": str(e)}
+        update, result = {"status": "failed", "error": str(e)}, {"error": str(e)}
+    # statut écrit seulement si la réservation tient toujours (pas de save() complet)
+    coll.update_one({"_id": doc["_id"], "claim_id": claim_id},
+                    {"$set": {**update, "claim_id": None, "updated_at": datetime.utcnow()}})
+    return result
+
+# --- Envoi par lots ---------------------------------------------------------
+
+def claim_batch(batch_size: int) -> Tuple[str, List[dict]]:
+    """
+    Réserve jusqu'à `batch_size` notifications en attente (les plus anciennes d'abord,
+    via l'index (status, -created_at)) en les passant en "sending" avec un claim_id.
+    Les lots "sending" trop anciens (worker mort en cours d'envoi) sont repris.
+    Deux workers concurrents ne peuvent pas réserver la même notification.
+    Retourne (claim_id, notifications) : les écritures suivantes sont filtrées sur le
+    claim_id, un lot repris entre-temps par un autre worker n'est pas écrasé.
+    """
+    coll = Notification._get_collection()
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.NOTIFICATIONS_CLAIM_TIMEOUT_S)
+    claimable = {"$or": [
+        {"status": "queued"},
+        {"status": "sending", "claimed_at": {"$lt": stale}},
+    ]}
+    ids = [d["_id"] for d in coll.find(claimable, {"_id": 1}).sort("created_at", 1).limit(batch_size)]
+    if not ids:
+        return "", []
+    claim_id = uuid.uuid4().hex
+    coll.update_many(
+        {"$and": [{"_id": {"$in": ids}}, claimable]},
+        {"$set": {"status": "sending", "claim_id": claim_id, "claimed_at": now, "updated_at": now}},
+    )
+    return claim_id, list(coll.find({"claim_id": claim_id}, {"recipient_email": 1, "subject": 1, "message": 1}))
+
+def release_batch(claim_id: str, error: str, final: bool = False):
+    """Remet un lot réservé en file (ex. serveur SMTP injoignable), ou le passe en échec (final)."""
+    Notification._get_collection().update_many(
+        {"claim_id": claim_id, "status": "sending"},
+        {"$set": {"status": "failed" if final else "queued", "error": error, "claim_id": None,
+                  "updated_at": datetime.utcnow()}},
+    )
+
+@shared_task(name="notifications.send_batch", bind=True, max_retries=5)
+def send_batch_task(self, batch_size: int = None):
+    """
+    Envoie un lot de notifications en file sur une seule connexion SMTP réutilisée,
+    puis écrit les statuts par message en un bulk_write. Se relance tant qu'il reste
+    des notifications, en respectant NOTIFICATIONS_MAX_PER_MINUTE entre deux lots.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_BATCH_SIZE
+    started = time.monotonic()
+    claim_id, docs = claim_batch(batch_size)
+    if not docs:
+        return {"sent": 0, "failed": 0}
+
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None) or "no-reply@example.com"
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            # plus aucune relance prévue : un lot remis en file n'y serait plus repris
+            release_batch(claim_id, str(e), final=True)
+            return {"sent": 0, "failed": len(docs)}
+        release_batch(claim_id, str(e))
+        raise self.retry(exc=e, countdown=60)
+
+    ops, sent, failed, lost = [], 0, 0, 0
+    try:
+        for doc in docs:
+            msg = EmailMessage(doc["subject"], doc["message"], from_email, [doc["recipient_email"]], connection=connection)
+            now = datetime.utcnow()
+            try:
+                # un message à la fois pour un statut par destinataire ; la connexion reste ouverte
+                connection.send_messages([msg])
+                ops.append(UpdateOne({"_id": doc["_id"], "claim_id": claim_id}, {"$set": {
+                    "status": "sent", "sent_at": now, "error": None, "claim_id": None, "updated_at": now}}))
+                sent += 1
+            except Exception as e:
+                ops.append(UpdateOne({"_id": doc["_id"], "claim_id": claim_id}, {"$set": {
+                    "status": "failed", "error": str(e), "claim_id": None, "updated_at": now}}))
+                failed += 1
+    finally:
+        connection.close()
+        if ops:
+            # réservation perdue (lot repris après NOTIFICATIONS_CLAIM_TIMEOUT_S) : le statut
+            # appartient au worker qui l'a reprise
+            lost = len(ops) - Notification._get_collection().bulk_write(ops, ordered=False).matched_count
+
+    if len(docs) == batch_size:
+        countdown = 0.0
+        if settings.NOTIFICATIONS_MAX_PER_MINUTE:
+            min_duration = len(docs) * 60.0 / settings.NOTIFICATIONS_MAX_PER_MINUTE
+            countdown = max(0.0, min_duration - (time.monotonic() - started))
+        send_batch_task.apply_async(kwargs={"batch_size": batch_size}, countdown=countdown)
+    return {"sent": sent, "failed": failed, "lost_claims": lost}
@@ -1,19 +1,23 @@
+from datetime import datetime
 from rest_framework_mongoengine.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework import status
+from django.conf import settings
+from hrms_backend.listing import KeysetPagination, FieldsProjectionMixin, LazyQuerySet
 from .models import Notification
 from .serializers import NotificationReadSerializer, NotificationWriteSerializer
-from .tasks import send_email_task
+from .tasks import send_email_task, send_batch_task
 
-class NotificationViewSet(ModelViewSet):
+class NotificationViewSet(FieldsProjectionMixin, ModelViewSet):
     permission_classes = [IsAuthenticated]
-    queryset = Notification.objects
+    queryset = LazyQuerySet(lambda: Notification.objects)
+    pagination_class = KeysetPagination
     http_method_names = ["get", "post", "put", "patch", "delete", "head", "options"]  # ← optionnel
 
     def get_serializer_class(self):
-        return NotificationWriteSerializer if self.action in ("create","update","partial_update") else NotificationReadSerializer
+        return NotificationWriteSerializer if self.action in ("create","update","partial_update","bulk") else NotificationReadSerializer
 
     def create(self, request, *args, **kwargs):
         ser = self.get_serializer(data=request.data)
@@ -27,8 +31,36 @@ class NotificationViewSet(ModelViewSet):
     @action(detail=True, methods=["post"])
     def resend(self, request, *args, **kwargs):
         notif = self.get_object()
-        notif.status = "queued"
-        notif.error = None
-        notif.save()
+        # jamais une notification en cours d'envoi : elle partirait deux fois
+        requeued = Notification.objects(id=notif.id, status__ne="sending").update(
+            set__status="queued", set__error=None, set__updated_at=datetime.utcnow())
+        if not requeued:
+            return Response({"detail": "Envoi en cours"}, status=status.HTTP_409_CONFLICT)
         send_email_task.delay(str(notif.id))
         return Response({"queued": True}, status=200)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Création en masse : {"subject", "message", "notifications": [{"recipient_email", ...}]}.
+        subject/message de premier niveau servent de valeurs par défaut pour chaque entrée.
+        Insertion en un insert_many, envoi par lots (notifications.send_batch).
+        """
+        items = request.data.get("notifications")
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "notifications doit être une liste non vide"}, status=400)
+        if len(items) > settings.NOTIFICATIONS_BULK_MAX:
+            return Response({"detail": f"maximum {settings.NOTIFICATIONS_BULK_MAX} notifications par requête"}, status=400)
+
+        shared = {k: request.data[k] for k in ("subject", "message", "channel") if k in request.data}
+        ser = self.get_serializer(data=[{**shared, **item} for item in items], many=True)
+        ser.is_valid(raise_exception=True)
+
+        docs = []
+        for data in ser.validated_data:
+            notif = Notification(**data)
+            notif.status = "queued"
+            docs.append(notif.to_mongo().to_dict())
+        ids = Notification._get_collection().insert_many(docs, ordered=False).inserted_ids
+        send_batch_task.delay()
+        return Response({"queued": len(ids), "ids": [str(i) for i in ids]}, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,85 @@
+"""
+Tests sur le harnais des benchmarks (benchmarks.env) : mongomock en mémoire,
+backend d'embeddings "stub", Celery en mode eager. Aucun service externe requis.
+"""
+import os
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+import pytest
+
+os.environ.setdefault("AI_INDEX_DIR", tempfile.mkdtemp(prefix="hrms-test-index-"))
+
+from benchmarks.env import setup   # noqa: E402
+
+setup(mongo="mongomock", backend="stub", db="hrms_test")
+
+# opérations de lecture comptées par collection ; les appels internes de mongomock
+# (find_one -> find...) ne comptent qu'une fois
+_READS = ("find", "find_one", "aggregate", "count_documents", "estimated_document_count", "distinct")
+_counts: Counter = Counter()
+_state = threading.local()
+
+def _install_counter():
+    import mongomock.collection as mc
+
+    def wrap(name):
+        original = getattr(mc.Collection, name)
+
+        def counted(self, *args, **kwargs):
+            depth = getattr(_state, "depth", 0)
+            if not depth:
+                _counts[self.name] += 1
+            _state.depth = depth + 1
+            try:
+                return original(self, *args, **kwargs)
+            finally:
+                _state.depth = depth
+        setattr(mc.Collection, name, counted)
+
+    for name in _READS:
+        wrap(name)
+
+_install_counter()
+
+@contextmanager
+def count_queries():
+    """Lectures Mongo par collection pendant le bloc : with count_queries() as q: ... q["applications"]."""
+    _counts.clear()
+    counts: Counter = Counter()
+    try:
+        yield counts
+    finally:
+        counts.update(_counts)
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    from mongoengine.connection import get_db
+    from accounts.cache import get_principal_cache
+
+    db = get_db()
+    for name in db.list_collection_names():
+        db.drop_collection(name)
+    get_principal_cache()._lru.clear()
+    yield
+
+@pytest.fixture
+def recruiter():
+    from accounts.models import User
+
+    user = User(email="recruteur@example.com", full_name="Recruteur", role="recruiter")
+    user.set_password("secret")
+    return user.save()
+
+@pytest.fixture
+def api(recruiter):
+    from rest_framework.test import APIClient
+    from accounts.jwt_utils import create_jwt
+
+    client = APIClient()
+    token = create_jwt({"uid": str(recruiter.id), "role": recruiter.role, "email": recruiter.email})
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    client.get("/api/accounts/auth/me/")   # utilisateur en cache : hors des comptages
+    return client
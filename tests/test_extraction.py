@@ -0,0 +1,54 @@
+"""Extraction depuis un process daemon (enfant prefork Celery) : isolée dans un pool, un parseur qui plante ou se bloque n'emporte pas l'appelant."""
+import multiprocessing
+import os
+import signal
+import time
+
+import pytest
+
+def _crash(data, filename="", max_pages=None):
+    os._exit(3)   # segfault, OOM killer...
+
+def _hang(data, filename="", max_pages=None):
+    signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGALRM})   # bloqué hors de l'interpréteur : sourd à l'alarme
+    time.sleep(60)
+
+def _whoami(data, filename="", max_pages=None):
+    return str(os.getpid()), 1
+
+def _daemon_child(queue):
+    from applications import extraction
+
+    report = {"daemon": multiprocessing.current_process().daemon}
+    try:
+        extraction._KILL_GRACE_S = 0.5
+        service = extraction.ExtractionService(workers=1, timeout=0.5, max_pages=5, max_bytes=1 << 20, parallel_pages=20)
+        real = extraction.extract_document
+        for name, parser in (("whoami", _whoami), ("crash", _crash), ("hang", _hang)):
+            extraction.extract_document = parser
+            result = service.extract(b"cv", "cv.txt")
+            report[name] = result.text or result.error
+        extraction.extract_document = real
+        report["after"] = service.extract(b"python django", "cv.txt").text
+        service.shutdown()
+    except BaseException as e:
+        report["error"] = repr(e)
+    report["pid"] = str(os.getpid())
+    queue.put(report)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+def test_daemon_process_extracts_in_pool():
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    child = context.Process(target=_daemon_child, args=(queue,), daemon=True)
+    child.start()
+    report = queue.get(timeout=60)
+    child.join(10)
+
+    assert report.get("error") is None, report
+    assert report["daemon"] is True
+    assert report["whoami"] != report["pid"]   # parsé dans un autre process
+    assert report["crash"] == "BrokenProcessPool"
+    assert report["hang"] == "timeout"
+    assert report["after"] == "python django"   # l'appelant a survécu, pool recréé
+    assert child.exitcode == 0
@@ -0,0 +1,27 @@
+"""Validateurs HTTP des offres antérieures au champ updated_at : stables, donc 304 possible."""
+import datetime as dt
+
+from django.core.management import call_command
+
+def _legacy_job():
+    from jobs.models import Job
+
+    created = dt.datetime(2024, 1, 2, 3, 4, 5)
+    Job._get_collection().insert_one({"title": "Ancienne", "description": "python", "created_at": created})
+    return Job.objects.get(title="Ancienne"), created
+
+def test_legacy_job_falls_back_to_created_at(api):
+    job, created = _legacy_job()
+    assert job.updated_at is None
+    for path in (f"/api/jobs/{job.id}/", f"/api/jobs/{job.id}/top/"):
+        etag = api.get(path)["ETag"]
+        assert api.get(path, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+def test_backfill_job_updated_at():
+    from jobs.models import Job
+
+    job, created = _legacy_job()
+    Job(title="Récente").save()
+    call_command("backfill_job_updated_at")
+    assert Job.objects.get(id=job.id).updated_at == created
+    assert Job.objects.get(title="Récente").updated_at is not None
@@ -0,0 +1,45 @@
+"""Process forké après la première connexion (gunicorn, Celery prefork) : il ouvre son propre client."""
+import json
+import os
+
+import pytest
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork indisponible")
+def test_child_opens_its_own_client():
+    from mongoengine.connection import get_db
+    from applications.models import Application
+
+    Application.objects.count()   # client et collection ouverts dans le parent
+    parent_client = get_db().client   # gardé vivant : son id ne peut pas être réattribué dans l'enfant
+    parent_collection = Application._get_collection()
+
+    read, write = os.pipe()
+    pid = os.fork()
+    if pid == 0:   # enfant : jamais d'exception qui remonterait dans pytest
+        try:
+            inherited = "_collection" in Application.__dict__ and Application.__dict__["_collection"] is not None
+            Application.objects.count()
+            report = {
+                "inherited_collection": inherited,
+                "new_client": id(get_db().client) != id(parent_client),
+                "documents_use_it": Application._get_collection().database.client is get_db().client,
+                "collection_reopened": Application._get_collection() is not parent_collection,
+            }
+        except BaseException as e:
+            report = {"error": repr(e)}
+        os.write(write, json.dumps(report).encode())
+        os._exit(0)
+
+    os.close(write)
+    _, status = os.waitpid(pid, 0)
+    with os.fdopen(read) as fh:
+        report = json.loads(fh.read())
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert report == {
+        "inherited_collection": False,
+        "new_client": True,
+        "documents_use_it": True,
+        "collection_reopened": True,
+    }
+    # le parent garde son client
+    assert get_db().client is parent_client
@@ -0,0 +1,94 @@
+"""Lectures Mongo des listes et fiches : constantes quel que soit le nombre de références (pas de N+1)."""
+import pytest
+
+from tests.conftest import count_queries
+
+def _seed(n):
+    from accounts.models import User
+    from applications.models import Application
+    from jobs.models import Job
+
+    jobs = [Job(title=f"Offre {i}", description="python django", department=f"D{i % 3}").save() for i in range(n)]
+    candidates = [User(email=f"candidat{i}@example.com", full_name=f"Candidat {i}", password_hash="x").save()
+                  for i in range(n)]
+    apps = [Application(job=jobs[i], candidate=candidates[i]).save() for i in range(n)]
+    return jobs, apps
+
+@pytest.mark.parametrize("n", [3, 25])
+def test_application_list(api, n):
+    _seed(n)
+    with count_queries() as q:
+        r = api.get("/api/applications/?page_size=50")
+    assert r.status_code == 200
+    assert len(r.data["results"]) == n
+    # une page + un $in par champ référence, jamais un aller-retour par candidature
+    assert q == {"applications": 1, "users": 1, "jobs": 1}
+    first = r.data["results"][0]
+    assert set(first["candidate"]) == {"id", "full_name", "email"}
+    assert set(first["job"]) == {"id", "title", "department", "status"}
+
+def test_application_list_projection_skips_references(api):
+    _seed(5)
+    with count_queries() as q:
+        r = api.get("/api/applications/?page_size=50&fields=score,status")
+    assert r.status_code == 200
+    assert q == {"applications": 1}
+
+def test_application_retrieve(api):
+    _, apps = _seed(5)
+    with count_queries() as q:
+        r = api.get(f"/api/applications/{apps[2].id}/")
+    assert r.status_code == 200
+    assert r.data["candidate"]["email"] == "candidat2@example.com"
+    assert q == {"applications": 1, "users": 1, "jobs": 1}
+
+@pytest.mark.parametrize("n", [3, 25])
+def test_job_list(api, n):
+    _seed(n)
+    with count_queries() as q:
+        r = api.get("/api/jobs/?page_size=50")
+    assert r.status_code == 200
+    assert q == {"jobs": 1}
+
+def test_job_retrieve(api):
+    jobs, _ = _seed(5)
+    with count_queries() as q:
+        r = api.get(f"/api/jobs/{jobs[1].id}/")
+    assert r.status_code == 200
+    assert r.json()["title"] == "Offre 1"
+    # validateurs HTTP (updated_at seul) puis l'offre
+    assert q == {"jobs": 2}
+
+@pytest.mark.parametrize("n", [1, 25])
+def test_job_top(api, n):
+    from applications.models import Application
+    from jobs.models import Job
+    from accounts.models import User
+
+    job = Job(title="Offre", description="python").save()
+    for i in range(n):
+        candidate = User(email=f"top{i}@example.com", full_name=f"Top {i}", password_hash="x").save()
+        Application(job=job, candidate=candidate, score=float(i)).save()
+    with count_queries() as q:
+        r = api.get(f"/api/jobs/{job.id}/top/")
+    assert r.status_code == 200
+    assert len(r.json()) == min(n, 5)
+    assert r.json()[0]["candidate"]["email"] == f"top{n - 1}@example.com"
+    # validateurs (offre, dernière candidature, nombre : curseur + count_documents), puis
+    # l'offre, le top et un $in par référence ; identique quel que soit le nombre de candidatures
+    assert q == {"jobs": 3, "applications": 4, "users": 1}
+
+@pytest.mark.parametrize("n", [1, 25])
+def test_notification_list(api, n):
+    from accounts.models import User
+    from notifications.models import Notification
+
+    for i in range(n):
+        user = User(email=f"dest{i}@example.com", full_name=f"Dest {i}", password_hash="x").save()
+        Notification(recipient=user, recipient_email=user.email, subject="Sujet", message="Corps").save()
+    with count_queries() as q:
+        r = api.get("/api/notifications/?page_size=50")
+    assert r.status_code == 200
+    assert len(r.data["results"]) == n
+    assert set(r.data["results"][0]["recipient"]) == {"id", "full_name", "email"}
+    assert q == {"notifications": 1, "users": 1}
@@ -0,0 +1,36 @@
+"""Extraction de compétences : taxonomie livrée (synonymes, limites de tokens) et automate compilé à grande échelle."""
+import random
+
+from django.conf import settings
+
+from ai.skills import TrieRegexExtractor, load_taxonomy
+from benchmarks.bench_skills import synthetic_taxonomy
+
+def _shipped():
+    return TrieRegexExtractor(load_taxonomy(settings.AI_SKILLS_TAXONOMY))
+
+def test_shipped_taxonomy_synonyms_and_boundaries():
+    extractor = _shipped()
+    assert len(extractor.taxonomy) >= 400
+    text = ("Développeuse K8s et Spring Boot, ReactJS, PL/SQL ; gestion de la paie sous Silae, "
+            "anglais courant. Notions de digital, tableau de bord, aller vite.")
+    assert extractor.skills(text) == ["anglais", "kubernetes", "oracle", "paie", "react", "silae", "spring"]
+    match = next(m for m in extractor.extract(text) if m.skill == "kubernetes")
+    assert text[match.start:match.end] == match.surface == "K8s"
+    # "c" ne matche ni dans "c++" ni dans "c#", "git" pas dans "digital"
+    assert extractor.skills("C++, C# et git") == ["c#", "c++", "git"]
+
+def test_large_taxonomy_single_automaton():
+    # taille réaliste d'un référentiel (ESCO, O*NET) : taxonomie livrée + 20 000 compétences
+    rng = random.Random(7)
+    taxonomy = {**synthetic_taxonomy(20000, rng), **load_taxonomy(settings.AI_SKILLS_TAXONOMY)}
+    extractor = TrieRegexExtractor(taxonomy)
+    terms = [term for canon, synonyms in taxonomy.items() for term in (canon, *synonyms)]
+    inserted = rng.sample(terms, 500)
+    text = " ; ".join(f"lorem {term.upper() if i % 2 else term} ipsum" for i, term in enumerate(inserted))
+
+    matches = extractor.extract(text)
+    # un seul passage, plus long terme d'abord : exactement les termes insérés, synonymes ramenés au canonique
+    assert [m.surface.lower() for m in matches] == [term.lower() for term in inserted]
+    assert [m.skill for m in matches] == [extractor.canonical[" ".join(t.lower().split())] for t in inserted]
+    assert all(text[m.start:m.end] == m.surface for m in matches)
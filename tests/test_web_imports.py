@@ -0,0 +1,45 @@
+"""Process web (PROCESS_ROLE=web) : URLconf et vues chargées sans jamais importer la pile ML."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ML_MODULES = ("torch", "sentence_transformers")
+
+# import bloqué et noté : le test vaut aussi sur une machine où torch est installé
+_PROBE = """
+import importlib.abc, json, sys
+
+ML = {ml!r}
+attempted = []
+
+class Guard(importlib.abc.MetaPathFinder):
+    def find_spec(self, name, path=None, target=None):
+        if name.split(".")[0] in ML:
+            attempted.append(name)
+            raise ImportError(name + " importé par un process web")
+        return None
+
+sys.meta_path.insert(0, Guard())
+
+import django
+django.setup()
+import hrms_backend.urls, hrms_backend.wsgi
+for app in ("accounts", "jobs", "applications", "notifications", "analytics", "ai"):
+    __import__(app + ".views")
+    __import__(app + ".urls")
+from django.conf import settings
+print(json.dumps({{"attempted": attempted, "loaded": sorted(m for m in ML if m in sys.modules),
+                  "mode": settings.AI_EMBEDDING_MODE}}))
+"""
+
+def test_web_role_never_imports_ml():
+    env = {k: v for k, v in os.environ.items() if not k.startswith("AI_")}
+    env.update(PROCESS_ROLE="web", AI_BACKEND="torch", AI_WARMUP_WEB="false",
+               DJANGO_SETTINGS_MODULE="hrms_backend.settings")
+    proc = subprocess.run([sys.executable, "-c", _PROBE.format(ml=ML_MODULES)], capture_output=True, text=True,
+                          env=env, cwd=Path(__file__).resolve().parent.parent, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    assert report == {"attempted": [], "loaded": [], "mode": "celery"}